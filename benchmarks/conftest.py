@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+import pytest
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+
+@pytest.fixture
+def loop() -> Iterator[asyncio.AbstractEventLoop]:
+    # A loop shared by setup and measured code, so that loop creation isn't
+    # part of the measurements.
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from iaqualink.simulator import AqualinkSimulator
+
+if TYPE_CHECKING:
+    from collections.abc import Coroutine, Iterator
+
+    from iaqualink.client import AqualinkClient
+    from iaqualink.system import AqualinkSystem
+
+# Round trips go through the simulator with no added latency, so these
+# measure the client's own overhead: request building, the httpx stack and
+# response parsing.
+ROUNDS = 50
+
+
+@pytest.fixture
+def simulator() -> AqualinkSimulator:
+    return AqualinkSimulator(iaqua_systems=1, exo_systems=1, seed=0)
+
+
+@pytest.fixture
+def client(
+    loop: asyncio.AbstractEventLoop, simulator: AqualinkSimulator
+) -> Iterator[AqualinkClient]:
+    client = simulator.client()
+    loop.run_until_complete(client.login())
+    yield client
+    loop.run_until_complete(client.close())
+
+
+def _system(
+    loop: asyncio.AbstractEventLoop, client: AqualinkClient, serial: str
+) -> AqualinkSystem:
+    system = loop.run_until_complete(client.get_systems())[serial]
+    loop.run_until_complete(system.update())
+    return system
+
+
+def _run(
+    benchmark: Any,
+    loop: asyncio.AbstractEventLoop,
+    func: Any,
+    setup: Any = None,
+) -> None:
+    def target() -> None:
+        coro: Coroutine[Any, Any, Any] = func()
+        loop.run_until_complete(coro)
+
+    benchmark.pedantic(target, setup=setup, rounds=ROUNDS)
+
+
+def test_login(
+    benchmark: Any, loop: asyncio.AbstractEventLoop, client: AqualinkClient
+) -> None:
+    benchmark.group = "client"
+    _run(benchmark, loop, client.login)
+
+
+def test_get_systems(
+    benchmark: Any, loop: asyncio.AbstractEventLoop, client: AqualinkClient
+) -> None:
+    benchmark.group = "client"
+    _run(benchmark, loop, client.get_systems)
+
+
+@pytest.mark.parametrize("serial", ["IAQUA00000", "EXO00000"])
+def test_update(
+    benchmark: Any,
+    loop: asyncio.AbstractEventLoop,
+    client: AqualinkClient,
+    serial: str,
+) -> None:
+    system = _system(loop, client, serial)
+
+    def setup() -> None:
+        # Defeat the refresh throttling so every round hits the API.
+        system.last_refresh = 0
+
+    benchmark.group = "update"
+    _run(benchmark, loop, system.update, setup)
+
+
+def test_iaqua_set_aux(
+    benchmark: Any, loop: asyncio.AbstractEventLoop, client: AqualinkClient
+) -> None:
+    system = _system(loop, client, "IAQUA00000")
+    benchmark.group = "iaqua-command"
+    _run(benchmark, loop, lambda: system.set_aux("aux_4"))
+
+
+def test_iaqua_set_temps(
+    benchmark: Any, loop: asyncio.AbstractEventLoop, client: AqualinkClient
+) -> None:
+    system = _system(loop, client, "IAQUA00000")
+    benchmark.group = "iaqua-command"
+    _run(benchmark, loop, lambda: system.set_temps({"temp2": "86"}))
+
+
+def test_iaqua_set_icl_light(
+    benchmark: Any, loop: asyncio.AbstractEventLoop, client: AqualinkClient
+) -> None:
+    system = _system(loop, client, "IAQUA00000")
+    data = {"zoneId": "1", "red_val": "255", "green_val": "0", "blue_val": "0"}
+    benchmark.group = "iaqua-command"
+    _run(benchmark, loop, lambda: system.set_icl_light(dict(data)))
+
+
+def test_exo_set_aux(
+    benchmark: Any, loop: asyncio.AbstractEventLoop, client: AqualinkClient
+) -> None:
+    system = _system(loop, client, "EXO00000")
+    benchmark.group = "exo-command"
+    _run(benchmark, loop, lambda: system.set_aux("aux_1", 1))
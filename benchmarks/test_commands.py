@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from iaqualink.simulator import AqualinkSimulator
+
+if TYPE_CHECKING:
+    from collections.abc import Coroutine, Iterator
+
+    from iaqualink.systems.iaqua.system import IaquaSystem
+
+# A scene: three aux outputs, a temperature and a light, on a simulator
+# adding a fixed round trip latency like the real service would.
+LATENCY = 0.02
+ROUNDS = 10
+
+
+@pytest.fixture
+def system(loop: asyncio.AbstractEventLoop) -> Iterator[IaquaSystem]:
+    simulator = AqualinkSimulator(iaqua_systems=1, latency=LATENCY, seed=0)
+    client = simulator.client()
+    loop.run_until_complete(client.login())
+    systems = loop.run_until_complete(client.get_systems())
+    system: IaquaSystem = systems["IAQUA00000"]  # type: ignore[assignment]
+    loop.run_until_complete(system.update())
+    yield system
+    loop.run_until_complete(client.close())
+
+
+def _scene(system: IaquaSystem) -> list[Coroutine[Any, Any, None]]:
+    return [
+        system.set_aux("aux_4"),
+        system.set_aux("aux_5"),
+        system.set_aux("aux_6"),
+        system.set_temps({"temp2": "86"}),
+        system.set_light({"aux": "2", "light": "75"}),
+    ]
+
+
+def test_scene_sequential(
+    benchmark: Any, loop: asyncio.AbstractEventLoop, system: IaquaSystem
+) -> None:
+    async def scene() -> None:
+        for coro in _scene(system):
+            await coro
+
+    benchmark.group = "iaqua-scene"
+    benchmark.pedantic(lambda: loop.run_until_complete(scene()), rounds=ROUNDS)
+
+
+def test_scene_batched(
+    benchmark: Any, loop: asyncio.AbstractEventLoop, system: IaquaSystem
+) -> None:
+    async def scene() -> None:
+        await asyncio.gather(*_scene(system))
+
+    benchmark.group = "iaqua-scene"
+    benchmark.pedantic(lambda: loop.run_until_complete(scene()), rounds=ROUNDS)
+    benchmark.extra_info["parsed"] = system.commands.stats.parsed / ROUNDS
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import tracemalloc
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from iaqualink.state import parsed_property
+from iaqualink.systems.iaqua.device import IaquaDevice
+
+FLEET_SIZE = 10_000
+
+PROPERTIES = ["label", "is_on", "brightness", "rgb_color"]
+
+TEMPLATES: list[dict[str, Any]] = [
+    {"name": "aux_1", "state": "1", "label": "CLEANER", "type": "0"},
+    {"name": "aux_2", "state": "0", "label": "POOL LIGHT", "type": "0"},
+    {"name": "aux_3", "state": "1", "subtype": "75", "label": "", "type": "1"},
+    {"name": "aux_4", "state": "1", "subtype": "3", "label": "", "type": "2"},
+    {"name": "pool_pump", "state": "1"},
+    {"name": "freeze_protection", "state": "0"},
+    {
+        "name": "icl_zone_1",
+        "zoneId": 1,
+        "zoneStatus": "on",
+        "dim_level": "50",
+        "red_val": "255",
+        "green_val": "128",
+        "blue_val": "0",
+        "white_val": "0",
+    },
+]
+
+
+def _fleet() -> list[IaquaDevice]:
+    system = MagicMock()
+    return [
+        IaquaDevice.from_data(system, dict(TEMPLATES[i % len(TEMPLATES)]))
+        for i in range(FLEET_SIZE)
+    ]
+
+
+def _getters(device: IaquaDevice) -> list[tuple[str, Any]]:
+    getters = []
+    for name in PROPERTIES:
+        attr = getattr(type(device), name, None)
+        if attr is not None:
+            getters.append((name, attr))
+    return getters
+
+
+Fleet = list[tuple[IaquaDevice, list[tuple[str, Any]]]]
+
+
+@pytest.fixture(scope="module")
+def fleet() -> Fleet:
+    return [(x, _getters(x)) for x in _fleet()]
+
+
+def _read_parsed(fleet: Fleet) -> None:
+    for device, getters in fleet:
+        for name, _ in getters:
+            getattr(device, name)
+
+
+def _read_raw(fleet: Fleet) -> None:
+    """Parse every value on each access, like plain properties do."""
+    for device, getters in fleet:
+        for _, attr in getters:
+            if isinstance(attr, parsed_property):
+                attr.func(device)
+            else:
+                attr.fget(device)
+
+
+def test_access_raw(benchmark: Any, fleet: Fleet) -> None:
+    benchmark(_read_raw, fleet)
+
+
+def test_access_parsed(benchmark: Any, fleet: Fleet) -> None:
+    _read_parsed(fleet)
+    benchmark(_read_parsed, fleet)
+
+
+def test_access_parsed_after_update(benchmark: Any, fleet: Fleet) -> None:
+    """Every device changed since the last read, e.g. after a refresh."""
+
+    def setup() -> None:
+        for device, _ in fleet:
+            device.data["state"] = device.data.get("state")
+
+    benchmark.pedantic(_read_parsed, args=(fleet,), setup=setup, rounds=20)
+
+
+def test_memory(benchmark: Any) -> None:
+    tracemalloc.start()
+    try:
+        fleet = [(x, _getters(x)) for x in _fleet()]
+        created, _ = tracemalloc.get_traced_memory()
+        _read_parsed(fleet)
+        parsed, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    benchmark.extra_info["fleet_bytes"] = created
+    benchmark.extra_info["parsed_bytes"] = parsed - created
+    benchmark.extra_info["bytes_per_device"] = parsed // FLEET_SIZE
+    benchmark.pedantic(lambda: None, rounds=1)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+import pytest
+import respx
+
+from iaqualink.client import AqualinkClient
+from iaqualink.systems.iaqua.system import IaquaSystem
+
+# Simulated round trip to p-api.iaqualink.net.
+LATENCY = 0.05
+
+HOME_SCREEN = {
+    "message": "",
+    "home_screen": [
+        {"status": "Online"},
+        {"response": ""},
+        {"system_type": "0"},
+        {"temp_scale": "F"},
+        {"spa_temp": "95"},
+        {"pool_temp": "80"},
+        {"spa_set_point": "102"},
+        {"pool_set_point": "85"},
+        {"pool_pump": "1"},
+        {"spa_heater": "0"},
+    ],
+}
+
+DEVICES_SCREEN = {
+    "message": "",
+    "devices_screen": [
+        {"status": "Online"},
+        {"response": ""},
+        {"group": "1"},
+        {
+            "aux_1": [
+                {"state": "0"},
+                {"label": "CLEANER"},
+                {"icon": "aux_1_0.png"},
+                {"type": "0"},
+                {"subtype": "0"},
+            ]
+        },
+    ],
+}
+
+SYSTEM_DATA = {
+    "serial_number": "SN123456",
+    "device_type": "iaqua",
+    "name": "Pool",
+}
+
+
+async def _session(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(LATENCY)
+    if request.url.params["command"] == "get_home":
+        return httpx.Response(200, json=HOME_SCREEN)
+    return httpx.Response(200, json=DEVICES_SCREEN)
+
+
+@pytest.fixture
+def client(loop):
+    client = AqualinkClient("user", "pass")
+    yield client
+    loop.run_until_complete(client.close())
+
+
+@pytest.fixture
+def session_mock():
+    with respx.mock() as mock:
+        mock.get(url__regex=r".*/session\.json.*").mock(side_effect=_session)
+        yield mock
+
+
+@pytest.mark.parametrize(
+    "concurrent", [False, True], ids=["sequential", "concurrent"]
+)
+def test_iaqua_update_latency(
+    benchmark, loop, client, session_mock, concurrent
+) -> None:
+    system = IaquaSystem(client, SYSTEM_DATA)
+    system.concurrent_update = concurrent
+
+    def setup() -> None:
+        # Defeat the refresh throttling so every round hits the API.
+        system.last_refresh = 0
+
+    # Timed here rather than read from benchmark.stats, which is None when
+    # benchmarks are disabled.
+    durations = []
+
+    def update() -> None:
+        start = time.perf_counter()
+        loop.run_until_complete(system.update())
+        durations.append(time.perf_counter() - start)
+
+    # Warm up, a single round is run when benchmarks are disabled.
+    loop.run_until_complete(system.update())
+
+    benchmark.group = "iaqua-update"
+    benchmark.pedantic(update, setup=setup, rounds=10)
+
+    # Two screen round trips, overlapping when running concurrently.
+    expected = (1 if concurrent else 2) * LATENCY
+    assert min(durations) < expected + LATENCY / 2
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import importlib.util
+import pathlib
+from typing import TYPE_CHECKING, Any
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+from iaqualink import json_backend
+from iaqualink.systems.exo.system import ExoSystem
+from iaqualink.systems.iaqua.system import IaquaSystem
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+# Payloads recorded from real systems, see tests/examplepayload.txt.
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+BACKENDS = [
+    x
+    for x in json_backend.JSON_BACKENDS
+    if x == "json" or importlib.util.find_spec(x) is not None
+]
+
+SYSTEM_DATA = {"serial_number": "SN123456", "name": "Pool"}
+
+
+def _iaqua_home(system: Any) -> Callable[[httpx.Response], Any]:
+    return system._parse_home_response
+
+
+def _iaqua_devices(system: Any) -> Callable[[httpx.Response], Any]:
+    return system._parse_devices_response
+
+
+def _exo_shadow(system: Any) -> Callable[[httpx.Response], Any]:
+    return system._parse_shadow_response
+
+
+PARSERS = {
+    "home_screen": (IaquaSystem, _iaqua_home),
+    "devices_screen": (IaquaSystem, _iaqua_devices),
+    "shadow": (ExoSystem, _exo_shadow),
+}
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request: pytest.FixtureRequest) -> Iterator[str]:
+    previous = json_backend.get_backend()
+    json_backend.set_backend(request.param)
+    yield request.param
+    json_backend.set_backend(previous)
+
+
+@pytest.fixture(params=list(PARSERS))
+def fixture(request: pytest.FixtureRequest) -> str:
+    return request.param
+
+
+def _response(fixture: str) -> httpx.Response:
+    content = (FIXTURES / f"{fixture}.json").read_bytes()
+    return httpx.Response(200, content=content)
+
+
+def test_decode_httpx(benchmark: Any, fixture: str) -> None:
+    """Baseline: httpx's own Response.json()."""
+    response = _response(fixture)
+    response.read()
+    benchmark(response.json)
+
+
+def test_decode(benchmark: Any, backend: str, fixture: str) -> None:
+    response = _response(fixture)
+    response.read()
+    benchmark(json_backend.decode_response, response)
+
+
+def test_parse(benchmark: Any, backend: str, fixture: str) -> None:
+    """Decode and flatten a response into device records."""
+    system_class, parser = PARSERS[fixture]
+    system = system_class(MagicMock(), SYSTEM_DATA)
+    response = _response(fixture)
+    response.read()
+    parse = parser(system)
+    # Steady state: devices already exist and get merged into.
+    parse(response)
+    benchmark(parse, response)
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import copy
+import json
+import pathlib
+from typing import Any
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+
+from iaqualink.systems.exo.device import ExoDevice
+from iaqualink.systems.exo.system import ExoSystem
+from iaqualink.systems.iaqua.device import IaquaDevice
+from iaqualink.systems.iaqua.system import IaquaSystem
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+SYSTEM_DATA = {"serial_number": "SN123456", "name": "Pool"}
+
+# Number of aux devices in the large devices screen.
+LARGE_AUX_COUNT = 200
+
+
+def _load(name: str) -> dict[str, Any]:
+    return json.loads((FIXTURES / f"{name}.json").read_text())
+
+
+def _large_devices_screen() -> dict[str, Any]:
+    data = _load("devices_screen")
+    screen = data["devices_screen"]
+    template = next(x for x in screen[3:] if "aux_1" in x)["aux_1"]
+    screen[3:] = [
+        {f"aux_{i}": copy.deepcopy(template)}
+        for i in range(1, LARGE_AUX_COUNT + 1)
+    ]
+    return data
+
+
+def _large_home_screen() -> dict[str, Any]:
+    data = _load("home_screen")
+    screen = data["home_screen"]
+    screen += [{f"sensor_{i}": str(i)} for i in range(LARGE_AUX_COUNT)]
+    return data
+
+
+def _versioned_shadow() -> dict[str, Any]:
+    # Steady polls of a versioned shadow are skipped without being parsed.
+    return {**_load("shadow"), "version": 1}
+
+
+PAYLOADS = {
+    "home-small": (IaquaSystem, "_parse_home_response", "home_screen"),
+    "home-large": (IaquaSystem, "_parse_home_response", _large_home_screen),
+    "devices-small": (
+        IaquaSystem,
+        "_parse_devices_response",
+        "devices_screen",
+    ),
+    "devices-large": (
+        IaquaSystem,
+        "_parse_devices_response",
+        _large_devices_screen,
+    ),
+    "shadow": (ExoSystem, "_parse_shadow_response", "shadow"),
+    "shadow-versioned": (
+        ExoSystem,
+        "_parse_shadow_response",
+        _versioned_shadow,
+    ),
+}
+
+
+@pytest.mark.parametrize("payload", list(PAYLOADS))
+@pytest.mark.parametrize("steady", [False, True], ids=["cold", "steady"])
+def test_parse(benchmark: Any, payload: str, steady: bool) -> None:
+    """Parse a response into a new system (cold) or an existing one."""
+    system_class, parser, source = PAYLOADS[payload]
+    data = _load(source) if isinstance(source, str) else source()
+    response = httpx.Response(200, json=data)
+
+    def setup() -> tuple[tuple[Any, ...], dict[str, Any]]:
+        system = system_class(MagicMock(), SYSTEM_DATA)
+        if steady:
+            getattr(system, parser)(response)
+        return (system,), {}
+
+    benchmark.group = f"parse-{payload}"
+    benchmark.pedantic(
+        lambda system: getattr(system, parser)(response),
+        setup=setup,
+        rounds=200,
+    )
+
+
+IAQUA_DEVICES: list[dict[str, Any]] = [
+    {"name": "pool_pump", "state": "1"},
+    {"name": "pool_heater", "state": "0"},
+    {"name": "pool_set_point", "state": "85"},
+    {"name": "freeze_protection", "state": "0"},
+    {"name": "spa_temp", "state": "102"},
+    {"name": "aux_1", "state": "0", "type": "0", "label": "CLEANER"},
+    {"name": "aux_2", "state": "0", "type": "0", "label": "POOL LIGHT"},
+    {"name": "aux_3", "state": "0", "type": "1", "label": "", "subtype": "0"},
+    {"name": "aux_4", "state": "0", "type": "2", "label": "", "subtype": "4"},
+    {"name": "icl_zone_1", "zoneId": 1},
+    {"name": "heatpump_info", "isheatpumpPresent": True},
+]
+
+EXO_DEVICES: list[dict[str, Any]] = [
+    {"name": "aux_1", "state": 0},
+    {"name": "sns_1", "state": 1, "value": 75, "sensor_type": "Ph"},
+    {"name": "heating", "sp": 28, "enabled": 0},
+    {"name": "heater", "state": 0},
+    {"name": "production", "state": 1},
+    {"name": "ph_sp", "state": 74},
+]
+
+
+def test_iaqua_from_data(benchmark: Any) -> None:
+    system = MagicMock()
+
+    def classify() -> None:
+        for data in IAQUA_DEVICES:
+            IaquaDevice.from_data(system, data)
+
+    benchmark.group = "from-data"
+    benchmark(classify)
+
+
+def test_exo_from_data(benchmark: Any) -> None:
+    system = MagicMock()
+
+    def classify() -> None:
+        for data in EXO_DEVICES:
+            ExoDevice.from_data(system, data)
+
+    benchmark.group = "from-data"
+    benchmark(classify)
+
+
+# Devices of a fleet of systems, with as many aux devices as the largest
+# panels. The same names show up on every system.
+FLEET_SYSTEMS = 50
+
+REGISTRIES = {
+    "iaqua": (
+        IaquaDevice,
+        IAQUA_DEVICES
+        + [
+            {"name": f"aux_{i}", "state": "0", "type": "0", "label": "AUX"}
+            for i in range(5, 33)
+        ],
+    ),
+    "exo": (ExoDevice, EXO_DEVICES),
+}
+
+
+@pytest.mark.parametrize("system_type", list(REGISTRIES))
+@pytest.mark.parametrize("memoized", [False, True], ids=["cold", "memoized"])
+def test_classify(benchmark: Any, system_type: str, memoized: bool) -> None:
+    """Classify every device of a fleet, with or without known names."""
+    device_class, devices = REGISTRIES[system_type]
+    registry = device_class.registry
+    fleet = [dict(x) for _ in range(FLEET_SYSTEMS) for x in devices]
+
+    def setup() -> tuple[tuple[Any, ...], dict[str, Any]]:
+        registry._memo.clear()
+        if memoized:
+            for data in devices:
+                registry.classify(data)
+        return (), {}
+
+    def classify() -> None:
+        for data in fleet:
+            registry.classify(data)
+
+    benchmark.group = f"classify-{system_type}"
+    benchmark.extra_info["devices"] = len(fleet)
+    benchmark.pedantic(classify, setup=setup, rounds=100)
@@ -11,6 +11,7 @@ from typing import Any, Concatenate
 
 import httpx
 from iaqualink.client import AqualinkClient
+from iaqualink.const import CIRCUIT_FAILURE_THRESHOLD
 from iaqualink.device import (
     AqualinkBinarySensor,
     AqualinkLight,
@@ -19,6 +20,9 @@ from iaqualink.device import (
     AqualinkThermostat,
 )
 from iaqualink.exception import AqualinkServiceException
+from iaqualink.group import AqualinkSystemGroup
+from iaqualink.pool import AqualinkConnectionPool
+from iaqualink.retry import RetryPolicy
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, Platform
@@ -66,7 +70,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: AqualinkConfigEntry) ->
     username = entry.data[CONF_USERNAME]
     password = entry.data[CONF_PASSWORD]
 
-    aqualink = AqualinkClient(username, password, httpx_client=get_async_client(hass))
+    # Transient cloud errors are retried, and requests fail fast while the
+    # cloud is down, so connections can be kept across failed refreshes.
+    pool = AqualinkConnectionPool(
+        httpx_client=get_async_client(hass),
+        failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+    )
+    aqualink = AqualinkClient(
+        username, password, pool=pool, retry_policy=RetryPolicy()
+    )
     try:
         await aqualink.login()
     except AqualinkServiceException as login_exception:
@@ -146,26 +158,29 @@ async def async_setup_entry(hass: HomeAssistant, entry: AqualinkConfigEntry) ->
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    group = AqualinkSystemGroup(systems)
+
     async def _async_systems_update(_: datetime) -> None:
         """Refresh internal state for all systems."""
-        for system in systems:
-            prev = system.online
+        prev = {system.serial: system.online for system in group}
+
+        result = await group.update()
 
-            try:
-                await system.update()
-            except (AqualinkServiceException, httpx.HTTPError) as svc_exception:
-                if prev is not None:
+        for serial, system_result in result.results.items():
+            system = system_result.system
+            if system_result.exception is not None:
+                if prev[serial] is not None:
                     _LOGGER.warning(
                         "Failed to refresh system %s state: %s",
-                        system.serial,
-                        svc_exception,
+                        serial,
+                        system_result.exception,
                     )
-                await system.aqualink.close()
-            else:
-                cur = system.online
-                if cur and not prev:
-                    _LOGGER.warning("System %s reconnected to iAqualink", system.serial)
+            elif system.online and not prev[serial]:
+                _LOGGER.warning("System %s reconnected to iAqualink", serial)
 
+        # Entities with changed devices were already written by their device
+        # listeners, only availability changes need to reach all of them.
+        if any(system.online != prev[system.serial] for system in group):
             async_dispatcher_send(hass, DOMAIN)
 
     entry.async_on_unload(
@@ -6,6 +6,7 @@ import logging
 from typing import Any
 
 from iaqualink.device import AqualinkThermostat
+from iaqualink.system import AqualinkSystem
 from iaqualink.systems.iaqua.device import AqualinkState
 
 from homeassistant.components.climate import (
@@ -61,6 +62,14 @@ class HassAqualinkThermostat(AqualinkEntity[AqualinkThermostat], ClimateEntity):
         self._attr_min_temp = dev.min_temperature
         self._attr_max_temp = dev.max_temperature
 
+    def _listener_source(self) -> AqualinkSystem:
+        """Listen to the whole system.
+
+        The thermostat state also depends on its heater and temperature
+        sensor, which are separate devices.
+        """
+        return self.dev.system
+
     @property
     def hvac_mode(self) -> HVACMode:
         """Return the current HVAC mode."""
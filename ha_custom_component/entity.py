@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from iaqualink.device import AqualinkDevice
+from iaqualink.system import AqualinkSystem, DeviceChange
 
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
@@ -15,10 +16,10 @@ class AqualinkEntity[AqualinkDeviceT: AqualinkDevice](Entity):
     """Abstract class for all Aqualink platforms.
 
     Entity state is updated via the interval timer within the integration.
-    Any entity state change via the iaqualink library triggers an internal
-    state refresh which is then propagated to all the entities in the system
-    via the refresh_system decorator above to the _update_callback in this
-    class.
+    Only entities whose device changed during a refresh are written, through
+    the device listener registered in async_added_to_hass. Availability
+    changes and commands sent through the refresh_system decorator still
+    propagate to all the entities via the dispatcher signal.
     """
 
     _attr_should_poll = False
@@ -40,6 +41,17 @@ class AqualinkEntity[AqualinkDeviceT: AqualinkDevice](Entity):
         self.async_on_remove(
             async_dispatcher_connect(self.hass, DOMAIN, self.async_write_ha_state)
         )
+        self.async_on_remove(
+            self._listener_source().add_listener(self._handle_changes)
+        )
+
+    def _listener_source(self) -> AqualinkDevice | AqualinkSystem:
+        """Return the object whose changes affect this entity's state."""
+        return self.dev
+
+    def _handle_changes(self, changes: list[DeviceChange]) -> None:
+        """Write state after a refresh changed the underlying device."""
+        self.async_write_ha_state()
 
     @property
     def assumed_state(self) -> bool:
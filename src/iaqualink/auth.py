@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from iaqualink.const import (
+    TOKEN_REFRESH_MARGIN,
+    TOKEN_REFRESH_MAX_RETRY_DELAY,
+    TOKEN_REFRESH_RETRY_DELAY,
+)
+from iaqualink.exception import AqualinkServiceUnauthorizedException
+from iaqualink.singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+LOGGER = logging.getLogger("iaqualink")
+
+
+def jwt_expiry(token: str) -> float | None:
+    """Return the `exp` claim of a JWT, without verifying its signature."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (
+        IndexError,
+        KeyError,
+        TypeError,
+        ValueError,
+        binascii.Error,
+    ):
+        return None
+
+
+@dataclass
+class TokenMetrics:
+    refreshes: int = 0
+    failures: int = 0
+    coalesced: int = 0
+    last_latency: float | None = None
+    total_latency: float = 0.0
+
+    @property
+    def mean_latency(self) -> float | None:
+        if self.refreshes == 0:
+            return None
+        return self.total_latency / self.refreshes
+
+
+class AqualinkTokenManager:
+    """Keeps track of the session tokens lifetime and refreshes them.
+
+    Refreshes are single-flight: concurrent callers needing fresh tokens
+    all wait for the same login request. Tokens are refreshed ahead of
+    their expiry, either lazily by `ensure_valid()` or by a background task
+    started with `start()`.
+
+    Failed background refreshes are retried after `retry_delay` seconds,
+    doubled after each failure up to `max_retry_delay`. A login rejected
+    with AqualinkServiceUnauthorizedException isn't retried: the background
+    task stops and `ensure_valid()` raises until `refresh()` is called.
+    """
+
+    def __init__(
+        self,
+        login: Callable[[], Awaitable[None]],
+        margin: float = TOKEN_REFRESH_MARGIN,
+        retry_delay: float = TOKEN_REFRESH_RETRY_DELAY,
+        max_retry_delay: float = TOKEN_REFRESH_MAX_RETRY_DELAY,
+    ):
+        self._login = login
+        self.margin = margin
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.expires_at: float | None = None
+        self.metrics = TokenMetrics()
+
+        # Bumped every time tokens are successfully refreshed.
+        self.generation = 0
+        self._invalid = False
+        # Set when the last login was rejected, e.g. wrong credentials.
+        self.error: AqualinkServiceUnauthorizedException | None = None
+
+        self._refresh_flight = SingleFlight()
+        self._background_task: asyncio.Task[None] | None = None
+        self._changed = asyncio.Event()
+
+    def set_token(self, id_token: str) -> None:
+        self.expires_at = jwt_expiry(id_token)
+        self._invalid = False
+        self.generation += 1
+        self._changed.set()
+
+    def invalidate(self) -> None:
+        self._invalid = True
+        self._changed.set()
+
+    @property
+    def needs_refresh(self) -> bool:
+        if self._invalid:
+            return True
+        if self.expires_at is None:
+            return False
+        return time.time() >= self.expires_at - self.margin
+
+    async def _do_refresh(self) -> None:
+        start = time.monotonic()
+        try:
+            await self._login()
+        except AqualinkServiceUnauthorizedException as e:
+            self.metrics.failures += 1
+            self.error = e
+            raise
+        except Exception:
+            self.metrics.failures += 1
+            raise
+        latency = time.monotonic() - start
+        self._invalid = False
+        self.error = None
+        self.metrics.refreshes += 1
+        self.metrics.last_latency = latency
+        self.metrics.total_latency += latency
+
+    async def refresh(self) -> None:
+        if self._refresh_flight.in_flight:
+            self.metrics.coalesced += 1
+        await self._refresh_flight.run(self._do_refresh)
+
+    async def refresh_if_stale(self, generation: int) -> None:
+        """Refresh tokens unless they changed since `generation`.
+
+        This lets callers that got rejected with an older token reuse a
+        refresh that completed in the meantime.
+        """
+        self._raise_rejected()
+        if self.generation == generation:
+            await self.refresh()
+
+    async def ensure_valid(self) -> None:
+        self._raise_rejected()
+        if self.needs_refresh:
+            await self.refresh()
+
+    def _raise_rejected(self) -> None:
+        # Logging in again with the same credentials would fail the same.
+        if self.error is not None:
+            m = "Login was rejected, check your credentials and log in again"
+            raise AqualinkServiceUnauthorizedException(m) from self.error
+
+    def start(self) -> None:
+        """Start refreshing tokens in the background ahead of expiry."""
+        if self._background_task is None or self._background_task.done():
+            self._background_task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._background_task is None:
+            return
+
+        self._background_task.cancel()
+        try:
+            await self._background_task
+        except asyncio.CancelledError:
+            pass
+        self._background_task = None
+
+    async def _wait_for_change(self, timeout: float | None) -> None:
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except TimeoutError:
+            pass
+        self._changed.clear()
+
+    def _next_retry_delay(self, failures: int) -> float:
+        delay = self.retry_delay * 2 ** (failures - 1)
+        return min(delay, self.max_retry_delay)
+
+    async def _run(self) -> None:
+        failures = 0
+        while True:
+            if self.needs_refresh:
+                try:
+                    await self.refresh()
+                except AqualinkServiceUnauthorizedException as e:
+                    LOGGER.error("Session tokens refresh rejected: %r", e)
+                    return
+                except Exception as e:  # noqa: BLE001
+                    failures += 1
+                    delay = self._next_retry_delay(failures)
+                    LOGGER.warning(
+                        "Failed to refresh session tokens, retrying in %ss: %s",
+                        delay,
+                        e,
+                    )
+                    await asyncio.sleep(delay)
+                else:
+                    failures = 0
+            elif self.expires_at is None:
+                await self._wait_for_change(None)
+            else:
+                delay = self.expires_at - self.margin - time.time()
+                await self._wait_for_change(delay)
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from iaqualink.device import AqualinkDevice
+from iaqualink.exception import AqualinkSystemUnsupportedException
+from iaqualink.system import AqualinkSystem
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from iaqualink.client import AqualinkClient
+
+LOGGER = logging.getLogger("iaqualink")
+
+# Bumped whenever the file format changes, older files are ignored.
+CACHE_VERSION = 1
+
+
+def _class_path(cls: type) -> str:
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _device_classes() -> dict[str, type[AqualinkDevice]]:
+    classes: dict[str, type[AqualinkDevice]] = {}
+    todo = [AqualinkDevice]
+    while todo:
+        cls = todo.pop()
+        classes[_class_path(cls)] = cls
+        todo += cls.__subclasses__()
+    return classes
+
+
+class AqualinkCache:
+    """JSON file holding the systems of an account and their devices.
+
+    The systems list, the class and last known data of every device are
+    saved, so that on startup systems and devices can be restored right
+    away, before logging in, and refreshed in the background. Files older
+    than `max_age` seconds, or saved for another account, are ignored.
+    Credentials and tokens are never saved.
+    """
+
+    def __init__(
+        self, path: str | os.PathLike[str], max_age: float | None = None
+    ):
+        self.path = Path(path)
+        self.max_age = max_age
+
+    def dump(
+        self, aqualink: AqualinkClient, systems: Iterable[AqualinkSystem]
+    ) -> dict[str, Any]:
+        return {
+            "version": CACHE_VERSION,
+            "saved_at": time.time(),
+            "account": aqualink.username,
+            "systems": [self._dump_system(x) for x in systems],
+        }
+
+    @staticmethod
+    def _dump_system(system: AqualinkSystem) -> dict[str, Any]:
+        return {
+            "data": system.data,
+            "attributes": {
+                k: getattr(system, k) for k in system.CACHED_ATTRIBUTES
+            },
+            "devices": [
+                {
+                    # Not always the same as the name in the data, e.g. for
+                    # ICL zones.
+                    "key": k,
+                    "class": _class_path(type(v)),
+                    "data": dict(v.data),
+                }
+                for k, v in system.devices.items()
+            ],
+        }
+
+    def restore(
+        self, aqualink: AqualinkClient, data: dict[str, Any]
+    ) -> dict[str, AqualinkSystem]:
+        """Build systems and their devices from dumped `data`."""
+        if data.get("version") != CACHE_VERSION:
+            LOGGER.debug("Ignoring cache with version %s.", data.get("version"))
+            return {}
+        if data.get("account") != aqualink.username:
+            LOGGER.debug("Ignoring cache of another account.")
+            return {}
+        age = time.time() - data["saved_at"]
+        if self.max_age is not None and age > self.max_age:
+            LOGGER.debug("Ignoring cache saved %.0fs ago.", age)
+            return {}
+
+        classes = _device_classes()
+        systems = {}
+        for entry in data["systems"]:
+            try:
+                system = AqualinkSystem.from_data(aqualink, entry["data"])
+            except AqualinkSystemUnsupportedException:
+                continue
+            for k, v in entry["attributes"].items():
+                setattr(system, k, v)
+            for device in entry["devices"]:
+                class_ = classes.get(device["class"])
+                if class_ is None:
+                    # Renamed or removed since, the refresh will find it.
+                    LOGGER.debug("Unknown device class %s.", device["class"])
+                    continue
+                system.devices[device["key"]] = class_(system, device["data"])
+            system._restored = set(system.devices)
+            systems[system.serial] = system
+        return systems
+
+    async def load(self, aqualink: AqualinkClient) -> dict[str, AqualinkSystem]:
+        """Restore the systems saved in the file, if any and still valid."""
+        try:
+            raw = await asyncio.to_thread(self.path.read_bytes)
+        except FileNotFoundError:
+            return {}
+        except OSError as e:
+            LOGGER.warning("Failed to read cache %s: %r", self.path, e)
+            return {}
+
+        try:
+            return self.restore(aqualink, json.loads(raw))
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            LOGGER.warning("Ignoring invalid cache %s: %r", self.path, e)
+            return {}
+
+    async def save(
+        self, aqualink: AqualinkClient, systems: Iterable[AqualinkSystem]
+    ) -> None:
+        data = json.dumps(self.dump(aqualink, systems))
+        await asyncio.to_thread(self._write, data)
+
+    def _write(self, data: str) -> None:
+        # Write then rename, so that a crash never leaves a truncated file.
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.tmp")
+        tmp.write_text(data, encoding="utf-8")
+        os.replace(tmp, self.path)
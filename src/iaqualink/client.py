@@ -1,28 +1,44 @@
 from __future__ import annotations
 
+import asyncio
 import contextlib
 import logging
+import time
 from typing import TYPE_CHECKING, Any, Self
 
 import httpx
 
+from iaqualink.auth import AqualinkTokenManager
 from iaqualink.const import (
     AQUALINK_API_KEY,
     AQUALINK_DEVICES_URL,
     AQUALINK_LOGIN_URL,
-    KEEPALIVE_EXPIRY,
+    DEFAULT_UPDATE_CONCURRENCY,
 )
 from iaqualink.exception import (
+    AqualinkInvalidParameterException,
     AqualinkServiceException,
     AqualinkServiceUnauthorizedException,
     AqualinkSystemUnsupportedException,
 )
+from iaqualink.group import AqualinkSystemGroup
+from iaqualink.instrumentation import RequestInfo
+from iaqualink.pool import AqualinkConnectionPool
+from iaqualink.ratelimit import Priority
 from iaqualink.system import AqualinkSystem
 from iaqualink.systems import *  # noqa: F403
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
     from types import TracebackType
 
+    from iaqualink.cache import AqualinkCache
+    from iaqualink.debug import PayloadSampler
+    from iaqualink.group import GroupUpdateResult
+    from iaqualink.instrumentation import RequestObserver
+    from iaqualink.ratelimit import RateLimiter
+    from iaqualink.retry import RetryPolicy
+
 AQUALINK_HTTP_HEADERS = {
     "user-agent": "okhttp/3.14.7",
     "content-type": "application/json",
@@ -37,39 +53,90 @@ class AqualinkClient:
         username: str,
         password: str,
         httpx_client: httpx.AsyncClient | None = None,
+        pool: AqualinkConnectionPool | None = None,
+        retry_policy: RetryPolicy | None = None,
+        rate_limiter: RateLimiter | None = None,
+        cache: AqualinkCache | None = None,
     ):
         self._username = username
         self._password = password
         self._logged = False
 
-        self._client: httpx.AsyncClient | None = None
-
-        if httpx_client is None:
-            self._client = None
-            self._must_close_client = True
+        if pool is None:
+            self._pool = AqualinkConnectionPool(httpx_client=httpx_client)
+            self._must_close_pool = True
+        elif httpx_client is None:
+            self._pool = pool
+            self._must_close_pool = False
         else:
-            self._client = httpx_client
-            self._must_close_client = False
+            m = "httpx_client and pool are mutually exclusive."
+            raise AqualinkInvalidParameterException(m)
+        self._pool.attach(self)
 
         self.client_id = ""
         self._token = ""
         self._user_id = ""
         self.id_token = ""
+        self.tokens = AqualinkTokenManager(self._login)
 
         self._last_refresh = 0
 
+        self._systems: dict[str, AqualinkSystem] = {}
+
+        self._observers: list[RequestObserver] = []
+
+        # Requests aren't retried without a policy.
+        self.retry_policy = retry_policy
+        self.retries = 0
+
+        # Requests aren't throttled without a limiter.
+        self.rate_limiter = rate_limiter
+
+        # Optional 1 in N sampling of parsed payloads, for debugging.
+        self.payload_sampler: PayloadSampler | None = None
+
+        # Systems and devices are only saved to disk with a cache, when
+        # they changed since it was saved or loaded.
+        self.cache = cache
+        self._cached_changes: tuple[tuple[str, int], ...] | None = None
+
+    @property
+    def username(self) -> str:
+        return self._username
+
     @property
     def logged(self) -> bool:
         return self._logged
 
+    @property
+    def pool(self) -> AqualinkConnectionPool:
+        return self._pool
+
+    def add_observer(self, observer: RequestObserver) -> Callable[[], None]:
+        """Notify `observer` before and after every request.
+
+        Returns a function that removes the observer. Requests aren't timed
+        at all when there are no observers.
+        """
+        self._observers.append(observer)
+
+        def remove() -> None:
+            if observer in self._observers:
+                self._observers.remove(observer)
+
+        return remove
+
     async def close(self) -> None:
-        if self._must_close_client is False:
-            return
+        await self.tokens.stop()
+
+        # Nothing worth saving if the systems were never retrieved.
+        if self._systems:
+            await self._save_cache_if_changed()
 
-        # There shouldn't be a case where this is None but this quietens mypy.
-        if self._client is not None:
-            await self._client.aclose()
-            self._client = None
+        # Shared pools are closed by their owner.
+        if self._must_close_pool is True:
+            await self._pool.close()
+        self._pool.detach(self)
 
     async def __aenter__(self) -> Self:
         try:
@@ -94,25 +161,54 @@ class AqualinkClient:
         self,
         url: str,
         method: str = "get",
+        *,
+        idempotent: bool = True,
+        priority: Priority = Priority.COMMAND,
         **kwargs: Any,
     ) -> httpx.Response:
-        if self._client is None:
-            self._client = httpx.AsyncClient(
-                http2=True,
-                limits=httpx.Limits(keepalive_expiry=KEEPALIVE_EXPIRY),
-            )
-
-        headers = AQUALINK_HTTP_HEADERS
-        headers.update(kwargs.pop("headers", {}))
-
-        LOGGER.debug(f"-> {method.upper()} {url} {kwargs}")
-        r = await self._client.request(method, url, headers=headers, **kwargs)
-
-        LOGGER.debug(f"<- {r.status_code} {r.reason_phrase} - {url}")
+        """Send a request to the API, retrying it as per `retry_policy`.
+
+        `idempotent` should be False for requests that mustn't be sent twice,
+        those are only retried if they didn't reach the server. `priority`
+        decides which requests go first when `rate_limiter` holds them back.
+        """
+        # The client may be re-used after being closed.
+        self._pool.attach(self)
+
+        headers = AQUALINK_HTTP_HEADERS | kwargs.pop("headers", {})
+        policy = self.retry_policy
+
+        attempt = 0
+        while True:
+            LOGGER.debug("-> %s %s %s", method.upper(), url, kwargs)
+            try:
+                r = await self._request(method, url, headers, kwargs, priority)
+            except httpx.TransportError as e:
+                if policy is None or not policy.should_retry(
+                    attempt, idempotent=idempotent, exception=e
+                ):
+                    raise
+                delay = policy.delay(attempt)
+                LOGGER.debug("Retrying in %.2fs after %r - %s", delay, e, url)
+            else:
+                LOGGER.debug(
+                    "<- %s %s - %s", r.status_code, r.reason_phrase, url
+                )
+                if policy is None or not policy.should_retry(
+                    attempt, idempotent=idempotent, response=r
+                ):
+                    break
+                delay = policy.delay(attempt, r)
+                LOGGER.debug("Retrying in %.2fs - %s", delay, url)
+
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
 
         if r.status_code == httpx.codes.UNAUTHORIZED:
             m = "Unauthorized Access, check your credentials and try again"
             self._logged = False
+            self.tokens.invalidate()
             raise AqualinkServiceUnauthorizedException
 
         if r.status_code != httpx.codes.OK:
@@ -121,6 +217,58 @@ class AqualinkClient:
 
         return r
 
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        kwargs: dict[str, Any],
+        priority: Priority,
+    ) -> httpx.Response:
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(url, self._username, priority)
+
+        if self._observers:
+            return await self._observed_request(method, url, headers, kwargs)
+        return await self._pool.request(method, url, headers=headers, **kwargs)
+
+    async def _observed_request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        kwargs: dict[str, Any],
+    ) -> httpx.Response:
+        observers = list(self._observers)
+        info = RequestInfo.from_request(method, url)
+        self._notify_observers(observers, "request_started", info)
+
+        start = time.perf_counter()
+        try:
+            r = await self._pool.request(method, url, headers=headers, **kwargs)
+        except BaseException as e:
+            info.exception = e
+            raise
+        else:
+            info.status = r.status_code
+            info.request_bytes = len(r.request.content)
+            info.response_bytes = len(r.content)
+        finally:
+            info.latency = time.perf_counter() - start
+            self._notify_observers(observers, "request_finished", info)
+
+        return r
+
+    @staticmethod
+    def _notify_observers(
+        observers: list[RequestObserver], event: str, info: RequestInfo
+    ) -> None:
+        for observer in observers:
+            try:
+                getattr(observer, event)(info)
+            except Exception:
+                LOGGER.exception("Error in request observer %r", observer)
+
     async def _send_login_request(self) -> httpx.Response:
         data = {
             "api_key": AQUALINK_API_KEY,
@@ -132,6 +280,10 @@ class AqualinkClient:
         )
 
     async def login(self) -> None:
+        # Concurrent logins share a single request.
+        await self.tokens.refresh()
+
+    async def _login(self) -> None:
         r = await self._send_login_request()
 
         data = r.json()
@@ -140,6 +292,7 @@ class AqualinkClient:
         self._user_id = data["id"]
         self.id_token = data["userPoolOAuth"]["IdToken"]
         self._logged = True
+        self.tokens.set_token(self.id_token)
 
     async def _send_systems_request(self) -> httpx.Response:
         params = {
@@ -161,9 +314,72 @@ class AqualinkClient:
 
         data = r.json()
 
-        systems = []
+        systems = {}
         for x in data:
+            # Keep known systems, e.g. restored from the cache, up to date
+            # rather than replacing them.
+            system = self._systems.get(x.get("serial_number"))
+            class_ = AqualinkSystem.subclasses.get(x.get("device_type"))
+            if system is not None and type(system) is class_:
+                system.data = x
+                systems[system.serial] = system
+                continue
             with contextlib.suppress(AqualinkSystemUnsupportedException):
-                systems += [AqualinkSystem.from_data(self, x)]
+                system = AqualinkSystem.from_data(self, x)
+                systems[system.serial] = system
+
+        self._systems = systems
+        return dict(self._systems)
+
+    async def load_cache(self) -> dict[str, AqualinkSystem]:
+        """Restore the systems and devices saved by `save_cache()`.
+
+        Doesn't send any request: devices have their last known state and
+        systems are neither logged in nor known to be online until the next
+        `login()`, `get_systems()` and refresh. Returns an empty dict without
+        a cache or when it's missing, stale or invalid.
+        """
+        if self.cache is None:
+            return {}
+
+        self._systems = await self.cache.load(self)
+        self._cached_changes = self._change_counts()
+        return dict(self._systems)
+
+    async def save_cache(self) -> None:
+        """Save the systems, their devices and state to the cache."""
+        if self.cache is None:
+            return
 
-        return {x.serial: x for x in systems if x is not None}
+        changes = self._change_counts()
+        try:
+            await self.cache.save(self, self._systems.values())
+        except OSError as e:
+            LOGGER.warning("Failed to save cache %s: %r", self.cache.path, e)
+        else:
+            self._cached_changes = changes
+
+    def _change_counts(self) -> tuple[tuple[str, int], ...]:
+        return tuple((k, v.change_count) for k, v in self._systems.items())
+
+    async def _save_cache_if_changed(self) -> None:
+        # Rewriting the file after every poll would be wasteful.
+        if self._change_counts() != self._cached_changes:
+            await self.save_cache()
+
+    async def update_all(
+        self, concurrency: int = DEFAULT_UPDATE_CONCURRENCY
+    ) -> GroupUpdateResult:
+        """Refresh every system of the account concurrently.
+
+        Systems are those returned by the last call to `get_systems()`,
+        which is called first if needed. Per-system failures are reported
+        in the result rather than raised.
+        """
+        if not self._systems:
+            await self.get_systems()
+
+        group = AqualinkSystemGroup(self._systems.values(), concurrency)
+        result = await group.update()
+        await self._save_cache_if_changed()
+        return result
@@ -7,3 +7,34 @@ AQUALINK_DEVICES_URL = "https://r-api.iaqualink.net/devices.json"
 
 KEEPALIVE_EXPIRY = 30
 MIN_SECS_TO_REFRESH = 5
+# Values set by commands and not settled by a refresh this many seconds
+# after the command completed are given up on.
+PENDING_CHANGE_TIMEOUT = 60
+DEFAULT_UPDATE_CONCURRENCY = 10
+
+# Refresh session tokens this many seconds before they expire.
+TOKEN_REFRESH_MARGIN = 300
+# Failed background refreshes are retried with an exponential backoff.
+TOKEN_REFRESH_RETRY_DELAY = 30
+TOKEN_REFRESH_MAX_RETRY_DELAY = 900
+
+# Adaptive polling, see iaqualink.scheduler.
+POLL_FAST_INTERVAL = 10
+POLL_BASE_INTERVAL = 15
+POLL_MAX_INTERVAL = 300
+POLL_BACKOFF_FACTOR = 2.0
+POLL_JITTER = 0.1
+
+# Request retries, see iaqualink.retry.
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF = 0.5
+RETRY_BACKOFF_FACTOR = 2.0
+RETRY_MAX_BACKOFF = 10.0
+RETRY_JITTER = 0.2
+
+# Per-host circuit breaker.
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = 30
+
+# Push updates, see iaqualink.systems.exo.push.
+PUSH_RECONNECT_DELAY = 30
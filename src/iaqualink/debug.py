@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import copy
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Any
+
+from iaqualink.exception import AqualinkInvalidParameterException
+
+
+@dataclass(frozen=True, slots=True)
+class PayloadSample:
+    # Wall clock time at which the payload was parsed.
+    timestamp: float
+    serial: str
+    # Which response the payload came from: home, devices or shadow.
+    kind: str
+    data: dict[str, Any]
+
+
+class PayloadSampler:
+    """Keep 1 in `every` parsed payloads in a ring buffer of `maxlen`.
+
+    Meant for debugging devices that misbehave now and then without
+    enabling debug logging, which formats every payload on every poll:
+
+    client.payload_sampler = sampler = PayloadSampler(every=100)
+    ...
+    for sample in sampler.samples:
+        print(sample.serial, sample.kind, sample.data)
+
+    Payloads are counted separately per system and kind, so that the
+    responses of a poll are sampled together whatever `every` is. Sampled
+    payloads are deep-copied, since parsers modify them in place.
+    """
+
+    def __init__(self, every: int = 100, maxlen: int = 20) -> None:
+        if every < 1 or maxlen < 1:
+            m = "every and maxlen must be at least 1."
+            raise AqualinkInvalidParameterException(m)
+        self.every = every
+        self.samples: deque[PayloadSample] = deque(maxlen=maxlen)
+        self._seen: Counter[tuple[str, str]] = Counter()
+
+    def record(self, serial: str, kind: str, data: dict[str, Any]) -> None:
+        key = serial, kind
+        seen = self._seen[key]
+        self._seen[key] = seen + 1
+        if seen % self.every == 0:
+            data = copy.deepcopy(data)
+            self.samples.append(PayloadSample(time.time(), serial, kind, data))
+
+    def clear(self) -> None:
+        self.samples.clear()
+        self._seen.clear()
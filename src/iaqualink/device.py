@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import TYPE_CHECKING, Any
 
 from iaqualink.exception import AqualinkOperationNotSupportedException
+from iaqualink.listener import ListenerRegistry
+from iaqualink.state import DeviceState
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from iaqualink.system import DeviceChange
     from iaqualink.typing import DeviceData
 
 LOGGER = logging.getLogger("iaqualink")
@@ -19,12 +25,36 @@ class AqualinkDevice:
     ):
         self.system = system
         self.data = data
+        self._listeners = ListenerRegistry()
+
+        # Held while sending a command that depends on the current state,
+        # e.g. a toggle, so that concurrent commands don't undo each other.
+        self._command_lock = asyncio.Lock()
+
+        # Values parsed from data by parsed_property, valid for one version
+        # of the data.
+        self._parsed: dict[str, Any] = {}
+        self._parsed_version = -1
 
     def __repr__(self) -> str:
         attrs = ["data"]
         attrs = [f"{i}={getattr(self, i)!r}" for i in attrs]
         return f"{self.__class__.__name__}({', '.join(attrs)})"
 
+    @property
+    def data(self) -> DeviceState:
+        return self._data
+
+    @data.setter
+    def data(self, data: DeviceData) -> None:
+        # A plain dict is copied, later changes must go through device.data
+        # to be seen.
+        if not isinstance(data, DeviceState):
+            data = DeviceState(data)
+        self._data = data
+        # The new data's version doesn't follow the old one's.
+        self._parsed_version = -1
+
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, AqualinkDevice):
             return NotImplemented
@@ -36,6 +66,15 @@ class AqualinkDevice:
             return True
         return False
 
+    def add_listener(
+        self, callback: Callable[[list[DeviceChange]], Any], weak: bool = True
+    ) -> Callable[[], None]:
+        """Call `callback` with this device's changes after each refresh.
+
+        See `AqualinkSystem.add_listener`.
+        """
+        return self._listeners.add(callback, weak)
+
     @property
     def label(self) -> str:
         raise NotImplementedError
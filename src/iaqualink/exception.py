@@ -31,3 +31,7 @@ class AqualinkOperationNotSupportedException(AqualinkException):
 
 class AqualinkDeviceNotSupported(AqualinkException):
     """Exception raised when a device isn't known-unsupported."""
+
+
+class AqualinkServiceUnavailableException(AqualinkServiceException):
+    """Exception raised when requests are blocked by a circuit breaker."""
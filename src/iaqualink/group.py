@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from iaqualink.const import DEFAULT_UPDATE_CONCURRENCY
+from iaqualink.exception import AqualinkInvalidParameterException
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from iaqualink.system import AqualinkSystem
+
+LOGGER = logging.getLogger("iaqualink")
+
+
+@dataclass
+class SystemUpdateResult:
+    """Outcome of refreshing a single system as part of a group."""
+
+    system: AqualinkSystem
+    latency: float
+    exception: Exception | None = None
+
+    @property
+    def success(self) -> bool:
+        return self.exception is None
+
+
+@dataclass
+class GroupUpdateResult:
+    """Outcome of refreshing every system in a group."""
+
+    elapsed: float
+    results: dict[str, SystemUpdateResult] = field(default_factory=dict)
+
+    @property
+    def succeeded(self) -> list[SystemUpdateResult]:
+        return [x for x in self.results.values() if x.success]
+
+    @property
+    def failed(self) -> list[SystemUpdateResult]:
+        return [x for x in self.results.values() if not x.success]
+
+
+class AqualinkSystemGroup:
+    """Set of systems, possibly from several accounts, refreshed together.
+
+    Updates run concurrently, with at most `concurrency` systems being
+    refreshed at any given time. A failure to refresh one system doesn't
+    prevent the others from being refreshed.
+    """
+
+    def __init__(
+        self,
+        systems: Iterable[AqualinkSystem] = (),
+        concurrency: int = DEFAULT_UPDATE_CONCURRENCY,
+    ):
+        if concurrency < 1:
+            msg = f"Concurrency must be at least 1, got {concurrency}."
+            raise AqualinkInvalidParameterException(msg)
+
+        self.concurrency = concurrency
+        self._systems: dict[str, AqualinkSystem] = {}
+        for system in systems:
+            self.add(system)
+
+    def __len__(self) -> int:
+        return len(self._systems)
+
+    def __iter__(self) -> Iterator[AqualinkSystem]:
+        return iter(self._systems.values())
+
+    def __contains__(self, system: object) -> bool:
+        return system in self._systems.values()
+
+    def add(self, system: AqualinkSystem) -> None:
+        self._systems[system.serial] = system
+
+    def remove(self, system: AqualinkSystem) -> None:
+        self._systems.pop(system.serial, None)
+
+    async def _update_system(
+        self, system: AqualinkSystem, semaphore: asyncio.Semaphore
+    ) -> SystemUpdateResult:
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                await system.update()
+            except Exception as e:  # noqa: BLE001
+                LOGGER.debug("Failed to update system %s: %s", system.serial, e)
+                exception: Exception | None = e
+            else:
+                exception = None
+            latency = time.monotonic() - start
+
+        return SystemUpdateResult(system, latency, exception)
+
+    async def update(self) -> GroupUpdateResult:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        start = time.monotonic()
+        results = await asyncio.gather(
+            *[self._update_system(x, semaphore) for x in self]
+        )
+        elapsed = time.monotonic() - start
+
+        return GroupUpdateResult(
+            elapsed=elapsed, results={x.system.serial: x for x in results}
+        )
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import bisect
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Protocol
+
+import httpx
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+# Upper bounds of the latency histogram buckets, in seconds.
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def endpoint_class(url: httpx.URL) -> str:
+    """Return which API endpoint `url` belongs to."""
+    path = url.path
+    if path.endswith("/login"):
+        return "login"
+    if path.endswith("/devices.json"):
+        return "devices"
+    if path.endswith("/session.json"):
+        return "session"
+    if path.endswith("/shadow"):
+        return "shadow"
+    return "other"
+
+
+@dataclass(slots=True)
+class RequestInfo:
+    """What is known about a request, filled in as it progresses."""
+
+    method: str
+    url: httpx.URL
+    endpoint: str
+    # Session command (e.g. get_home, set_aux_1) for iAqua requests.
+    command: str | None = None
+    status: int | None = None
+    request_bytes: int = 0
+    response_bytes: int = 0
+    # Seconds between sending the request and receiving the response.
+    latency: float = 0.0
+    exception: BaseException | None = None
+
+    @classmethod
+    def from_request(cls, method: str, url: str) -> RequestInfo:
+        parsed = httpx.URL(url)
+        return cls(
+            method=method.upper(),
+            url=parsed,
+            endpoint=endpoint_class(parsed),
+            command=parsed.params.get("command"),
+        )
+
+    @property
+    def success(self) -> bool:
+        return self.exception is None and self.status == httpx.codes.OK
+
+
+class RequestObserver(Protocol):
+    """Receives a notification before and after every API request.
+
+    Observers are called inline on the request path, so they must be quick.
+    They can for instance record metrics or start and end tracing spans.
+    """
+
+    def request_started(self, info: RequestInfo) -> None: ...
+
+    def request_finished(self, info: RequestInfo) -> None: ...
+
+
+@dataclass
+class LatencyHistogram:
+    """Latency histogram with fixed bucket bounds."""
+
+    bounds: Sequence[float] = LATENCY_BUCKETS
+    # One count per bucket, plus one for values above the last bound.
+    counts: list[int] = field(default_factory=list)
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def __post_init__(self) -> None:
+        if not self.counts:
+            self.counts = [0] * (len(self.bounds) + 1)
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Return an upper bound of the `q` quantile, e.g. 0.99 for p99."""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+
+@dataclass
+class EndpointMetrics:
+    requests: int = 0
+    # Requests that raised or got a non-200 status.
+    errors: int = 0
+    statuses: Counter[int] = field(default_factory=Counter)
+    request_bytes: int = 0
+    response_bytes: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def record(self, info: RequestInfo) -> None:
+        self.requests += 1
+        if not info.success:
+            self.errors += 1
+        if info.status is not None:
+            self.statuses[info.status] += 1
+        self.request_bytes += info.request_bytes
+        self.response_bytes += info.response_bytes
+        self.latency.observe(info.latency)
+
+
+class RequestMetrics:
+    """Observer aggregating request metrics per endpoint and command.
+
+    client.add_observer(metrics := RequestMetrics())
+    ...
+    print(metrics.endpoints["session"].latency.quantile(0.99))
+    """
+
+    def __init__(self) -> None:
+        self.endpoints: dict[str, EndpointMetrics] = {}
+        self.commands: dict[str, EndpointMetrics] = {}
+
+    def request_started(self, info: RequestInfo) -> None:
+        pass
+
+    def request_finished(self, info: RequestInfo) -> None:
+        self._get(self.endpoints, info.endpoint).record(info)
+        if info.command is not None:
+            self._get(self.commands, info.command).record(info)
+
+    @staticmethod
+    def _get(metrics: dict[str, EndpointMetrics], key: str) -> EndpointMetrics:
+        if key not in metrics:
+            metrics[key] = EndpointMetrics()
+        return metrics[key]
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import TYPE_CHECKING, Any
+
+from iaqualink.exception import AqualinkInvalidParameterException
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    import httpx
+
+LOGGER = logging.getLogger("iaqualink")
+
+
+def _orjson() -> Callable[[bytes | str], Any]:
+    import orjson
+
+    return orjson.loads
+
+
+def _msgspec() -> Callable[[bytes | str], Any]:
+    import msgspec
+
+    return msgspec.json.Decoder().decode
+
+
+def _stdlib() -> Callable[[bytes | str], Any]:
+    return json.loads
+
+
+# Backends in order of preference.
+JSON_BACKENDS: dict[str, Callable[[], Callable[[bytes | str], Any]]] = {
+    "orjson": _orjson,
+    "msgspec": _msgspec,
+    "json": _stdlib,
+}
+
+_backend = "json"
+_loads: Callable[[bytes | str], Any] = json.loads
+
+
+def get_backend() -> str:
+    """Return the name of the JSON backend in use."""
+    return _backend
+
+
+def set_backend(name: str | None = None) -> str:
+    """Select the JSON backend used to decode API responses.
+
+    With no name, picks the fastest installed backend. Returns the name of
+    the selected backend.
+    """
+    global _backend, _loads
+
+    if name is None:
+        for candidate in JSON_BACKENDS:
+            try:
+                return set_backend(candidate)
+            except AqualinkInvalidParameterException:
+                continue
+        name = "json"
+
+    if name not in JSON_BACKENDS:
+        msg = f"Unknown JSON backend: {name}"
+        raise AqualinkInvalidParameterException(msg)
+
+    try:
+        loads = JSON_BACKENDS[name]()
+    except ImportError as e:
+        msg = f"JSON backend {name} is not installed"
+        raise AqualinkInvalidParameterException(msg) from e
+
+    _backend, _loads = name, loads
+    LOGGER.debug("Using %s JSON backend", name)
+    return name
+
+
+def loads(data: bytes | str) -> Any:
+    """Decode a JSON document with the selected backend."""
+    return _loads(data)
+
+
+def decode_response(response: httpx.Response) -> Any:
+    """Decode the body of `response`.
+
+    Works on the raw bytes, skipping the text decoding step done by
+    `httpx.Response.json()`. The API always replies with UTF-8.
+    """
+    return _loads(response.content)
+
+
+set_backend()
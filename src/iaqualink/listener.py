@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import weakref
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Coroutine
+
+LOGGER = logging.getLogger("iaqualink")
+
+# Keep a reference to running fan-out tasks so they don't get garbage
+# collected before completion.
+_TASKS: set[asyncio.Task[None]] = set()
+
+
+def _reference(callback: Callable[..., Any], weak: bool) -> Callable[[], Any]:
+    if not weak:
+        return lambda: callback
+    if inspect.ismethod(callback):
+        return weakref.WeakMethod(callback)
+    return weakref.ref(callback)
+
+
+class ListenerRegistry:
+    """Set of callbacks, either plain functions or coroutine functions.
+
+    Callbacks are weakly referenced by default, so registering a bound
+    method doesn't keep its object alive. Listeners whose referent was
+    garbage collected are dropped automatically.
+    """
+
+    def __init__(self) -> None:
+        self._listeners: list[Callable[[], Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._callbacks())
+
+    def add(
+        self, callback: Callable[..., Any], weak: bool = True
+    ) -> Callable[[], None]:
+        """Register `callback`, returns a function that removes it."""
+        ref = _reference(callback, weak)
+        self._listeners.append(ref)
+
+        def remove() -> None:
+            if ref in self._listeners:
+                self._listeners.remove(ref)
+
+        return remove
+
+    def _callbacks(self) -> list[Callable[..., Any]]:
+        callbacks = []
+        for ref in list(self._listeners):
+            callback = ref()
+            if callback is None:
+                self._listeners.remove(ref)
+            else:
+                callbacks.append(callback)
+        return callbacks
+
+    def notify(self, *args: Any) -> list[Coroutine[Any, Any, None]]:
+        """Call every listener with `args`.
+
+        Plain functions are called right away. Coroutines created by
+        coroutine functions are returned for the caller to schedule.
+        """
+        coros: list[Coroutine[Any, Any, None]] = []
+        for callback in self._callbacks():
+            try:
+                result = callback(*args)
+            except Exception:
+                LOGGER.exception("Error in listener %r", callback)
+                continue
+            if inspect.iscoroutine(result):
+                coros.append(result)
+        return coros
+
+
+async def _gather(coros: list[Coroutine[Any, Any, None]]) -> None:
+    results = await asyncio.gather(*coros, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            LOGGER.error("Error in listener", exc_info=result)
+
+
+def schedule(coros: list[Coroutine[Any, Any, None]]) -> None:
+    """Run listener coroutines concurrently in a single background task."""
+    if not coros:
+        return
+
+    task = asyncio.get_running_loop().create_task(_gather(coros))
+    _TASKS.add(task)
+    task.add_done_callback(_TASKS.discard)
@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import weakref
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Self
+
+import httpx
+
+from iaqualink.const import (
+    CIRCUIT_RESET_TIMEOUT,
+    KEEPALIVE_EXPIRY,
+)
+from iaqualink.exception import AqualinkInvalidParameterException
+from iaqualink.retry import CircuitBreaker, CircuitState
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+    from types import TracebackType
+
+    from iaqualink.client import AqualinkClient
+
+LOGGER = logging.getLogger("iaqualink")
+
+
+@dataclass(frozen=True)
+class HostStats:
+    """Request counters for a single host."""
+
+    requests: int
+    in_flight: int
+    peak_in_flight: int
+    waiting: int
+    circuit: CircuitState = CircuitState.CLOSED
+    # Requests refused by the circuit breaker.
+    rejected: int = 0
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    """Snapshot of the utilisation of a connection pool."""
+
+    clients: int
+    connections: int
+    idle_connections: int
+    hosts: dict[str, HostStats]
+
+    @property
+    def requests(self) -> int:
+        return sum(x.requests for x in self.hosts.values())
+
+    @property
+    def in_flight(self) -> int:
+        return sum(x.in_flight for x in self.hosts.values())
+
+
+class _HostState:
+    def __init__(self, max_streams: int | None, breaker: CircuitBreaker | None):
+        self.semaphore = (
+            asyncio.Semaphore(max_streams) if max_streams is not None else None
+        )
+        self.breaker = breaker
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.waiting = 0
+
+    def stats(self) -> HostStats:
+        if self.breaker is None:
+            circuit, rejected = CircuitState.CLOSED, 0
+        else:
+            circuit, rejected = self.breaker.state, self.breaker.rejected
+        return HostStats(
+            requests=self.requests,
+            in_flight=self.in_flight,
+            peak_in_flight=self.peak_in_flight,
+            waiting=self.waiting,
+            circuit=circuit,
+            rejected=rejected,
+        )
+
+
+class AqualinkConnectionPool:
+    """HTTP/2 connection pool that can be shared by many clients.
+
+    Every `AqualinkClient` uses a pool. By default each client gets its own,
+    but passing the same pool to several clients (e.g. one per account)
+    makes them share connections, and therefore TLS handshakes, to the
+    iAqualink hosts.
+
+    `max_streams_per_host` caps the number of requests in flight to any
+    single host across all clients using the pool. Extra requests wait for
+    a slot rather than opening new connections.
+
+    With `failure_threshold` set, each host gets a circuit breaker: after
+    that many consecutive 5xx responses or transport errors, requests to
+    the host fail fast with AqualinkServiceUnavailableException for
+    `reset_timeout` seconds, see iaqualink.retry.CircuitBreaker.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_connections: int | None = None,
+        max_keepalive_connections: int | None = None,
+        keepalive_expiry: float | None = KEEPALIVE_EXPIRY,
+        max_streams_per_host: int | None = None,
+        failure_threshold: int | None = None,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+        http2: bool = True,
+        httpx_client: httpx.AsyncClient | None = None,
+    ):
+        if max_streams_per_host is not None and max_streams_per_host < 1:
+            msg = "max_streams_per_host must be at least 1."
+            raise AqualinkInvalidParameterException(msg)
+        if failure_threshold is not None and failure_threshold < 1:
+            msg = "failure_threshold must be at least 1."
+            raise AqualinkInvalidParameterException(msg)
+
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.max_streams_per_host = max_streams_per_host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.http2 = http2
+
+        self._client = httpx_client
+        self._must_close_client = httpx_client is None
+
+        self._hosts: dict[str, _HostState] = {}
+        self._clients: weakref.WeakSet[AqualinkClient] = weakref.WeakSet()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    def attach(self, client: AqualinkClient) -> None:
+        self._clients.add(client)
+
+    def detach(self, client: AqualinkClient) -> None:
+        self._clients.discard(client)
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    async def close(self) -> None:
+        if self._must_close_client is False:
+            return
+
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                http2=self.http2, limits=self.limits
+            )
+        return self._client
+
+    def _get_host(self, url: str) -> _HostState:
+        host = httpx.URL(url).host
+        if host not in self._hosts:
+            breaker = None
+            if self.failure_threshold is not None:
+                breaker = CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout
+                )
+            self._hosts[host] = _HostState(self.max_streams_per_host, breaker)
+        return self._hosts[host]
+
+    @contextlib.asynccontextmanager
+    async def _stream_slot(self, host: _HostState) -> AsyncIterator[None]:
+        if host.semaphore is None:
+            yield
+            return
+
+        host.waiting += 1
+        try:
+            await host.semaphore.acquire()
+        finally:
+            host.waiting -= 1
+        try:
+            yield
+        finally:
+            host.semaphore.release()
+
+    async def request(
+        self, method: str, url: str, **kwargs: Any
+    ) -> httpx.Response:
+        client = self._get_client()
+        host = self._get_host(url)
+        breaker = host.breaker
+
+        if breaker is None:
+            return await self._request(client, host, method, url, **kwargs)
+
+        breaker.before_request()
+        try:
+            r = await self._request(client, host, method, url, **kwargs)
+        except httpx.TransportError:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+
+        if r.status_code >= httpx.codes.INTERNAL_SERVER_ERROR:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return r
+
+    async def _request(
+        self,
+        client: httpx.AsyncClient,
+        host: _HostState,
+        method: str,
+        url: str,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        async with self._stream_slot(host):
+            host.requests += 1
+            host.in_flight += 1
+            host.peak_in_flight = max(host.peak_in_flight, host.in_flight)
+            try:
+                return await client.request(method, url, **kwargs)
+            finally:
+                host.in_flight -= 1
+
+    def _connections(self) -> list[Any]:
+        # httpx doesn't expose its connection pool publicly, custom
+        # transports (e.g. in tests) may not have one at all.
+        transport = getattr(self._client, "_transport", None)
+        pool = getattr(transport, "_pool", None)
+        return list(getattr(pool, "connections", []))
+
+    @property
+    def stats(self) -> PoolStats:
+        connections = self._connections()
+        return PoolStats(
+            clients=self.clients,
+            connections=len(connections),
+            idle_connections=len([x for x in connections if x.is_idle()]),
+            hosts={k: v.stats() for k, v in self._hosts.items()},
+        )
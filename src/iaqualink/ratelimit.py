@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import asyncio
+import enum
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import httpx
+
+from iaqualink.exception import AqualinkInvalidParameterException
+from iaqualink.instrumentation import LatencyHistogram
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+
+class Priority(enum.IntEnum):
+    """Request lanes, lower values are served first."""
+
+    # Commands sent on behalf of a user.
+    COMMAND = 0
+    # Background polling.
+    POLL = 1
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Sustained `rate` in requests per second, with bursts of `burst`."""
+
+    rate: float
+    burst: int = 1
+
+    def __post_init__(self) -> None:
+        if self.rate <= 0 or self.burst < 1:
+            m = "rate must be positive and burst at least 1."
+            raise AqualinkInvalidParameterException(m)
+
+
+class TokenBucket:
+    """Async token bucket with one FIFO queue per priority.
+
+    Waiting commands are always served before waiting polls, whatever
+    the order they arrived in. Wait times are recorded per priority.
+    """
+
+    def __init__(self, limit: RateLimit):
+        self.limit = limit
+        self.waits = {x: LatencyHistogram() for x in Priority}
+
+        self._tokens = float(limit.burst)
+        self._updated = time.monotonic()
+        self._lanes: dict[Priority, deque[asyncio.Future[None]]] = {
+            x: deque() for x in Priority
+        }
+        self._timer: asyncio.TimerHandle | None = None
+
+    @property
+    def waiting(self) -> int:
+        lanes = self._lanes.values()
+        return sum(not x.done() for lane in lanes for x in lane)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(
+            self.limit.burst, self._tokens + elapsed * self.limit.rate
+        )
+
+    async def acquire(self, priority: Priority = Priority.COMMAND) -> float:
+        """Wait for a token, return how many seconds that took."""
+        self._refill()
+        if self._tokens >= 1 and not self.waiting:
+            self._tokens -= 1
+            self.waits[priority].observe(0.0)
+            return 0.0
+
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._lanes[priority].append(future)
+        self._wake()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted a token but cancelled before using it.
+                self._tokens += 1
+                self._wake()
+            raise
+
+        waited = time.monotonic() - start
+        self.waits[priority].observe(waited)
+        return waited
+
+    def _wake(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        self._refill()
+        for lane in self._lanes.values():
+            while lane and self._tokens >= 1:
+                future = lane.popleft()
+                if future.done():
+                    continue
+                self._tokens -= 1
+                future.set_result(None)
+
+        if self.waiting:
+            delay = (1 - self._tokens) / self.limit.rate
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(delay, self._wake)
+
+
+class RateLimiter:
+    """Client-side rate limits per host and per account.
+
+    limiter = RateLimiter(
+        hosts={"p-api.iaqualink.net": RateLimit(rate=5, burst=10)},
+        account=RateLimit(rate=1, burst=5),
+    )
+    client = AqualinkClient(user, password, rate_limiter=limiter)
+
+    Hosts without an entry in `hosts` use `default`, if any. A limiter can
+    be shared by several clients: host limits then apply to all of them
+    together, while account limits apply to each account separately.
+    """
+
+    def __init__(
+        self,
+        *,
+        hosts: Mapping[str, RateLimit] | None = None,
+        default: RateLimit | None = None,
+        account: RateLimit | None = None,
+    ):
+        self.host_limits = dict(hosts or {})
+        self.default = default
+        self.account = account
+
+        self.hosts: dict[str, TokenBucket] = {}
+        self.accounts: dict[str, TokenBucket] = {}
+        # Total time spent waiting by requests, across all buckets.
+        self.waits = {x: LatencyHistogram() for x in Priority}
+
+    def _host_bucket(self, host: str) -> TokenBucket | None:
+        if host not in self.hosts:
+            limit = self.host_limits.get(host, self.default)
+            if limit is None:
+                return None
+            self.hosts[host] = TokenBucket(limit)
+        return self.hosts[host]
+
+    def _account_bucket(self, account: str) -> TokenBucket | None:
+        if self.account is None:
+            return None
+        if account not in self.accounts:
+            self.accounts[account] = TokenBucket(self.account)
+        return self.accounts[account]
+
+    async def acquire(
+        self,
+        url: str,
+        account: str,
+        priority: Priority = Priority.COMMAND,
+    ) -> float:
+        """Wait until a request to `url` is allowed, return the wait."""
+        waited = 0.0
+        for bucket in (
+            self._account_bucket(account),
+            self._host_bucket(httpx.URL(url).host),
+        ):
+            if bucket is not None:
+                waited += await bucket.acquire(priority)
+
+        self.waits[priority].observe(waited)
+        return waited
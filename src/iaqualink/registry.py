@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Any, Generic, TypeVar
+
+from iaqualink.device import AqualinkDevice
+from iaqualink.exception import AqualinkDeviceNotSupported
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable, Iterable
+    from typing import TypeAlias
+
+    from iaqualink.typing import DeviceData
+
+T = TypeVar("T", bound=AqualinkDevice)
+C = TypeVar("C", bound=type)
+
+if TYPE_CHECKING:
+    # Either a device class, or a function picking one from the device data,
+    # for devices whose class depends on more than their name.
+    Target: TypeAlias = type[T] | Callable[[DeviceData], type[T]]  # noqa: UP040
+
+
+class DeviceRegistry(Generic[T]):  # noqa: UP046
+    """Picks the class of a device from its data.
+
+    Rules are checked in this order:
+    - exact names, with a dict lookup;
+    - `match` predicates, in the order they were added;
+    - name prefixes and suffixes, in the order they were added, compiled
+      into a single regular expression;
+    - `default`.
+
+    Matching names is done once per name, type and subtype, the decision is
+    memoized. Predicates and targets that are functions run for every
+    device, they should be cheap.
+    """
+
+    def __init__(self, default: Target[T] | None = None):
+        self.default = default
+
+        self._names: dict[str, Target[T]] = {}
+        self._matchers: list[
+            tuple[Callable[[DeviceData], bool], Target[T]]
+        ] = []
+        self._patterns: list[tuple[str, Target[T]]] = []
+        self._regex: re.Pattern[str] | None = None
+        # Target found by name, and whether it's an exact name, per key.
+        self._memo: dict[Hashable, tuple[Target[T] | None, bool]] = {}
+
+    def add(
+        self,
+        target: Target[T],
+        *,
+        names: Iterable[str] = (),
+        prefixes: Iterable[str] = (),
+        suffixes: Iterable[str] = (),
+        match: Callable[[DeviceData], bool] | None = None,
+    ) -> Callable[[], None]:
+        """Use `target` for the devices matching any of the given rules.
+
+        Returns a function that removes the rules.
+        """
+        names = list(names)
+        patterns = [(f"{re.escape(x)}.*", target) for x in prefixes]
+        patterns += [(f".*{re.escape(x)}", target) for x in suffixes]
+        matcher = (match, target) if match is not None else None
+
+        for name in names:
+            self._names[name] = target
+        self._patterns += patterns
+        if matcher is not None:
+            self._matchers.append(matcher)
+        self._changed()
+
+        def remove() -> None:
+            for name in names:
+                if self._names.get(name) is target:
+                    del self._names[name]
+            self._patterns = [x for x in self._patterns if x not in patterns]
+            if matcher in self._matchers:
+                self._matchers.remove(matcher)
+            self._changed()
+
+        return remove
+
+    def register(self, **rules: Any) -> Callable[[C], C]:
+        """Class decorator, see `add` for the rules."""
+
+        def decorator(cls: C) -> C:
+            self.add(cls, **rules)
+            return cls
+
+        return decorator
+
+    def _changed(self) -> None:
+        self._regex = None
+        self._memo.clear()
+
+    def _compile(self) -> re.Pattern[str]:
+        # Named groups tell which rule matched, the first one added wins.
+        pattern = "|".join(
+            f"(?P<r{i}>{x})" for i, (x, _) in enumerate(self._patterns)
+        )
+        return re.compile(pattern or "(?!)", re.DOTALL)
+
+    def _lookup(self, name: str) -> tuple[Target[T] | None, bool]:
+        target = self._names.get(name)
+        if target is not None:
+            return target, True
+
+        if self._regex is None:
+            self._regex = self._compile()
+        m = self._regex.fullmatch(name)
+        if m is None or m.lastgroup is None:
+            return None, False
+        return self._patterns[int(m.lastgroup[1:])][1], False
+
+    def classify(self, data: DeviceData) -> type[T]:
+        """Return the class of the device with `data`.
+
+        Raises AqualinkDeviceNotSupported if no rule matches and there's no
+        default, and may be raised by targets that are functions.
+        """
+        name = data["name"]
+        key = (name, data.get("type"), data.get("subtype"))
+        try:
+            target, exact = self._memo[key]
+        except KeyError:
+            target, exact = self._memo[key] = self._lookup(name)
+
+        # Exact names are more specific than predicates.
+        if not exact:
+            for match, matched in self._matchers:
+                if match(data):
+                    target = matched
+                    break
+
+        if target is None:
+            target = self.default
+        if target is None:
+            raise AqualinkDeviceNotSupported(data)
+        if isinstance(target, type):
+            return target
+        return target(data)
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import enum
+import random
+import time
+from dataclasses import dataclass
+
+import httpx
+
+from iaqualink.const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    RETRY_ATTEMPTS,
+    RETRY_BACKOFF,
+    RETRY_BACKOFF_FACTOR,
+    RETRY_JITTER,
+    RETRY_MAX_BACKOFF,
+)
+from iaqualink.exception import (
+    AqualinkInvalidParameterException,
+    AqualinkServiceUnavailableException,
+)
+
+RETRY_STATUSES = frozenset(
+    {
+        httpx.codes.TOO_MANY_REQUESTS,
+        httpx.codes.INTERNAL_SERVER_ERROR,
+        httpx.codes.BAD_GATEWAY,
+        httpx.codes.SERVICE_UNAVAILABLE,
+        httpx.codes.GATEWAY_TIMEOUT,
+    }
+)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """When and how long to wait before retrying a failed request.
+
+    Requests are retried on transport errors and on `statuses`, up to
+    `attempts` tries in total. The n-th retry waits `backoff * factor**n`
+    seconds, capped to `max_backoff` and randomly spread by +/- `jitter`
+    (a fraction). A Retry-After header lengthens the wait, up to
+    `max_backoff`.
+
+    Requests that aren't idempotent, e.g. iAqua toggle commands, are only
+    retried when they can't have reached the server: on connection errors.
+    """
+
+    attempts: int = RETRY_ATTEMPTS
+    backoff: float = RETRY_BACKOFF
+    factor: float = RETRY_BACKOFF_FACTOR
+    max_backoff: float = RETRY_MAX_BACKOFF
+    jitter: float = RETRY_JITTER
+    statuses: frozenset[int] = RETRY_STATUSES
+
+    def __post_init__(self) -> None:
+        if self.attempts < 1:
+            m = "attempts must be at least 1."
+            raise AqualinkInvalidParameterException(m)
+
+    def should_retry(
+        self,
+        attempt: int,
+        *,
+        idempotent: bool = True,
+        response: httpx.Response | None = None,
+        exception: Exception | None = None,
+    ) -> bool:
+        """Whether to retry after the `attempt`-th try (0 for the first)."""
+        if attempt + 1 >= self.attempts:
+            return False
+        if exception is not None:
+            if isinstance(exception, httpx.ConnectError | httpx.ConnectTimeout):
+                return True
+            return idempotent and isinstance(exception, httpx.TransportError)
+        if response is not None:
+            return idempotent and response.status_code in self.statuses
+        return False
+
+    def delay(
+        self, attempt: int, response: httpx.Response | None = None
+    ) -> float:
+        """Seconds to wait before retrying after the `attempt`-th try."""
+        delay = min(self.backoff * self.factor**attempt, self.max_backoff)
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+
+        retry_after = _retry_after(response)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_backoff))
+        return delay
+
+
+def _retry_after(response: httpx.Response | None) -> float | None:
+    if response is None:
+        return None
+    try:
+        return float(response.headers["retry-after"])
+    except (KeyError, ValueError):
+        # HTTP dates aren't worth the trouble, they're not used by the API.
+        return None
+
+
+class CircuitState(enum.Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Fail fast while a host keeps failing.
+
+    The circuit opens after `failure_threshold` consecutive failures (5xx
+    responses or transport errors). Requests then raise
+    AqualinkServiceUnavailableException without reaching the network until
+    `reset_timeout` seconds have passed. A single trial request is then let
+    through: the circuit closes if it succeeds and opens again otherwise.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+    ):
+        if failure_threshold < 1:
+            m = "failure_threshold must be at least 1."
+            raise AqualinkInvalidParameterException(m)
+
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def before_request(self) -> None:
+        if self.state is CircuitState.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                self._reject()
+            self.state = CircuitState.HALF_OPEN
+
+        if self.state is CircuitState.HALF_OPEN:
+            if self._trial_in_flight:
+                self._reject()
+            self._trial_in_flight = True
+
+    def _reject(self) -> None:
+        self.rejected += 1
+        m = "Service unavailable, not sending requests for now."
+        raise AqualinkServiceUnavailableException(m)
+
+    def record_success(self) -> None:
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if (
+            self.state is CircuitState.HALF_OPEN
+            or self.failures >= self.failure_threshold
+        ):
+            self.state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Forget a request that ended without a verdict, e.g. cancelled."""
+        self._trial_in_flight = False
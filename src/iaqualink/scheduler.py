@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from iaqualink.const import (
+    DEFAULT_UPDATE_CONCURRENCY,
+    POLL_BACKOFF_FACTOR,
+    POLL_BASE_INTERVAL,
+    POLL_FAST_INTERVAL,
+    POLL_JITTER,
+    POLL_MAX_INTERVAL,
+)
+from iaqualink.exception import AqualinkInvalidParameterException
+from iaqualink.group import AqualinkSystemGroup
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+    from iaqualink.group import GroupUpdateResult, SystemUpdateResult
+    from iaqualink.system import AqualinkSystem
+
+LOGGER = logging.getLogger("iaqualink")
+
+
+@dataclass
+class SchedulerStats:
+    polls: int = 0
+    failures: int = 0
+    changes: int = 0
+
+
+@dataclass
+class _PollState:
+    system: AqualinkSystem
+    interval: float
+    next_poll: float
+    last_command: float = 0.0
+    change_count: int | None = None
+
+
+class AqualinkPollScheduler:
+    """Polls systems in the background at an adaptive rate.
+
+    Each system starts at `base_interval`. A system is polled every
+    `fast_interval` seconds while its state keeps changing or after a
+    command was sent to it. Its interval grows by `backoff` after each poll
+    that found it unchanged, offline or failing, up to `max_interval`.
+    Every interval is randomly spread by +/- `jitter` (a fraction) so that
+    polls across a fleet don't line up. Systems whose changes are pushed
+    (`push_connected`) are polled every `max_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        systems: Iterable[AqualinkSystem] = (),
+        *,
+        fast_interval: float = POLL_FAST_INTERVAL,
+        base_interval: float = POLL_BASE_INTERVAL,
+        max_interval: float = POLL_MAX_INTERVAL,
+        backoff: float = POLL_BACKOFF_FACTOR,
+        jitter: float = POLL_JITTER,
+        concurrency: int = DEFAULT_UPDATE_CONCURRENCY,
+        callback: Callable[[GroupUpdateResult], None] | None = None,
+    ):
+        if not 0 < fast_interval <= base_interval <= max_interval:
+            msg = "Intervals must satisfy 0 < fast <= base <= max."
+            raise AqualinkInvalidParameterException(msg)
+
+        self.fast_interval = fast_interval
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self.callback = callback
+
+        self.stats = SchedulerStats()
+
+        self._states: dict[str, _PollState] = {}
+        self._task: asyncio.Task[None] | None = None
+        self._wakeup = asyncio.Event()
+
+        for system in systems:
+            self.add(system)
+
+    def _jittered(self, interval: float) -> float:
+        return interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def add(self, system: AqualinkSystem) -> None:
+        # Spread the first polls over the base interval.
+        delay = random.uniform(0, self.base_interval)
+        self._states[system.serial] = _PollState(
+            system=system,
+            interval=self.base_interval,
+            next_poll=time.monotonic() + delay,
+        )
+        self._wakeup.set()
+
+    def remove(self, system: AqualinkSystem) -> None:
+        self._states.pop(system.serial, None)
+
+    def interval(self, system: AqualinkSystem) -> float:
+        """Current polling interval of a system, without jitter."""
+        return self._states[system.serial].interval
+
+    def poke(self, system: AqualinkSystem) -> None:
+        """Poll a system as soon as possible."""
+        state = self._states[system.serial]
+        state.interval = self.fast_interval
+        state.next_poll = time.monotonic()
+        self._wakeup.set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _next_interval(
+        self, state: _PollState, result: SystemUpdateResult
+    ) -> float:
+        system = state.system
+
+        if not result.success or system.online is not True:
+            return min(state.interval * self.backoff, self.max_interval)
+
+        # Changes are pushed, polling only checks nothing was missed.
+        if system.push_connected:
+            state.change_count = system.change_count
+            return self.max_interval
+
+        # The first poll of a system discovers its devices, that's not a
+        # change worth polling faster for.
+        changed = (
+            state.change_count is not None
+            and system.change_count != state.change_count
+        )
+        state.change_count = system.change_count
+        if changed:
+            self.stats.changes += 1
+            return self.fast_interval
+
+        return min(state.interval * self.backoff, self.max_interval)
+
+    def _check_commands(self) -> None:
+        # Commands sent since last time bring the next poll forward.
+        for state in self._states.values():
+            last_command = state.system.last_command
+            if last_command > state.last_command:
+                state.last_command = last_command
+                if state.system.push_connected:
+                    continue
+                state.interval = self.fast_interval
+                state.next_poll = min(
+                    state.next_poll, last_command + self.fast_interval
+                )
+
+    async def poll(self) -> GroupUpdateResult | None:
+        """Poll the systems that are due, if any."""
+        self._check_commands()
+        now = time.monotonic()
+
+        due = [x for x in self._states.values() if x.next_poll <= now]
+        if not due:
+            return None
+
+        group = AqualinkSystemGroup([x.system for x in due], self.concurrency)
+        result = await group.update()
+
+        now = time.monotonic()
+        for state in due:
+            system_result = result.results[state.system.serial]
+            self.stats.polls += 1
+            if not system_result.success:
+                self.stats.failures += 1
+
+            state.interval = self._next_interval(state, system_result)
+            state.next_poll = now + self._jittered(state.interval)
+
+        if self.callback is not None:
+            self.callback(result)
+
+        return result
+
+    def _sleep_time(self) -> float:
+        if not self._states:
+            return self.fast_interval
+
+        now = time.monotonic()
+        delay = min(x.next_poll for x in self._states.values()) - now
+        # Wake up regularly to notice commands sent in the meantime.
+        return max(0.0, min(delay, self.fast_interval))
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.poll()
+            except Exception:
+                LOGGER.exception("Unexpected error while polling systems")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._sleep_time())
+            except TimeoutError:
+                pass
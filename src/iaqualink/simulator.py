@@ -0,0 +1,580 @@
+"""Local simulation of the iAqualink cloud API.
+
+`AqualinkSimulator` is an ASGI application implementing the endpoints used
+by this library, so that `AqualinkClient`, `IaquaSystem` and `ExoSystem`
+can be exercised without network access:
+
+    simulator = AqualinkSimulator(iaqua_systems=10, latency=0.05)
+    async with simulator.client() as client:
+        systems = await client.get_systems()
+
+Requests are routed on their path only, whatever the host, which is what
+httpx's ASGI transport needs since the library talks to several hosts.
+
+Exo shadow documents are also published to `broker`, an in-memory MQTT
+broker stand-in, whenever they change:
+
+    push = ExoShadowPush(client, simulator.broker.transport())
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import copy
+import json
+import random
+import secrets
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, cast
+from urllib.parse import parse_qsl
+
+import httpx
+
+from iaqualink.state import deep_merge
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, MutableMapping
+
+    from iaqualink.client import AqualinkClient
+    from iaqualink.systems.exo.push import MemoryBroker
+
+    Scope = MutableMapping[str, Any]
+    Message = MutableMapping[str, Any]
+    Receive = Callable[[], Awaitable[Message]]
+    Send = Callable[[Message], Awaitable[None]]
+
+LOGIN_PATH = "/users/v1/login"
+DEVICES_PATH = "/devices.json"
+SESSION_PATH = "/v1/mobile/session.json"
+SHADOW_PREFIX = "/devices/v1/"
+SHADOW_SUFFIX = "/shadow"
+
+IAQUA_AUX_COUNT = 7
+
+# ICL zone commands and the zone attributes they set.
+ICL_COMMANDS = {
+    "onoff_iclzone": [],
+    "set_iclzone_color": ["dim_level"],
+    "define_iclzone_customcolor": [
+        "red_val",
+        "green_val",
+        "blue_val",
+        "white_val",
+    ],
+}
+
+
+def _jwt(claims: dict[str, Any]) -> str:
+    """Build an unsigned JWT, enough for clients reading `exp`."""
+
+    def encode(data: dict[str, Any]) -> str:
+        raw = json.dumps(data).encode()
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    return f"{encode({'alg': 'none'})}.{encode(claims)}."
+
+
+def _stamp(metadata: dict[str, Any], source: dict[str, Any], ts: int) -> None:
+    # Shadow metadata mirrors the state, with the time each value was set.
+    for k, v in source.items():
+        if isinstance(v, dict):
+            child = metadata.get(k)
+            # Replace the metadata of a value that became an object.
+            if child is None or isinstance(child.get("timestamp"), int):
+                child = metadata[k] = {}
+            _stamp(child, v, ts)
+        else:
+            metadata[k] = {"timestamp": ts}
+
+
+def _toggle(value: str) -> str:
+    return "0" if value == "1" else "1"
+
+
+class SimulatedSystem:
+    NAME: str
+
+    def __init__(self, serial: str, name: str) -> None:
+        self.serial = serial
+        self.name = name
+        self.online = True
+
+    def info(self, index: int) -> dict[str, Any]:
+        return {
+            "id": index,
+            "serial_number": self.serial,
+            "name": self.name,
+            "device_type": self.NAME,
+        }
+
+
+class SimulatedIaquaSystem(SimulatedSystem):
+    NAME = "iaqua"
+
+    def __init__(self, serial: str, name: str) -> None:
+        super().__init__(serial, name)
+        self.home = {
+            "spa_temp": "102",
+            "pool_temp": "84",
+            "air_temp": "79",
+            "spa_set_point": "102",
+            "pool_set_point": "85",
+            "cover_pool": "",
+            "freeze_protection": "0",
+            "spa_pump": "0",
+            "pool_pump": "1",
+            "spa_heater": "0",
+            "pool_heater": "0",
+            "solar_heater": "0",
+        }
+        self.aux = {
+            f"aux_{i}": {
+                "state": "0",
+                "label": "POOL LIGHT" if i == 1 else f"AUX{i}",
+                "icon": "aux_1_0.png",
+                "type": "0",
+                "subtype": "0",
+            }
+            for i in range(1, IAQUA_AUX_COUNT + 1)
+        }
+        self.aux["aux_2"].update(type="1", label="SPA LIGHT")
+        self.aux["aux_3"].update(type="2", subtype="1", label="COLOR LIGHT")
+        self.icl_zone = {
+            "zoneId": 1,
+            "zoneName": "Pool lights",
+            "zoneStatus": "off",
+            "zoneColorVal": "off",
+            "dim_level": "100",
+            "red_val": "255",
+            "green_val": "255",
+            "blue_val": "255",
+            "white_val": "0",
+        }
+
+    @property
+    def _status(self) -> str:
+        return "Online" if self.online else "Offline"
+
+    def home_screen(self) -> dict[str, Any]:
+        return {
+            "message": "",
+            "serial": self.serial,
+            "home_screen": [
+                {"status": self._status},
+                {"response": ""},
+                {"system_type": "0"},
+                {"temp_scale": "F"},
+                *({k: v} for k, v in self.home.items()),
+                {"is_icl_present": "present"},
+                {"icl_custom_color_info": [self._icl_color()]},
+            ],
+        }
+
+    def _icl_color(self) -> dict[str, Any]:
+        keys = ["zoneId", "red_val", "green_val", "blue_val", "white_val"]
+        return {k: self.icl_zone[k] for k in keys}
+
+    def devices_screen(self) -> dict[str, Any]:
+        return {
+            "message": "",
+            "serial": self.serial,
+            "devices_screen": [
+                {"status": self._status},
+                {"response": ""},
+                {"group": "1"},
+                *(
+                    {name: [{k: v} for k, v in attrs.items()]}
+                    for name, attrs in self.aux.items()
+                ),
+            ],
+            "icl_info_list": [dict(self.icl_zone)],
+        }
+
+    def command(self, command: str, params: dict[str, str]) -> Any:
+        if command == "get_home":
+            return self.home_screen()
+        if command == "get_devices":
+            return self.devices_screen()
+
+        if command == "set_temps":
+            points = ["spa_set_point", "pool_set_point"]
+            for i, point in enumerate(points, start=1):
+                if f"temp{i}" in params:
+                    self.home[point] = params[f"temp{i}"]
+            return self.home_screen()
+
+        if command.startswith("set_aux_"):
+            aux = self.aux.get(f"aux_{command.removeprefix('set_aux_')}")
+            if aux is None:
+                return None
+            aux["state"] = _toggle(aux["state"])
+            return self.devices_screen()
+
+        if command == "set_light":
+            aux = self.aux.get(f"aux_{params.get('aux', '')}")
+            if aux is None:
+                return None
+            light = params.get("light", "0")
+            aux["state"] = "0" if light == "0" else "1"
+            if aux["type"] == "1":
+                aux["subtype"] = light
+            return self.devices_screen()
+
+        if command in ICL_COMMANDS:
+            if params.get("zone_id") != str(self.icl_zone["zoneId"]):
+                return None
+            if command == "onoff_iclzone":
+                self.icl_zone["zoneStatus"] = params.get("on_off_action", "")
+            else:
+                self.icl_zone["zoneStatus"] = "on"
+                for k in ICL_COMMANDS[command]:
+                    if k in params:
+                        self.icl_zone[k] = params[k]
+            return self.devices_screen()
+
+        name = command.removeprefix("set_")
+        if name in self.home and name.endswith(("_pump", "_heater")):
+            self.home[name] = _toggle(self.home[name])
+            return self.home_screen()
+
+        return None
+
+
+class SimulatedExoSystem(SimulatedSystem):
+    NAME = "exo"
+
+    def __init__(self, serial: str, name: str) -> None:
+        super().__init__(serial, name)
+        self.version = 1
+        self.reported: dict[str, Any] = {
+            "vr": "V85W4",
+            "aws": {"status": "connected", "timestamp": 0},
+            "equipment": {
+                "swc_0": {
+                    "vr": "V85R67",
+                    "sn": serial,
+                    "swc": 50,
+                    "ph_sp": 74,
+                    "orp_sp": 830,
+                    "low": 0,
+                    "boost": 0,
+                    "production": 1,
+                    "error_state": 0,
+                    "exo_state": 1,
+                    "aux_1": {"type": "none", "mode": 0, "state": 0},
+                    "aux_2": {"type": "none", "mode": 0, "state": 0},
+                    "sns_1": {"state": 1, "value": 75, "sensor_type": "Ph"},
+                    "sns_2": {"state": 1, "value": 780, "sensor_type": "Orp"},
+                    "sns_3": {
+                        "state": 1,
+                        "value": 28,
+                        "sensor_type": "Water temp",
+                    },
+                    "filter_pump": {"type": 1, "state": 1},
+                }
+            },
+            "heating": {
+                "sp": 28,
+                "sp_min": 15,
+                "sp_max": 32,
+                "enabled": 0,
+                "state": 0,
+                "priority_enabled": 0,
+            },
+        }
+        self.metadata: dict[str, Any] = {}
+        _stamp(self.metadata, self.reported, int(time.time()))
+
+    def shadow(self) -> dict[str, Any]:
+        aws = self.reported["aws"]
+        aws["status"] = "connected" if self.online else "disconnected"
+        return {
+            "state": {"reported": self.reported},
+            "metadata": {"reported": self.metadata},
+            "deviceId": self.serial,
+            "version": self.version,
+            "ts": int(time.time()),
+        }
+
+    def desire(
+        self, desired: dict[str, Any], apply: bool = True
+    ) -> dict[str, Any]:
+        # The real device applies the desired state asynchronously, the
+        # simulated one does it right away unless `apply` is False.
+        if apply:
+            deep_merge(self.reported, desired)
+            _stamp(self.metadata, desired, int(time.time()))
+        self.version += 1
+        return {
+            "state": {"desired": desired},
+            "version": self.version,
+            "timestamp": int(time.time()),
+        }
+
+    def report(
+        self, reported: dict[str, Any], timestamp: int | None = None
+    ) -> None:
+        """Change the reported state, as if done on the device itself."""
+        if timestamp is None:
+            timestamp = int(time.time())
+        deep_merge(self.reported, reported)
+        _stamp(self.metadata, reported, timestamp)
+        self.version += 1
+
+    def document(self) -> dict[str, Any]:
+        """Shadow document published after a change."""
+        return {
+            "current": {
+                "state": {"reported": copy.deepcopy(self.reported)},
+                "metadata": {"reported": copy.deepcopy(self.metadata)},
+                "version": self.version,
+            },
+            "timestamp": int(time.time()),
+        }
+
+
+@dataclass
+class SimulatorStats:
+    # Requests received, keyed by endpoint (login, devices, session, shadow)
+    # and session command.
+    requests: Counter[str] = field(default_factory=Counter)
+    # Responses with an injected server error.
+    errors: int = 0
+    # Requests rejected because of a missing or expired token.
+    unauthorized: int = 0
+
+    @property
+    def total(self) -> int:
+        return sum(
+            v for k, v in self.requests.items() if not k.startswith("cmd:")
+        )
+
+
+class AqualinkSimulator:
+    """ASGI application simulating the iAqualink cloud.
+
+    `latency` (plus a random `latency_jitter`) seconds are spent on each
+    request. A fraction `error_rate` of requests fails with a 500 status.
+    Tokens handed out at login expire after `token_ttl` seconds, after which
+    requests get a 401 until the client logs in again. Exo systems apply
+    desired state updates `apply_delay` seconds after receiving them, like
+    real devices do, or right away if it's 0.
+    """
+
+    def __init__(
+        self,
+        *,
+        iaqua_systems: int = 1,
+        exo_systems: int = 0,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        token_ttl: float = 3600.0,
+        apply_delay: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.token_ttl = token_ttl
+        self.apply_delay = apply_delay
+
+        self.stats = SimulatorStats()
+        self._random = random.Random(seed)
+
+        self.systems: dict[str, SimulatedSystem] = {}
+        for i in range(iaqua_systems):
+            serial = f"IAQUA{i:05d}"
+            self.systems[serial] = SimulatedIaquaSystem(serial, f"Pool {i}")
+        for i in range(exo_systems):
+            serial = f"EXO{i:05d}"
+            self.systems[serial] = SimulatedExoSystem(serial, f"Exo {i}")
+
+        # Token to expiry time, for both iaqua sessions and exo IdTokens.
+        self._tokens: dict[str, float] = {}
+
+        from iaqualink.systems.exo.push import MemoryBroker
+
+        self.broker: MemoryBroker = MemoryBroker()
+
+    def transport(self) -> httpx.ASGITransport:
+        return httpx.ASGITransport(app=self)
+
+    def client(
+        self, username: str = "user", password: str = "pass"
+    ) -> AqualinkClient:
+        """Return an `AqualinkClient` talking to this simulator."""
+        from iaqualink.client import AqualinkClient
+
+        http = httpx.AsyncClient(transport=self.transport())
+        return AqualinkClient(username, password, httpx_client=http)
+
+    def expire_tokens(self) -> None:
+        """Expire all tokens, as if `token_ttl` had elapsed."""
+        self._tokens.clear()
+
+    def set_online(self, serial: str, online: bool) -> None:
+        self.systems[serial].online = online
+
+    def report(
+        self,
+        serial: str,
+        reported: dict[str, Any],
+        timestamp: int | None = None,
+    ) -> None:
+        """Change the reported state of an Exo system and publish it.
+
+        Values are stamped with `timestamp` in the metadata, now by default.
+        """
+        system = cast("SimulatedExoSystem", self.systems[serial])
+        system.report(reported, timestamp)
+        self._publish(system)
+
+    def _publish(self, system: SimulatedExoSystem) -> None:
+        from iaqualink.systems.exo.push import SHADOW_DOCUMENTS_TOPIC
+
+        topic = SHADOW_DOCUMENTS_TOPIC.format(serial=system.serial)
+        self.broker.publish(topic, json.dumps(system.document()).encode())
+
+    def _issue_token(self) -> tuple[str, str]:
+        expiry = time.time() + self.token_ttl
+        session_id = secrets.token_hex(16)
+        id_token = _jwt({"exp": int(expiry), "jti": secrets.token_hex(8)})
+        self._tokens[session_id] = expiry
+        self._tokens[id_token] = expiry
+        return session_id, id_token
+
+    def _authorized(self, token: str | None) -> bool:
+        if token is None:
+            return False
+        expiry = self._tokens.get(token)
+        if expiry is None or expiry < time.time():
+            self._tokens.pop(token, None)
+            return False
+        return True
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http":
+            return
+
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+
+        status, payload = await self._handle(scope, body)
+        content = json.dumps(payload).encode() if payload is not None else b""
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(content)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": content})
+
+    async def _handle(self, scope: Scope, body: bytes) -> tuple[int, Any]:
+        delay = self.latency
+        if self.latency_jitter:
+            delay += self._random.uniform(0, self.latency_jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        method = scope["method"]
+        path = scope["path"]
+        query = dict(parse_qsl(scope["query_string"].decode()))
+        headers = {k.decode(): v.decode() for k, v in scope["headers"]}
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.stats.errors += 1
+            return 500, None
+
+        if path == LOGIN_PATH and method == "POST":
+            return self._login(json.loads(body or b"{}"))
+        if path == DEVICES_PATH and method == "GET":
+            return self._devices(query)
+        if path == SESSION_PATH and method == "GET":
+            return self._session(query)
+        if path.startswith(SHADOW_PREFIX) and path.endswith(SHADOW_SUFFIX):
+            serial = path.removeprefix(SHADOW_PREFIX).removesuffix(
+                SHADOW_SUFFIX
+            )
+            token = headers.get("authorization")
+            return self._shadow(method, serial, token, body)
+
+        return 404, None
+
+    def _unauthorized(self) -> tuple[int, Any]:
+        self.stats.unauthorized += 1
+        return 401, None
+
+    def _login(self, data: dict[str, Any]) -> tuple[int, Any]:
+        self.stats.requests["login"] += 1
+        if not data.get("email") or not data.get("password"):
+            return self._unauthorized()
+
+        session_id, id_token = self._issue_token()
+        return 200, {
+            "id": "1",
+            "email": data["email"],
+            "authentication_token": session_id,
+            "session_id": session_id,
+            "userPoolOAuth": {"IdToken": id_token},
+        }
+
+    def _devices(self, query: dict[str, str]) -> tuple[int, Any]:
+        self.stats.requests["devices"] += 1
+        if not self._authorized(query.get("authentication_token")):
+            return self._unauthorized()
+        return 200, [x.info(i) for i, x in enumerate(self.systems.values())]
+
+    def _session(self, query: dict[str, str]) -> tuple[int, Any]:
+        self.stats.requests["session"] += 1
+        if not self._authorized(query.get("sessionID")):
+            return self._unauthorized()
+
+        system = self.systems.get(query.get("serial", ""))
+        if not isinstance(system, SimulatedIaquaSystem):
+            return 404, None
+
+        command = query.get("command", "")
+        self.stats.requests[f"cmd:{command}"] += 1
+        result = system.command(command, query)
+        if result is None:
+            return 400, None
+        return 200, result
+
+    def _shadow(
+        self, method: str, serial: str, token: str | None, body: bytes
+    ) -> tuple[int, Any]:
+        self.stats.requests["shadow"] += 1
+        if not self._authorized(token):
+            return self._unauthorized()
+
+        system = self.systems.get(serial)
+        if not isinstance(system, SimulatedExoSystem):
+            return 404, None
+
+        if method == "GET":
+            return 200, system.shadow()
+        if method == "POST":
+            desired = json.loads(body)["state"]["desired"]
+            delay = self.apply_delay
+            result = system.desire(desired, apply=not delay)
+            # Published for the update, with the state reported so far.
+            self._publish(system)
+            if delay:
+                loop = asyncio.get_running_loop()
+                loop.call_later(delay, self.report, serial, desired)
+            return 200, result
+        return 405, None
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+LOGGER = logging.getLogger("iaqualink")
+
+
+class SingleFlight:
+    """Runs a coroutine function at most once at a time.
+
+    Callers arriving while a run is in flight wait for it instead, and all
+    share its outcome, including any exception. A cancelled caller doesn't
+    cancel the run for the others.
+    """
+
+    def __init__(self) -> None:
+        self._task: asyncio.Future[None] | None = None
+
+    @property
+    def in_flight(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def run(self, func: Callable[[], Awaitable[None]]) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(func())
+            self._task.add_done_callback(_retrieve_exception)
+
+        await asyncio.shield(self._task)
+
+
+def _retrieve_exception(task: asyncio.Future[None]) -> None:
+    # Every caller may have been cancelled by the time the run failed,
+    # leaving no one to retrieve the exception.
+    if not task.cancelled() and task.exception() is not None:
+        LOGGER.debug("Shared run failed: %r", task.exception())
@@ -1,11 +1,26 @@
 from __future__ import annotations
 
+import contextlib
 import logging
-from typing import TYPE_CHECKING, ClassVar
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, ClassVar, NamedTuple
 
+from iaqualink.const import PENDING_CHANGE_TIMEOUT
 from iaqualink.exception import AqualinkSystemUnsupportedException
+from iaqualink.listener import ListenerRegistry, schedule
+from iaqualink.singleflight import SingleFlight
 
 if TYPE_CHECKING:
+    from collections.abc import (
+        AsyncIterator,
+        Awaitable,
+        Callable,
+        Coroutine,
+        Iterable,
+        Iterator,
+    )
+
     from iaqualink.client import AqualinkClient
     from iaqualink.device import AqualinkDevice
     from iaqualink.typing import Payload
@@ -13,10 +28,54 @@ if TYPE_CHECKING:
 
 LOGGER = logging.getLogger("iaqualink")
 
+_MISSING = object()
+
+
+class DeviceChange(NamedTuple):
+    """Change of a single device attribute.
+
+    `old` is None for devices that were just discovered, `new` for devices
+    that disappeared.
+    """
+
+    device: str
+    attribute: str
+    old: Any
+    new: Any
+
+
+@dataclass
+class UpdateStats:
+    # Number of calls to update().
+    calls: int = 0
+    # Calls that waited for an update already in progress.
+    coalesced: int = 0
+    # Calls skipped because the last refresh was too recent.
+    throttled: int = 0
+
+
+@dataclass
+class PendingChange:
+    """Value set locally by a command the API hasn't confirmed yet."""
+
+    value: Any
+    # Value before the command, restored if the command fails.
+    old: Any
+    # Monotonic time the command completed, None while it's in flight.
+    completed: float | None = None
+    # Wall clock time the command was issued.
+    issued: float = field(default_factory=time.time)
+    # Value last reported by the API while the change was pending, restored
+    # if the change is never confirmed.
+    reported: Any = _MISSING
+
 
 class AqualinkSystem:
     subclasses: ClassVar[dict[str, type[AqualinkSystem]]] = {}
 
+    # Attributes saved along with the devices by AqualinkCache.
+    CACHED_ATTRIBUTES: ClassVar[tuple[str, ...]] = ()
+
     def __init__(self, aqualink: AqualinkClient, data: Payload):
         self.aqualink = aqualink
         self.data = data
@@ -27,6 +86,32 @@ class AqualinkSystem:
         # True/False are obvious, None means "unknown".
         self.online: bool | None = None
 
+        # Monotonic time of the last command sent to the system.
+        self.last_command: float = 0.0
+
+        # Whether state changes are pushed to us, which makes polling a
+        # mere consistency check.
+        self.push_connected = False
+
+        self.update_stats = UpdateStats()
+        self._update_flight = SingleFlight()
+
+        # Changes found by the last refresh or command, and a running count
+        # of all changes seen so far.
+        self.last_changes: list[DeviceChange] = []
+        self.change_count = 0
+        self._listeners = ListenerRegistry()
+
+        # Device attributes set optimistically by commands, and the time
+        # the request returning the data being parsed was sent, if that
+        # data comes from a refresh.
+        self._pending: dict[tuple[str, str], PendingChange] = {}
+        self._data_sent_at: float | None = None
+        self.pending_timeout: float = PENDING_CHANGE_TIMEOUT
+
+        # Devices restored from a cache that no refresh has returned yet.
+        self._restored: set[str] = set()
+
     @classmethod
     def __init_subclass__(cls) -> None:
         super().__init_subclass__()
@@ -64,3 +149,216 @@ class AqualinkSystem:
 
     async def update(self) -> None:
         raise NotImplementedError
+
+    def add_listener(
+        self, callback: Callable[[list[DeviceChange]], Any], weak: bool = True
+    ) -> Callable[[], None]:
+        """Call `callback` with all device changes after each refresh.
+
+        The callback may be a coroutine function, in which case it runs in
+        the background. Callbacks are weakly referenced unless `weak` is
+        False. Returns a function that removes the listener.
+        """
+        return self._listeners.add(callback, weak)
+
+    def subscribe(
+        self, callback: Callable[[list[DeviceChange]], Any]
+    ) -> Callable[[], None]:
+        """Call `callback` with the device changes after each refresh.
+
+        The callback is only called when something changed. Returns a
+        function that cancels the subscription.
+        """
+        return self.add_listener(callback, weak=False)
+
+    @contextlib.asynccontextmanager
+    async def _optimistic(
+        self, device: AqualinkDevice, attribute: str, value: Any
+    ) -> AsyncIterator[None]:
+        """Show `value` for a device attribute while a command sets it.
+
+        The value is set right away and kept until a refresh started after
+        the command completed, which then has the final say. It's reverted
+        if the command fails. If no refresh settles it within
+        `pending_timeout` seconds, the value last reported is restored.
+        """
+        name = device.name
+        key = (name, attribute)
+        device_data = device.data
+        old = device_data.get(attribute)
+        pending = self._pending[key] = PendingChange(value, old)
+        device_data[attribute] = value
+        self._notify_changes([DeviceChange(name, attribute, old, value)])
+
+        try:
+            yield
+        except Exception:
+            if self._pending.get(key) is pending:
+                del self._pending[key]
+                current = device_data.get(attribute)
+                if current == value:
+                    device_data[attribute] = old
+                    change = DeviceChange(name, attribute, current, old)
+                    self._notify_changes([change])
+            raise
+        finally:
+            pending.completed = time.monotonic()
+
+    @contextlib.contextmanager
+    def _refresh_data(self, sent_at: float) -> Iterator[None]:
+        """Parse data from a refresh whose requests were sent at `sent_at`."""
+        self._data_sent_at = sent_at
+        try:
+            yield
+        finally:
+            self._data_sent_at = None
+            self._expire_pending()
+
+    def _expire_pending(self) -> None:
+        # Refreshes that don't report an attribute, or that keep reporting
+        # another value, would never settle it.
+        now = time.monotonic()
+        changes = []
+        for key, pending in list(self._pending.items()):
+            completed = pending.completed
+            if completed is None or now - completed < self.pending_timeout:
+                continue
+
+            LOGGER.debug("%s %s wasn't confirmed in time.", *key)
+            del self._pending[key]
+            name, attribute = key
+            device = self.devices.get(name)
+            if pending.reported is _MISSING or device is None:
+                continue
+            current = device.data.get(attribute)
+            if current == pending.value != pending.reported:
+                device.data[attribute] = pending.reported
+                changes.append(
+                    DeviceChange(name, attribute, current, pending.reported)
+                )
+
+        if changes:
+            self._notify_changes(changes)
+
+    def _settles(
+        self, key: tuple[str, str], pending: PendingChange, value: Any
+    ) -> bool:
+        """Whether `value`, from the data being parsed, settles `pending`.
+
+        Only data from a refresh sent after the command completed does.
+        """
+        sent_at = self._data_sent_at
+        return (
+            pending.completed is not None
+            and sent_at is not None
+            and sent_at >= pending.completed
+        )
+
+    def _reconcile(self, name: str, data: dict[str, Any]) -> None:
+        for k, value in data.items():
+            key = (name, k)
+            pending = self._pending.get(key)
+            if pending is None:
+                continue
+
+            if not self._settles(key, pending, value):
+                # Data predating the command or not confirming it yet, keep
+                # the local value.
+                pending.reported = value
+                data[k] = pending.value
+            else:
+                del self._pending[key]
+                if value != pending.value:
+                    LOGGER.debug(
+                        "%s %s is %r after setting it to %r.",
+                        name,
+                        k,
+                        value,
+                        pending.value,
+                    )
+
+    def _merge_device_data(
+        self, name: str, data: dict[str, Any]
+    ) -> list[DeviceChange]:
+        if self._pending:
+            self._reconcile(name, data)
+        self._restored.discard(name)
+
+        device_data = self.devices[name].data
+        changes = []
+        for k, v in data.items():
+            old = device_data.get(k)
+            if old != v or k not in device_data:
+                device_data[k] = v
+                changes.append(DeviceChange(name, k, old, v))
+        return changes
+
+    def _sample_payload(self, kind: str, data: dict[str, Any]) -> None:
+        sampler = self.aqualink.payload_sampler
+        if sampler is not None:
+            sampler.record(self.serial, kind, data)
+
+    def _added_device_changes(self, name: str) -> list[DeviceChange]:
+        return [
+            DeviceChange(name, k, None, v)
+            for k, v in self.devices[name].data.items()
+        ]
+
+    def _drop_restored_devices(self) -> list[DeviceChange]:
+        """Remove restored devices that the last refresh didn't return."""
+        changes = []
+        for name in self._restored:
+            device = self.devices.pop(name, None)
+            if device is None:
+                continue
+            LOGGER.debug("%s is gone from %s.", name, self.serial)
+            changes += [
+                DeviceChange(name, k, v, None) for k, v in device.data.items()
+            ]
+        self._restored.clear()
+        return changes
+
+    def _notify_changes(self, changes: Iterable[DeviceChange]) -> None:
+        # Several parsers may touch the same attribute during one refresh.
+        # Only keep the first old and last new values, and drop attributes
+        # that ended up where they started.
+        merged: dict[tuple[str, str], DeviceChange] = {}
+        for change in changes:
+            key = (change.device, change.attribute)
+            if key in merged:
+                change = change._replace(old=merged[key].old)
+            merged[key] = change
+        self.last_changes = [x for x in merged.values() if x.old != x.new]
+
+        if not self.last_changes:
+            return
+
+        self.change_count += len(self.last_changes)
+
+        # Fan out once per refresh: each device's listeners get all of that
+        # device's changes in one call, then system listeners get everything.
+        by_device: dict[str, list[DeviceChange]] = {}
+        for change in self.last_changes:
+            by_device.setdefault(change.device, []).append(change)
+
+        coros: list[Coroutine[Any, Any, None]] = []
+        for name, device_changes in by_device.items():
+            device = self.devices.get(name)
+            if device is not None:
+                coros += device._listeners.notify(device_changes)
+        coros += self._listeners.notify(self.last_changes)
+        schedule(coros)
+
+    async def _single_flight(
+        self, refresh: Callable[[], Awaitable[None]]
+    ) -> None:
+        """Run `refresh`, or wait for the run already in progress.
+
+        Callers arriving while a refresh is in flight all share its outcome,
+        including any exception, instead of each hitting the API.
+        """
+        self.update_stats.calls += 1
+
+        if self._update_flight.in_flight:
+            self.update_stats.coalesced += 1
+        await self._update_flight.run(refresh)
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from iaqualink.state import deep_merge
+
+if TYPE_CHECKING:
+    import httpx
+
+    from iaqualink.systems.exo.system import ExoSystem
+
+LOGGER = logging.getLogger("iaqualink")
+
+
+@dataclass
+class DesiredStateStats:
+    # Desired state fragments submitted to the queue.
+    submitted: int = 0
+    # Desired state documents actually posted.
+    sent: int = 0
+
+    @property
+    def saved(self) -> int:
+        """Round trips saved by merging fragments."""
+        return self.submitted - self.sent
+
+
+class ExoDesiredStateQueue:
+    """Merges the desired state changes sent to a system.
+
+    Fragments submitted within `window` seconds of each other, or while the
+    previous document is being posted, are deep-merged into a single desired
+    state document, later fragments overriding earlier ones. Every caller
+    gets the response to that single request.
+
+    With the default window of 0, only fragments submitted concurrently,
+    e.g. with asyncio.gather(), end up in the same document.
+    """
+
+    def __init__(self, system: ExoSystem, window: float = 0.0):
+        self.system = system
+        self.window = window
+        self.stats = DesiredStateStats()
+
+        self._state: dict[str, Any] = {}
+        self._futures: list[asyncio.Future[httpx.Response]] = []
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    async def submit(self, fragment: dict[str, Any]) -> httpx.Response:
+        """Queue `fragment`, return the response to the request sending it."""
+        future = asyncio.get_running_loop().create_future()
+        self.stats.submitted += 1
+
+        deep_merge(self._state, fragment)
+        self._futures.append(future)
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_later())
+
+        return await future
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        async with self._lock:
+            # Fragments submitted from now on go to the next document.
+            self._task = None
+            state, self._state = self._state, {}
+            futures, self._futures = self._futures, []
+            await self._send(state, futures)
+
+    async def _send(
+        self,
+        state: dict[str, Any],
+        futures: list[asyncio.Future[httpx.Response]],
+    ) -> None:
+        self.stats.sent += 1
+        LOGGER.debug(
+            "Sending %s desired state changes to %s: %s",
+            len(futures),
+            self.system.serial,
+            state,
+        )
+
+        try:
+            r = await self.system.send_desired_state_request(state)
+        except Exception as e:  # noqa: BLE001
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except BaseException:
+            # Cancelled, callers mustn't wait forever.
+            for future in futures:
+                future.cancel()
+            raise
+
+        for future in futures:
+            if not future.done():
+                future.set_result(r)
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import logging
 from enum import Enum, unique
-from typing import TYPE_CHECKING, Any, cast
+from typing import TYPE_CHECKING, Any, ClassVar, cast
 
 from iaqualink.device import (
     AqualinkDevice,
@@ -11,6 +11,8 @@ from iaqualink.device import (
     AqualinkThermostat,
 )
 from iaqualink.exception import AqualinkInvalidParameterException
+from iaqualink.registry import DeviceRegistry
+from iaqualink.state import parsed_property
 
 if TYPE_CHECKING:
     from collections.abc import Callable, Coroutine
@@ -31,13 +33,19 @@ class ExoState(Enum):
 
 
 class ExoDevice(AqualinkDevice):
+    # Picks the class of new devices, see the rules at the end of the module.
+    registry: ClassVar[DeviceRegistry[ExoDevice]] = DeviceRegistry()
+
     def __init__(self, system: ExoSystem, data: DeviceData):
         super().__init__(system, data)
 
         # This silences mypy errors due to AqualinkDevice type annotations.
         self.system: ExoSystem = system
 
-    @property
+        # Reported timestamp of each attribute, from the shadow metadata.
+        self.updated_at: dict[str, int] = {}
+
+    @parsed_property
     def label(self) -> str:
         name = self.name
         return " ".join([x.capitalize() for x in name.split("_")])
@@ -60,42 +68,27 @@ class ExoDevice(AqualinkDevice):
 
     @classmethod
     def from_data(cls, system: ExoSystem, data: DeviceData) -> ExoDevice:
-        class_: type[ExoDevice]
-
-        if data["name"].startswith("aux_"):
-            class_ = ExoAuxSwitch
-        elif data["name"].startswith("sns_"):
-            class_ = ExoSensor
-        elif data["name"] == "heating":
-            class_ = ExoThermostat
-        elif data["name"] == "heater":
-            class_ = ExoHeater
-        elif data["name"] in ["production", "boost", "low"]:
-            class_ = ExoAttributeSwitch
-        else:
-            class_ = ExoAttributeSensor
-
-        return class_(system, data)
+        return cls.registry.classify(data)(system, data)
 
 
 class ExoSensor(ExoDevice, AqualinkSensor):
     """These sensors are called sns_#."""
 
-    @property
+    @parsed_property
     def is_on(self) -> bool:
         return ExoState(self.data["state"]) == ExoState.ON
 
-    @property
+    @parsed_property
     def state(self) -> str:
         if self.is_on:
             return str(self.data["value"])
         return ""
 
-    @property
+    @parsed_property
     def label(self) -> str:
         return self.data["sensor_type"]
 
-    @property
+    @parsed_property
     def name(self) -> str:
         # XXX: We're using the label as name rather than "sns_#".
         # Might revisit later.
@@ -108,11 +101,11 @@ class ExoAttributeSensor(ExoDevice, AqualinkSensor):
 
 # This is an abstract class, not to be instantiated directly.
 class ExoSwitch(ExoDevice, AqualinkSwitch):
-    @property
+    @parsed_property
     def label(self) -> str:
         return self.name.replace("_", " ").capitalize()
 
-    @property
+    @parsed_property
     def is_on(self) -> bool:
         return ExoState(self.data["state"]) == ExoState.ON
 
@@ -170,11 +163,11 @@ class ExoThermostat(ExoSwitch, AqualinkThermostat):
     def target_temperature(self) -> str:
         return str(self.data["sp"])
 
-    @property
+    @parsed_property
     def min_temperature(self) -> int:
         return int(self.data["sp_min"])
 
-    @property
+    @parsed_property
     def max_temperature(self) -> int:
         return int(self.data["sp_max"])
 
@@ -190,7 +183,7 @@ class ExoThermostat(ExoSwitch, AqualinkThermostat):
 
         await self.system.set_heating("sp", temperature)
 
-    @property
+    @parsed_property
     def is_on(self) -> bool:
         return ExoState(self.data["enabled"]) == ExoState.ON
 
@@ -201,3 +194,11 @@ class ExoThermostat(ExoSwitch, AqualinkThermostat):
     async def turn_off(self) -> None:
         if self.is_on is True:
             await self.system.set_heating("enabled", 0)
+
+
+ExoDevice.registry.add(ExoAuxSwitch, prefixes=["aux_"])
+ExoDevice.registry.add(ExoSensor, prefixes=["sns_"])
+ExoDevice.registry.add(ExoThermostat, names=["heating"])
+ExoDevice.registry.add(ExoHeater, names=["heater"])
+ExoDevice.registry.add(ExoAttributeSwitch, names=["production", "boost", "low"])
+ExoDevice.registry.default = ExoAttributeSensor
@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import ssl
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, NamedTuple, Protocol, Self
+
+import httpx
+
+from iaqualink.const import PUSH_RECONNECT_DELAY
+from iaqualink.exception import AqualinkInvalidParameterException
+from iaqualink.json_backend import loads
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable
+    from types import TracebackType
+
+    from iaqualink.client import AqualinkClient
+    from iaqualink.systems.exo.system import ExoSystem
+
+LOGGER = logging.getLogger("iaqualink")
+
+# Published with the full shadow document after every change.
+SHADOW_DOCUMENTS_TOPIC = "$aws/things/{serial}/shadow/update/documents"
+
+
+class ShadowMessage(NamedTuple):
+    topic: str
+    payload: bytes
+
+
+class ShadowTransport(Protocol):
+    """Connection to a broker publishing shadow documents."""
+
+    async def connect(self, headers: dict[str, str]) -> None: ...
+
+    async def subscribe(self, topic: str) -> None: ...
+
+    async def unsubscribe(self, topic: str) -> None: ...
+
+    def messages(self) -> AsyncIterator[ShadowMessage]:
+        """Received messages, until the connection is lost or closed."""
+        ...
+
+    async def close(self) -> None: ...
+
+
+class MqttShadowTransport:
+    """MQTT over WebSocket, using the optional aiomqtt dependency.
+
+    `url` is the broker's, e.g. wss://broker.example.com/mqtt. Connections
+    use the headers given by `ExoShadowPush`, with the client's IdToken.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        keepalive: int = 60,
+        tls_context: ssl.SSLContext | None = None,
+    ):
+        try:
+            import aiomqtt  # noqa: F401
+        except ImportError as e:
+            m = "aiomqtt is required for push updates: pip install aiomqtt"
+            raise AqualinkInvalidParameterException(m) from e
+
+        self.url = httpx.URL(url)
+        if self.url.scheme not in ("ws", "wss"):
+            m = f"Unsupported broker URL: {url}"
+            raise AqualinkInvalidParameterException(m)
+
+        self.keepalive = keepalive
+        self.tls_context = tls_context
+        self._client: Any = None
+        self._stack: contextlib.AsyncExitStack | None = None
+
+    async def connect(self, headers: dict[str, str]) -> None:
+        import aiomqtt
+
+        secure = self.url.scheme == "wss"
+        tls_context = self.tls_context
+        if secure and tls_context is None:
+            tls_context = ssl.create_default_context()
+
+        client = aiomqtt.Client(
+            self.url.host,
+            self.url.port or (443 if secure else 80),
+            transport="websockets",
+            websocket_path=self.url.raw_path.decode(),
+            websocket_headers=headers,
+            tls_context=tls_context,
+            keepalive=self.keepalive,
+        )
+        async with contextlib.AsyncExitStack() as stack:
+            await stack.enter_async_context(client)
+            self._stack = stack.pop_all()
+        self._client = client
+
+    async def subscribe(self, topic: str) -> None:
+        await self._client.subscribe(topic)
+
+    async def unsubscribe(self, topic: str) -> None:
+        await self._client.unsubscribe(topic)
+
+    async def messages(self) -> AsyncIterator[ShadowMessage]:
+        async for message in self._client.messages:
+            yield ShadowMessage(message.topic.value, bytes(message.payload))
+
+    async def close(self) -> None:
+        stack, self._stack = self._stack, None
+        self._client = None
+        if stack is not None:
+            await stack.aclose()
+
+
+class MemoryBroker:
+    """In-memory stand-in for the broker, for tests and the simulator."""
+
+    def __init__(self) -> None:
+        self.transports: list[MemoryShadowTransport] = []
+
+    def transport(self) -> MemoryShadowTransport:
+        return MemoryShadowTransport(self)
+
+    def publish(self, topic: str, payload: bytes) -> None:
+        for transport in self.transports:
+            if topic in transport.topics:
+                transport.queue.put_nowait(ShadowMessage(topic, payload))
+
+    def disconnect(self) -> None:
+        """Drop every connection, as if the broker went away."""
+        for transport in list(self.transports):
+            transport.queue.put_nowait(ConnectionError("Disconnected"))
+            self.transports.remove(transport)
+
+
+class MemoryShadowTransport:
+    def __init__(self, broker: MemoryBroker):
+        self.broker = broker
+        self.headers: dict[str, str] = {}
+        self.topics: set[str] = set()
+        self.queue: asyncio.Queue[ShadowMessage | Exception | None] = (
+            asyncio.Queue()
+        )
+
+    async def connect(self, headers: dict[str, str]) -> None:
+        self.headers = headers
+        self.topics = set()
+        self.queue = asyncio.Queue()
+        self.broker.transports.append(self)
+
+    async def subscribe(self, topic: str) -> None:
+        self.topics.add(topic)
+
+    async def unsubscribe(self, topic: str) -> None:
+        self.topics.discard(topic)
+
+    async def messages(self) -> AsyncIterator[ShadowMessage]:
+        while True:
+            message = await self.queue.get()
+            if message is None:
+                return
+            if isinstance(message, Exception):
+                raise message
+            yield message
+
+    async def close(self) -> None:
+        if self in self.broker.transports:
+            self.broker.transports.remove(self)
+        self.queue.put_nowait(None)
+
+
+@dataclass
+class PushStats:
+    # Messages received.
+    messages: int = 0
+    # Shadow documents parsed.
+    applied: int = 0
+    # Messages for unknown systems, or older than the current state.
+    ignored: int = 0
+    # Messages that couldn't be parsed.
+    errors: int = 0
+    # Connections made, including reconnections.
+    connections: int = 0
+
+
+class ExoShadowPush:
+    """Applies shadow documents pushed by a broker to Exo systems.
+
+    Shadow documents are parsed like polled ones, and listeners notified the
+    same way. While connected, systems have `push_connected` set, which
+    makes `AqualinkPollScheduler` poll them at its slowest rate, as a mere
+    consistency check. Lost connections are retried every
+    `reconnect_delay` seconds.
+
+    push = ExoShadowPush(client, MqttShadowTransport(url))
+    push.add(system)
+    await push.start()
+    """
+
+    def __init__(
+        self,
+        aqualink: AqualinkClient,
+        transport: ShadowTransport,
+        *,
+        reconnect_delay: float = PUSH_RECONNECT_DELAY,
+    ):
+        self.aqualink = aqualink
+        self.transport = transport
+        self.reconnect_delay = reconnect_delay
+        self.stats = PushStats()
+
+        self._systems: dict[str, ExoSystem] = {}
+        self._connected = False
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    def add(self, system: ExoSystem) -> Callable[[], None]:
+        """Apply the shadow documents of `system`.
+
+        Returns a function that stops doing so.
+        """
+        serial = system.serial
+        topic = SHADOW_DOCUMENTS_TOPIC.format(serial=serial)
+        self._systems[serial] = system
+        if self._connected:
+            system.push_connected = True
+            self._background(self.transport.subscribe(topic))
+
+        def remove() -> None:
+            if self._systems.get(serial) is not system:
+                return
+            self._systems.pop(serial).push_connected = False
+            if self._connected:
+                self._background(self.transport.unsubscribe(topic))
+
+        return remove
+
+    def _background(self, coro: Any) -> None:
+        task = asyncio.ensure_future(coro)
+        task.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(task: asyncio.Future[Any]) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            LOGGER.warning("Push subscription failed: %r", task.exception())
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def __aenter__(self) -> Self:
+        await self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        await self.stop()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._connect_and_listen()
+            except Exception as e:  # noqa: BLE001
+                LOGGER.warning(
+                    "Push connection lost, retrying in %ss: %r",
+                    self.reconnect_delay,
+                    e,
+                )
+            finally:
+                self._set_connected(False)
+                with contextlib.suppress(Exception):
+                    await self.transport.close()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _connect_and_listen(self) -> None:
+        await self.aqualink.tokens.ensure_valid()
+        headers = {"Authorization": self.aqualink.id_token}
+        await self.transport.connect(headers)
+        self.stats.connections += 1
+
+        for serial in list(self._systems):
+            topic = SHADOW_DOCUMENTS_TOPIC.format(serial=serial)
+            await self.transport.subscribe(topic)
+        self._set_connected(True)
+
+        async for message in self.transport.messages():
+            self._handle(message)
+
+    def _set_connected(self, connected: bool) -> None:
+        self._connected = connected
+        for system in self._systems.values():
+            system.push_connected = connected
+
+    def _handle(self, message: ShadowMessage) -> None:
+        self.stats.messages += 1
+
+        serial = message.topic.split("/")[2]
+        system = self._systems.get(serial)
+        if system is None:
+            self.stats.ignored += 1
+            return
+
+        try:
+            document = loads(message.payload)
+            data = {"timestamp": document.get("timestamp")}
+            data |= document["current"]
+            applied = system._apply_shadow_data(data, time.monotonic())
+        except Exception:
+            self.stats.errors += 1
+            LOGGER.exception("Invalid shadow document for %s", serial)
+            return
+
+        if applied:
+            self.stats.applied += 1
+        else:
+            self.stats.ignored += 1
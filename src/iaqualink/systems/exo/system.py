@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import copy
 import logging
 import time
-from typing import TYPE_CHECKING, Any
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, cast
 
 from iaqualink.const import MIN_SECS_TO_REFRESH
 from iaqualink.exception import (
@@ -10,13 +12,17 @@ from iaqualink.exception import (
     AqualinkServiceUnauthorizedException,
     AqualinkSystemOfflineException,
 )
+from iaqualink.json_backend import decode_response
+from iaqualink.ratelimit import Priority
 from iaqualink.system import AqualinkSystem
+from iaqualink.systems.exo.commands import ExoDesiredStateQueue
 from iaqualink.systems.exo.device import ExoDevice
 
 if TYPE_CHECKING:
     import httpx
 
     from iaqualink.client import AqualinkClient
+    from iaqualink.system import DeviceChange, PendingChange
     from iaqualink.typing import Payload
 
 EXO_DEVICES_URL = "https://prod.zodiac-io.com/devices/v1"
@@ -25,6 +31,39 @@ EXO_DEVICES_URL = "https://prod.zodiac-io.com/devices/v1"
 LOGGER = logging.getLogger("iaqualink")
 
 
+@dataclass
+class ShadowStats:
+    # Shadows parsed.
+    parsed: int = 0
+    # Shadows skipped because their version wasn't newer.
+    unchanged: int = 0
+    # Devices skipped in parsed shadows because their subtree didn't change.
+    devices_unchanged: int = 0
+    # Attributes skipped because their metadata timestamp didn't advance.
+    attributes_unchanged: int = 0
+
+
+def _timestamp(metadata: Any) -> int | None:
+    # Metadata mirrors the reported state, with a timestamp for each value.
+    if not isinstance(metadata, dict):
+        return None
+    stamp = metadata.get("timestamp")
+    if isinstance(stamp, int):
+        return stamp
+    stamps = [_timestamp(x) for x in metadata.values()]
+    return max((x for x in stamps if x is not None), default=None)
+
+
+def _attribute_timestamps(metadata: dict[str, Any] | None) -> dict[str, int]:
+    """Return the latest timestamp of each attribute in `metadata`."""
+    stamps = {}
+    for k, v in (metadata or {}).items():
+        stamp = _timestamp(v)
+        if stamp is not None:
+            stamps[k] = stamp
+    return stamps
+
+
 class ExoSystem(AqualinkSystem):
     NAME = "exo"
 
@@ -34,6 +73,20 @@ class ExoSystem(AqualinkSystem):
         self.last_refresh: int = 0
         self.temp_unit = "C"  # TODO: check if unit can be changed on panel?
 
+        # Version and timestamp of the newest shadow parsed. Shadows that
+        # aren't newer, e.g. polled before a pushed one arrived, aren't
+        # parsed, and subtrees that are the same as in the last shadow are
+        # skipped.
+        self.shadow_version: int | None = None
+        self.shadow_timestamp: int | None = None
+        self.shadow_stats = ShadowStats()
+        self._reported_swc: dict[str, Any] = {}
+        self._reported_heating: dict[str, Any] | None = None
+
+        # Desired state changes sent concurrently are merged, see
+        # ExoDesiredStateQueue.
+        self.commands = ExoDesiredStateQueue(self)
+
     def __repr__(self) -> str:
         attrs = ["name", "serial", "data"]
         attrs = [f"{i}={getattr(self, i)!r}" for i in attrs]
@@ -41,36 +94,48 @@ class ExoSystem(AqualinkSystem):
 
     async def send_devices_request(self, **kwargs: Any) -> httpx.Response:
         url = f"{EXO_DEVICES_URL}/{self.serial}/shadow"
+
+        # Refresh the token ahead of time rather than waiting for a 401.
+        tokens = self.aqualink.tokens
+        await tokens.ensure_valid()
+        generation = tokens.generation
         headers = {"Authorization": self.aqualink.id_token}
 
         try:
             r = await self.aqualink.send_request(url, headers=headers, **kwargs)
         except AqualinkServiceUnauthorizedException:
-            # token expired so refresh the token and try again
-            await self.aqualink.login()
+            # token expired so refresh the token and try again, unless
+            # another request already did it in the meantime.
+            await tokens.refresh_if_stale(generation)
             headers = {"Authorization": self.aqualink.id_token}
             r = await self.aqualink.send_request(url, headers=headers, **kwargs)
 
         return r
 
     async def send_reported_state_request(self) -> httpx.Response:
-        return await self.send_devices_request()
+        return await self.send_devices_request(priority=Priority.POLL)
 
     async def send_desired_state_request(
         self, state: dict[str, Any]
     ) -> httpx.Response:
+        self.last_command = time.monotonic()
         return await self.send_devices_request(
             method="post", json={"state": {"desired": state}}
         )
 
     async def update(self) -> None:
+        await self._single_flight(self._update)
+
+    async def _update(self) -> None:
         # Be nice to Aqualink servers since we rely on polling.
         now = int(time.time())
         delta = now - self.last_refresh
         if delta < MIN_SECS_TO_REFRESH:
-            LOGGER.debug(f"Only {delta}s since last refresh.")
+            LOGGER.debug("Only %ss since last refresh.", delta)
+            self.update_stats.throttled += 1
             return
 
+        sent_at = time.monotonic()
         try:
             r = await self.send_reported_state_request()
         except AqualinkServiceException:
@@ -78,31 +143,67 @@ class ExoSystem(AqualinkSystem):
             raise
 
         try:
-            self._parse_shadow_response(r)
+            with self._refresh_data(sent_at):
+                changes = self._parse_shadow_response(r)
         except AqualinkSystemOfflineException:
             self.online = False
             raise
 
         self.online = True
         self.last_refresh = int(time.time())
+        if self._restored:
+            changes += self._drop_restored_devices()
+        self._notify_changes(changes)
+
+    def _parse_shadow_response(
+        self, response: httpx.Response
+    ) -> list[DeviceChange]:
+        return self._parse_shadow_data(decode_response(response))
 
-    def _parse_shadow_response(self, response: httpx.Response) -> None:
-        data = response.json()
+    def _parse_shadow_data(self, data: dict[str, Any]) -> list[DeviceChange]:
 
-        LOGGER.debug(f"Shadow response: {data}")
+        LOGGER.debug("Shadow response: %s", data)
+        self._sample_payload("shadow", data)
+
+        version = data.get("version")
+        if self._is_stale(version):
+            self.shadow_stats.unchanged += 1
+            return []
+        # Values set optimistically must be reconciled with the full state.
+        full = bool(self._pending)
+        self.shadow_stats.parsed += 1
+        if full:
+            self._reported_swc, self._reported_heating = {}, None
 
         devices = {}
+        # Reported timestamp of each device attribute, from the metadata.
+        stamps: dict[str, dict[str, int]] = {}
+
+        reported = data["state"]["reported"]
+        metadata = data.get("metadata", {}).get("reported", {})
 
         # Process the chlorinator attributes[equipmen]
         # Make the data a bit flatter.
-        root = data["state"]["reported"]["equipment"]["swc_0"]
+        root = reported["equipment"]["swc_0"]
+        root_metadata = metadata.get("equipment", {}).get("swc_0", {})
+        previous = self._reported_swc
         for name, state in root.items():
-            attrs = {"name": name}
+            meta = root_metadata.get(name)
+            if meta is not None:
+                # Timestamps tell what changed, no need to compare values.
+                previous.pop(name, None)
+            elif name in previous and previous[name] == state:
+                self.shadow_stats.devices_unchanged += 1
+                continue
+            else:
+                previous[name] = copy.deepcopy(state)
+
             if isinstance(state, dict):
-                attrs.update(state)
+                devices[name] = {"name": name, **state}
+                stamps[name] = _attribute_timestamps(meta)
             else:
-                attrs.update({"state": state})
-            devices.update({name: attrs})
+                devices[name] = {"name": name, "state": state}
+                stamps[name] = _attribute_timestamps({"state": meta})
 
         # Remove those values, they're not handled properly.
         devices.pop("boost_time", None)
@@ -112,40 +213,141 @@ class ExoSystem(AqualinkSystem):
         devices.pop("version", None)
 
         # Process the heating control attributes
-        if "heating" in data["state"]["reported"]:
-            name = "heating"
-            attrs = {"name": name}
-            attrs.update(data["state"]["reported"]["heating"])
-            devices.update({name: attrs})
+        heating = reported.get("heating")
+        meta = metadata.get("heating")
+        if heating is not None and (
+            meta is not None or heating != self._reported_heating
+        ):
+            self._reported_heating = None
+            if meta is None:
+                self._reported_heating = copy.deepcopy(heating)
+            devices["heating"] = {"name": "heating", **heating}
             # extract heater state into seperate device to maintain homeassistant API
-            name = "heater"
-            attrs = {"name": name}
-            attrs.update(
-                {"state": data["state"]["reported"]["heating"]["state"]}
+            devices["heater"] = {"name": "heater", "state": heating["state"]}
+            stamps["heating"] = _attribute_timestamps(meta)
+            stamps["heater"] = _attribute_timestamps(
+                {"state": (meta or {}).get("state")}
             )
-            devices.update({name: attrs})
 
-        LOGGER.debug(f"devices: {devices}")
+        LOGGER.debug("devices: %s", devices)
 
+        changes = []
         for k, v in devices.items():
-            if k in self.devices:
-                for dk, dv in v.items():
-                    self.devices[k].data[dk] = dv
+            device = cast("ExoDevice | None", self.devices.get(k))
+            if device is None:
+                device = ExoDevice.from_data(self, v)
+                self.devices[k] = device
+                device.updated_at.update(stamps.get(k, {}))
+                changes += self._added_device_changes(k)
+                continue
+
+            if stamps.get(k) and not full:
+                v = self._fresh_attributes(device, v, stamps[k])
+                if len(v) == 1:
+                    self.shadow_stats.devices_unchanged += 1
+                    continue
+            # Before merging, pending values are settled using the new
+            # timestamps.
+            device.updated_at.update(stamps.get(k, {}))
+            changes += self._merge_device_data(k, v)
+
+        # An older shadow parsed for reconciliation doesn't go back in time.
+        last = self.shadow_version
+        if version is None or last is None or version >= last:
+            self.shadow_version = version
+            self.shadow_timestamp = data.get("timestamp", data.get("ts"))
+        return changes
+
+    def _is_stale(self, version: int | None) -> bool:
+        """Whether a shadow with `version` isn't newer than the last one.
+
+        Shadows are never stale while optimistic values wait to be
+        reconciled with the full state.
+        """
+        if version is None or self.shadow_version is None or self._pending:
+            return False
+        return version <= self.shadow_version
+
+    def _settles(
+        self, key: tuple[str, str], pending: PendingChange, value: Any
+    ) -> bool:
+        # The shadow published for a desired state update still reports the
+        # old value, the device applies it later. Only the desired value, or
+        # one the device reported after the update, settles it.
+        if not super()._settles(key, pending, value):
+            return False
+        if value == pending.value:
+            return True
+        name, attribute = key
+        device = cast("ExoDevice | None", self.devices.get(name))
+        stamp = None if device is None else device.updated_at.get(attribute)
+        return stamp is not None and stamp > pending.issued
+
+    def _fresh_attributes(
+        self, device: ExoDevice, data: dict[str, Any], stamps: dict[str, int]
+    ) -> dict[str, Any]:
+        # Timestamps only have a 1s resolution. Attributes reported during
+        # the second the last shadow was taken may have changed after it.
+        since = self.shadow_timestamp
+        updated_at = device.updated_at
+        fresh = {}
+        for k, v in data.items():
+            stamp = stamps.get(k)
+            if (
+                stamp is None
+                or k not in updated_at
+                or stamp > updated_at[k]
+                or (since is not None and stamp >= since)
+            ):
+                fresh[k] = v
             else:
-                self.devices[k] = ExoDevice.from_data(self, v)
+                self.shadow_stats.attributes_unchanged += 1
+        return fresh
+
+    def _apply_shadow_data(
+        self, data: dict[str, Any], received_at: float
+    ) -> bool:
+        """Apply a shadow pushed at `received_at`, see ExoShadowPush.
+
+        Returns False if the shadow isn't newer than the last one parsed.
+        """
+        if self._is_stale(data.get("version")):
+            return False
+
+        with self._refresh_data(received_at):
+            changes = self._parse_shadow_data(data)
+
+        self.online = True
+        self.last_refresh = int(time.time())
+        if self._restored:
+            changes += self._drop_restored_devices()
+        self._notify_changes(changes)
+        return True
 
     async def set_heating(self, name: str, state: int) -> None:
-        r = await self.send_desired_state_request({"heating": {name: state}})
-        r.raise_for_status()
+        await self._set_desired(
+            "heating", name, state, {"heating": {name: state}}
+        )
 
     async def set_aux(self, aux: str, state: int) -> None:
-        r = await self.send_desired_state_request(
-            {"equipment": {"swc_0": {aux: {"state": state}}}}
-        )
-        r.raise_for_status()
+        fragment = {"equipment": {"swc_0": {aux: {"state": state}}}}
+        await self._set_desired(aux, "state", state, fragment)
 
     async def set_toggle(self, name: str, state: int) -> None:
-        r = await self.send_desired_state_request(
-            {"equipment": {"swc_0": {name: state}}}
-        )
-        r.raise_for_status()
+        fragment = {"equipment": {"swc_0": {name: state}}}
+        await self._set_desired(name, "state", state, fragment)
+
+    async def _set_desired(
+        self, name: str, attribute: str, value: int, fragment: dict[str, Any]
+    ) -> None:
+        # The response only echoes the desired state, the device applies it
+        # later. Show it locally until a refresh reports it.
+        device = self.devices.get(name)
+        if device is None:
+            r = await self.commands.submit(fragment)
+            r.raise_for_status()
+            return
+
+        async with self._optimistic(device, attribute, value):
+            r = await self.commands.submit(fragment)
+            r.raise_for_status()
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Hashable
+
+    import httpx
+
+    from iaqualink.system import DeviceChange
+    from iaqualink.systems.iaqua.system import IaquaSystem
+    from iaqualink.typing import Payload
+
+LOGGER = logging.getLogger("iaqualink")
+
+
+@dataclass
+class IaquaCommand:
+    command: str
+    params: Payload
+    # Device the command applies to. Commands to the same device are sent
+    # one after the other, commands to different devices concurrently.
+    device: str
+    # Queued commands with the same key are merged into one, later params
+    # overriding earlier ones. None for commands that can't be merged, e.g.
+    # toggles.
+    key: Hashable | None = None
+    # Screen sent back in response: home, devices, or None if it varies.
+    screen: str | None = None
+    # Turns the merged params into the request params when sending.
+    prepare: Callable[[Payload], Payload] | None = None
+    futures: list[asyncio.Future[None]] = field(default_factory=list)
+
+
+@dataclass
+class CommandQueueStats:
+    # Commands submitted to the queue.
+    submitted: int = 0
+    # Commands merged into another queued command.
+    coalesced: int = 0
+    # Commands actually sent.
+    sent: int = 0
+    batches: int = 0
+    # Responses parsed, at most one per screen and batch.
+    parsed: int = 0
+
+
+class IaquaCommandQueue:
+    """Batches the commands sent to a system.
+
+    Commands submitted within `window` seconds of each other, or while the
+    previous batch is in flight, are sent together: commands to different
+    devices concurrently, and those that set the same value (e.g. the
+    brightness of a light) merged into one, the last one winning. Every
+    command gets a screen back, only the one of each kind returned to the
+    command sent last is parsed: a screen received later, in response to a
+    command sent earlier on another lane, may predate that last command.
+
+    With the default window of 0, only commands submitted concurrently, e.g.
+    with asyncio.gather(), end up in the same batch.
+    """
+
+    def __init__(self, system: IaquaSystem, window: float = 0.0):
+        self.system = system
+        self.window = window
+        self.stats = CommandQueueStats()
+
+        self._pending: list[IaquaCommand] = []
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task[None] | None = None
+
+    async def submit(self, command: IaquaCommand) -> None:
+        """Queue `command`, return once it was sent and its result parsed."""
+        future = asyncio.get_running_loop().create_future()
+        self.stats.submitted += 1
+
+        queued = self._find(command.key)
+        if queued is None:
+            command.futures.append(future)
+            self._pending.append(command)
+        else:
+            self.stats.coalesced += 1
+            queued.params = {**queued.params, **command.params}
+            queued.futures.append(future)
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_later())
+
+        await future
+
+    def _find(self, key: Hashable | None) -> IaquaCommand | None:
+        if key is None:
+            return None
+        for command in self._pending:
+            if command.key == key:
+                return command
+        return None
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        async with self._lock:
+            # Commands submitted from now on go to the next batch.
+            self._task = None
+            batch, self._pending = self._pending, []
+            await self._send_batch(batch)
+
+    async def _send_batch(self, batch: list[IaquaCommand]) -> None:
+        try:
+            await self._send_lanes(batch)
+        finally:
+            # Left unresolved if the batch was cancelled midway.
+            for command in batch:
+                for future in command.futures:
+                    future.cancel()
+
+    async def _send_lanes(self, batch: list[IaquaCommand]) -> None:
+        self.stats.batches += 1
+        LOGGER.debug(
+            "Sending %s commands to %s: %s",
+            len(batch),
+            self.system.serial,
+            [x.command for x in batch],
+        )
+
+        lanes: dict[str, list[IaquaCommand]] = {}
+        for command in batch:
+            lanes.setdefault(command.device, []).append(command)
+
+        # Response to the last command sent, and its rank in the sending
+        # order, per screen.
+        last: dict[str | None, tuple[int, httpx.Response]] = {}
+        failed: dict[int, BaseException] = {}
+        sent = itertools.count()
+
+        async def send_lane(commands: list[IaquaCommand]) -> None:
+            for command in commands:
+                params = command.params
+                if command.prepare is not None:
+                    params = command.prepare(params)
+                self.stats.sent += 1
+                rank = next(sent)
+                try:
+                    r = await self.system._send_session_request(
+                        command.command, dict(params)
+                    )
+                except Exception as e:  # noqa: BLE001
+                    failed[id(command)] = e
+                    continue
+                if rank > last.get(command.screen, (-1, None))[0]:
+                    last[command.screen] = rank, r
+
+        await asyncio.gather(*[send_lane(x) for x in lanes.values()])
+
+        changes: list[DeviceChange] = []
+        error: BaseException | None = None
+        try:
+            responses = sorted(last.items(), key=lambda x: x[1][0])
+            for screen, (_, r) in responses:
+                self.stats.parsed += 1
+                changes += self.system._parse_command_response(r, screen)
+        except Exception as e:  # noqa: BLE001
+            error = e
+        self.system._notify_changes(changes)
+
+        for command in batch:
+            exception = failed.get(id(command), error)
+            for future in command.futures:
+                if future.done():
+                    continue
+                if exception is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(exception)
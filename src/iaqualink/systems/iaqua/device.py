@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import logging
 from enum import Enum, unique
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING, ClassVar, cast
 
 from iaqualink.device import (
     AqualinkBinarySensor,
@@ -16,6 +16,8 @@ from iaqualink.exception import (
     AqualinkDeviceNotSupported,
     AqualinkInvalidParameterException,
 )
+from iaqualink.registry import DeviceRegistry
+from iaqualink.state import parsed_property
 
 if TYPE_CHECKING:
     from iaqualink.systems.iaqua.system import IaquaSystem
@@ -40,13 +42,16 @@ class AqualinkState(Enum):
 
 
 class IaquaDevice(AqualinkDevice):
+    # Picks the class of new devices, see the rules at the end of the module.
+    registry: ClassVar[DeviceRegistry[IaquaDevice]] = DeviceRegistry()
+
     def __init__(self, system: IaquaSystem, data: DeviceData):
         super().__init__(system, data)
 
         # This silences mypy errors due to AqualinkDevice type annotations.
         self.system: IaquaSystem = system
 
-    @property
+    @parsed_property
     def label(self) -> str:
         if "label" in self.data:
             label = self.data["label"]
@@ -73,42 +78,7 @@ class IaquaDevice(AqualinkDevice):
 
     @classmethod
     def from_data(cls, system: IaquaSystem, data: DeviceData) -> IaquaDevice:
-        class_: type[IaquaDevice]
-
-        # Handle special device types first
-        if data["name"] == "heatpump_info":
-            class_ = IaquaHeatPump
-        elif data["name"] == "swc_info":
-            class_ = IaquaSaltWaterChlorinator
-        elif data["name"] == "icl_light" or "zoneId" in data:
-            class_ = IaquaICLLight
-        # I don't have a system where these fields get populated.
-        # No idea what they are and what to do with them.
-        elif isinstance(data["state"], dict | list):
-            raise AqualinkDeviceNotSupported(data)
-        elif data["name"].endswith("_heater") or data["name"].endswith("_pump"):
-            class_ = IaquaSwitch
-        elif data["name"].endswith("_set_point"):
-            if data["state"] == "":
-                raise AqualinkDeviceNotSupported(data)
-            class_ = IaquaThermostat
-        elif data["name"] == "freeze_protection" or data["name"].endswith(
-            "_present"
-        ):
-            class_ = IaquaBinarySensor
-        elif data["name"].startswith("aux_"):
-            if data["type"] == "2":
-                class_ = light_subtype_to_class[data["subtype"]]
-            elif data["type"] == "1":
-                class_ = IaquaDimmableLight
-            elif "LIGHT" in data["label"]:
-                class_ = IaquaLightSwitch
-            else:
-                class_ = IaquaAuxSwitch
-        else:
-            class_ = IaquaSensor
-
-        return class_(system, data)
+        return cls.registry.classify(data)(system, data)
 
 
 class IaquaSensor(IaquaDevice, AqualinkSensor):
@@ -118,7 +88,7 @@ class IaquaSensor(IaquaDevice, AqualinkSensor):
 class IaquaBinarySensor(IaquaSensor, AqualinkBinarySensor):
     """These are non-actionable sensors, essentially read-only on/off."""
 
-    @property
+    @parsed_property
     def is_on(self) -> bool:
         return (
             AqualinkState(self.state)
@@ -132,17 +102,33 @@ class IaquaSwitch(IaquaBinarySensor, AqualinkSwitch):
     async def _toggle(self) -> None:
         await self.system.set_switch(f"set_{self.name}")
 
+    @property
+    def _on_state(self) -> AqualinkState:
+        # Heaters are enabled first, and only on once they're heating.
+        if self.name.endswith("_heater"):
+            return AqualinkState.ENABLED
+        return AqualinkState.ON
+
     async def turn_on(self) -> None:
-        if not self.is_on:
-            await self._toggle()
+        await self._set_on(True)
 
     async def turn_off(self) -> None:
-        if self.is_on:
-            await self._toggle()
+        await self._set_on(False)
+
+    async def _set_on(self, on: bool) -> None:
+        # The API only has toggle commands. Toggle once the previous command
+        # for this device is done, and only if needed, so that concurrent
+        # calls don't cancel each other out.
+        async with self._command_lock:
+            if self.is_on == on:
+                return
+            state = self._on_state if on else AqualinkState.OFF
+            async with self.system._optimistic(self, "state", state.value):
+                await self._toggle()
 
 
 class IaquaAuxSwitch(IaquaSwitch):
-    @property
+    @parsed_property
     def is_on(self) -> bool:
         return (
             AqualinkState(self.state) == AqualinkState.ON
@@ -150,6 +136,10 @@ class IaquaAuxSwitch(IaquaSwitch):
             else False
         )
 
+    @property
+    def _on_state(self) -> AqualinkState:
+        return AqualinkState.ON
+
     async def _toggle(self) -> None:
         await self.system.set_aux(self.data["aux"])
 
@@ -167,7 +157,7 @@ class IaquaDimmableLight(IaquaAuxSwitch, AqualinkLight):
         if self.is_on:
             await self.set_brightness(0)
 
-    @property
+    @parsed_property
     def brightness(self) -> int | None:
         return int(self.data["subtype"])
 
@@ -479,6 +469,9 @@ class IaquaThermostat(IaquaSwitch, AqualinkThermostat):
             await self._heater.turn_off()
 
 
+@IaquaDevice.registry.register(
+    names=["icl_light"], match=lambda data: "zoneId" in data
+)
 class IaquaICLLight(IaquaDevice, AqualinkLight):
     """Intelligent Color Light (ICL) with RGB color support."""
 
@@ -492,16 +485,19 @@ class IaquaICLLight(IaquaDevice, AqualinkLight):
         """Zone name for the ICL light."""
         return self.data.get("zoneName", "Pool lights")
 
-    @property
+    @parsed_property
     def is_on(self) -> bool:
         status = self.data.get("zoneStatus")
         if status is None:
             # Fallback: if we don't have status yet, assume off
-            LOGGER.warning(f"ICL zone {self.zone_id} missing zoneStatus field, assuming off")
+            LOGGER.warning(
+                "ICL zone %s missing zoneStatus field, assuming off",
+                self.zone_id,
+            )
             return False
         return status != "off"
 
-    @property
+    @parsed_property
     def brightness(self) -> int | None:
         dim_level = self.data.get("dim_level")
         return int(dim_level) if dim_level else None
@@ -511,7 +507,7 @@ class IaquaICLLight(IaquaDevice, AqualinkLight):
         """ICL lights support brightness control."""
         return True
 
-    @property
+    @parsed_property
     def rgb_color(self) -> tuple[int, int, int] | None:
         """RGB color values from the custom color info."""
         try:
@@ -527,7 +523,7 @@ class IaquaICLLight(IaquaDevice, AqualinkLight):
         """ICL lights support RGB color control."""
         return True
 
-    @property
+    @parsed_property
     def white_value(self) -> int | None:
         """White value for RGBW support."""
         try:
@@ -561,24 +557,24 @@ class IaquaICLLight(IaquaDevice, AqualinkLight):
 
     async def turn_on(self) -> None:
         if not self.is_on:
-            LOGGER.debug(f"Turning on ICL light zone {self.zone_id}")
+            LOGGER.debug("Turning on ICL light zone %s", self.zone_id)
             # Use onoff_iclzone command from GitHub issue #39
             data = {"zoneId": str(self.zone_id), "on_off_action": "on"}
             try:
                 await self.system.set_icl_light(data)
-            except Exception as e:
-                LOGGER.error(f"Failed to turn on ICL light: {e}", exc_info=True)
+            except Exception:
+                LOGGER.exception("Failed to turn on ICL light")
                 raise
 
     async def turn_off(self) -> None:
         if self.is_on:
-            LOGGER.debug(f"Turning off ICL light zone {self.zone_id}")
+            LOGGER.debug("Turning off ICL light zone %s", self.zone_id)
             # Use onoff_iclzone command from GitHub issue #39
             data = {"zoneId": str(self.zone_id), "on_off_action": "off"}
             try:
                 await self.system.set_icl_light(data)
-            except Exception as e:
-                LOGGER.error(f"Failed to turn off ICL light: {e}", exc_info=True)
+            except Exception:
+                LOGGER.exception("Failed to turn off ICL light")
                 raise
 
     async def set_brightness(self, brightness: int) -> None:
@@ -630,6 +626,7 @@ class IaquaICLLight(IaquaDevice, AqualinkLight):
         await self.system.set_icl_light(data)
 
 
+@IaquaDevice.registry.register(names=["heatpump_info"])
 class IaquaHeatPump(IaquaSwitch):
     """Heat pump device with heating and cooling mode selection.
     
@@ -643,7 +640,7 @@ class IaquaHeatPump(IaquaSwitch):
         """Whether the heat pump is present in the system."""
         return self.data.get("isheatpumpPresent", False)
 
-    @property
+    @parsed_property
     def is_on(self) -> bool:
         """Heat pump is on if mode is not 'off'."""
         status = self.data.get("heatpumpstatus", "off")
@@ -693,6 +690,7 @@ class IaquaHeatPump(IaquaSwitch):
         await self.system.set_heatpump(data)
 
 
+@IaquaDevice.registry.register(names=["swc_info"])
 class IaquaSaltWaterChlorinator(IaquaSensor):
     """Represents an iAqua Salt Water Chlorinator (SWC) device."""
 
@@ -734,3 +732,37 @@ class IaquaSaltWaterChlorinator(IaquaSensor):
     # def cell_status(self) -> str | None:
     #     """Salt cell status/health."""
     #     return self.data.get("cellStatus")
+
+
+def _unsupported(data: DeviceData) -> type[IaquaDevice]:
+    raise AqualinkDeviceNotSupported(data)
+
+
+def _set_point_class(data: DeviceData) -> type[IaquaDevice]:
+    if data["state"] == "":
+        raise AqualinkDeviceNotSupported(data)
+    return IaquaThermostat
+
+
+def _aux_class(data: DeviceData) -> type[IaquaDevice]:
+    if data["type"] == "2":
+        return light_subtype_to_class[data["subtype"]]
+    if data["type"] == "1":
+        return IaquaDimmableLight
+    if "LIGHT" in data["label"]:
+        return IaquaLightSwitch
+    return IaquaAuxSwitch
+
+
+# I don't have a system where these fields get populated.
+# No idea what they are and what to do with them.
+IaquaDevice.registry.add(
+    _unsupported, match=lambda data: isinstance(data["state"], dict | list)
+)
+IaquaDevice.registry.add(IaquaSwitch, suffixes=["_heater", "_pump"])
+IaquaDevice.registry.add(_set_point_class, suffixes=["_set_point"])
+IaquaDevice.registry.add(
+    IaquaBinarySensor, names=["freeze_protection"], suffixes=["_present"]
+)
+IaquaDevice.registry.add(_aux_class, prefixes=["aux_"])
+IaquaDevice.registry.default = IaquaSensor
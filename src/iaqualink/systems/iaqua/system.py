@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import secrets
 import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from iaqualink.const import MIN_SECS_TO_REFRESH
 from iaqualink.exception import (
@@ -11,13 +12,17 @@ from iaqualink.exception import (
     AqualinkServiceException,
     AqualinkSystemOfflineException,
 )
+from iaqualink.json_backend import decode_response
+from iaqualink.ratelimit import Priority
 from iaqualink.system import AqualinkSystem
+from iaqualink.systems.iaqua.commands import IaquaCommand, IaquaCommandQueue
 from iaqualink.systems.iaqua.device import IaquaDevice
 
 if TYPE_CHECKING:
     import httpx
 
     from iaqualink.client import AqualinkClient
+    from iaqualink.system import DeviceChange
     from iaqualink.typing import Payload
 
 IAQUA_SESSION_URL = "https://p-api.iaqualink.net/v1/mobile/session.json"
@@ -27,6 +32,12 @@ IAQUA_COMMAND_GET_DEVICES = "get_devices"
 IAQUA_COMMAND_GET_HOME = "get_home"
 IAQUA_COMMAND_GET_ONETOUCH = "get_onetouch"
 
+IAQUA_READ_COMMANDS = {
+    IAQUA_COMMAND_GET_DEVICES,
+    IAQUA_COMMAND_GET_HOME,
+    IAQUA_COMMAND_GET_ONETOUCH,
+}
+
 IAQUA_COMMAND_SET_AUX = "set_aux"
 IAQUA_COMMAND_SET_LIGHT = "set_light"
 IAQUA_COMMAND_ONOFF_ICLZONE = "onoff_iclzone"
@@ -46,6 +57,7 @@ LOGGER = logging.getLogger("iaqualink")
 
 class IaquaSystem(AqualinkSystem):
     NAME = "iaqua"
+    CACHED_ATTRIBUTES = ("temp_unit",)
 
     def __init__(self, aqualink: AqualinkClient, data: Payload):
         super().__init__(aqualink, data)
@@ -53,6 +65,13 @@ class IaquaSystem(AqualinkSystem):
         self.temp_unit: str = ""
         self.last_refresh: int = 0
 
+        # When set, the home and devices screens are fetched concurrently
+        # instead of one after the other.
+        self.concurrent_update: bool = False
+
+        # Commands sent concurrently are batched, see IaquaCommandQueue.
+        self.commands = IaquaCommandQueue(self)
+
     def __repr__(self) -> str:
         attrs = ["name", "serial", "data"]
         attrs = [f"{i}={getattr(self, i)!r}" for i in attrs]
@@ -66,6 +85,9 @@ class IaquaSystem(AqualinkSystem):
         if not params:
             params = {}
 
+        if command not in IAQUA_READ_COMMANDS:
+            self.last_command = time.monotonic()
+
         params.update(
             {
                 "actionID": "command",
@@ -76,11 +98,17 @@ class IaquaSystem(AqualinkSystem):
         )
         params_str = "&".join(f"{k}={v}" for k, v in params.items())
         url = f"{IAQUA_SESSION_URL}?{params_str}"
-        return await self.aqualink.send_request(url)
+        # Most commands toggle, sending them twice would undo them.
+        read = command in IAQUA_READ_COMMANDS
+        return await self.aqualink.send_request(
+            url,
+            idempotent=read,
+            priority=Priority.POLL if read else Priority.COMMAND,
+        )
 
     async def set_icl_light(self, data: Payload) -> None:
         """Control ICL lights using v1 API commands from GitHub issue #39."""
-        LOGGER.debug(f"Setting ICL light with data: {data}")
+        LOGGER.debug("Setting ICL light with data: %s", data)
         zone_id = data.get("zoneId", "1")
         
         # Determine which command to use based on data
@@ -110,26 +138,40 @@ class IaquaSystem(AqualinkSystem):
                 "white_val": data.get("white_val", "0")
             }
         else:
-            LOGGER.error(f"Unknown ICL command data: {data}")
+            LOGGER.error("Unknown ICL command data: %s", data)
             return
         
-        LOGGER.debug(f"Using command {command} with params: {params}")
-        r = await self._send_session_request(command, params)
-        LOGGER.debug(f"ICL light response status: {r.status_code}")
-        
-        # Parse response to update device states
-        response_data = r.json()
+        LOGGER.debug("Using command %s with params: %s", command, params)
+        device = f"icl_zone_{zone_id}"
+        await self.commands.submit(
+            IaquaCommand(command, params, device, key=(device, command))
+        )
+
+    def _parse_command_response(
+        self, response: httpx.Response, screen: str | None
+    ) -> list[DeviceChange]:
+        """Parse the screen returned by a command.
+
+        Commands whose response varies (lights) may return the home or the
+        devices screen, or nothing at all.
+        """
+        if screen == "home":
+            return self._parse_home_response(response)
+        if screen == "devices":
+            return self._parse_devices_response(response)
+
+        response_data = decode_response(response)
         if not response_data:
-            LOGGER.debug("ICL light command returned empty response - command completed")
-            return
-        elif "home_screen" in response_data:
+            LOGGER.debug("Command returned empty response - command completed")
+            return []
+        if "home_screen" in response_data:
             LOGGER.debug("Parsing home_screen response")
-            self._parse_home_response(r)
-        elif "devices_screen" in response_data:
+            return self._parse_home_data(response_data)
+        if "devices_screen" in response_data:
             LOGGER.debug("Parsing devices_screen response")
-            self._parse_devices_response(r)
-        else:
-            LOGGER.debug(f"Unexpected ICL response format: {response_data}")
+            return self._parse_devices_data(response_data)
+        LOGGER.debug("Unexpected command response format: %s", response_data)
+        return []
 
     async def _send_home_screen_request(self) -> httpx.Response:
         return await self._send_session_request(IAQUA_COMMAND_GET_HOME)
@@ -137,38 +179,74 @@ class IaquaSystem(AqualinkSystem):
     async def _send_devices_screen_request(self) -> httpx.Response:
         return await self._send_session_request(IAQUA_COMMAND_GET_DEVICES)
 
+    async def _send_screen_requests(
+        self,
+    ) -> tuple[httpx.Response, httpx.Response]:
+        if not self.concurrent_update:
+            r1 = await self._send_home_screen_request()
+            r2 = await self._send_devices_screen_request()
+            return r1, r2
+
+        # Wait for both requests to finish before raising so that failures
+        # surface in the same order as they would when run sequentially.
+        home, devices = await asyncio.gather(
+            self._send_home_screen_request(),
+            self._send_devices_screen_request(),
+            return_exceptions=True,
+        )
+        if isinstance(home, BaseException):
+            raise home
+        if isinstance(devices, BaseException):
+            raise devices
+        return home, devices
+
     async def update(self) -> None:
+        await self._single_flight(self._update)
+
+    async def _update(self) -> None:
         # Be nice to Aqualink servers since we rely on polling.
         now = int(time.time())
         delta = now - self.last_refresh
         if delta < MIN_SECS_TO_REFRESH:
-            LOGGER.debug(f"Only {delta}s since last refresh.")
+            LOGGER.debug("Only %ss since last refresh.", delta)
+            self.update_stats.throttled += 1
             return
 
+        sent_at = time.monotonic()
         try:
-            r1 = await self._send_home_screen_request()
-            r2 = await self._send_devices_screen_request()
+            r1, r2 = await self._send_screen_requests()
         except AqualinkServiceException:
             self.online = None
             raise
 
         try:
-            self._parse_home_response(r1)
-            self._parse_devices_response(r2)
+            with self._refresh_data(sent_at):
+                changes = [
+                    *self._parse_home_response(r1),
+                    *self._parse_devices_response(r2),
+                ]
         except AqualinkSystemOfflineException:
             self.online = False
             raise
 
         self.online = True
         self.last_refresh = int(time.time())
+        if self._restored:
+            changes += self._drop_restored_devices()
+        self._notify_changes(changes)
+
+    def _parse_home_response(
+        self, response: httpx.Response
+    ) -> list[DeviceChange]:
+        return self._parse_home_data(decode_response(response))
 
-    def _parse_home_response(self, response: httpx.Response) -> None:
-        data = response.json()
+    def _parse_home_data(self, data: dict[str, Any]) -> list[DeviceChange]:
 
-        LOGGER.debug(f"Home response: {data}")
+        LOGGER.debug("Home response: %s", data)
+        self._sample_payload("home", data)
 
         if data["home_screen"][0]["status"] == "Offline":
-            LOGGER.warning(f"Status for system {self.serial} is Offline.")
+            LOGGER.warning("Status for system %s is Offline.", self.serial)
             raise AqualinkSystemOfflineException
 
         self.temp_unit = data["home_screen"][3]["temp_scale"]
@@ -207,61 +285,90 @@ class IaquaSystem(AqualinkSystem):
                     devices[name] = state
                 continue
             
-            attrs = {"name": name, "state": state}
-            devices.update({name: attrs})
+            devices[name] = {"name": name, "state": state}
 
+        changes = []
         for k, v in devices.items():
             if k in self.devices:
-                for dk, dv in v.items():
-                    self.devices[k].data[dk] = dv
+                changes += self._merge_device_data(k, v)
             else:
                 try:
                     self.devices[k] = IaquaDevice.from_data(self, v)
                 except AqualinkDeviceNotSupported as e:
                     LOGGER.debug("Device found was ignored: %s", e)
+                else:
+                    changes += self._added_device_changes(k)
+
+        return changes
 
-    def _parse_devices_response(self, response: httpx.Response) -> None:
-        data = response.json()
+    def _parse_devices_response(
+        self, response: httpx.Response
+    ) -> list[DeviceChange]:
+        return self._parse_devices_data(decode_response(response))
 
-        LOGGER.debug(f"Devices response: {data}")
+    def _parse_devices_data(self, data: dict[str, Any]) -> list[DeviceChange]:
+
+        LOGGER.debug("Devices response: %s", data)
+        self._sample_payload("devices", data)
 
         if data["devices_screen"][0]["status"] == "Offline":
-            LOGGER.warning(f"Status for system {self.serial} is Offline.")
+            LOGGER.warning("Status for system %s is Offline.", self.serial)
             raise AqualinkSystemOfflineException
 
+        changes = []
+
         # Handle ICL info list if present (at root level of devices_screen)
         if "icl_info_list" in data:
             icl_list = data["icl_info_list"]
-            LOGGER.debug(f"Found icl_info_list at root level: {icl_list}")
+            LOGGER.debug("Found icl_info_list at root level: %s", icl_list)
             if isinstance(icl_list, list):
                 for icl_info in icl_list:
                     if isinstance(icl_info, dict):
                         zone_id = icl_info.get("zoneId", 1)
                         zone_name = icl_info.get("zoneName", f"ICL Zone {zone_id}")
                         device_name = f"icl_zone_{zone_id}"
-                        LOGGER.debug(f"Processing ICL zone {zone_id}, device_name={device_name}, exists={device_name in self.devices}")
+                        LOGGER.debug(
+                            "Processing ICL zone %s, device_name=%s, exists=%s",
+                            zone_id,
+                            device_name,
+                            device_name in self.devices,
+                        )
                         # Merge with existing zone data from home response
                         if device_name in self.devices:
                             # Update existing device data with zone name
-                            LOGGER.debug(f"Updating existing ICL device {device_name} with {icl_info}")
-                            for dk, dv in icl_info.items():
-                                self.devices[device_name].data[dk] = dv
-                            # Update the name to use zoneName
-                            self.devices[device_name].data["name"] = zone_name
-                            LOGGER.debug(f"After update, device data: {self.devices[device_name].data}")
+                            LOGGER.debug(
+                                "Updating existing ICL device %s with %s",
+                                device_name,
+                                icl_info,
+                            )
+                            changes += self._merge_device_data(
+                                device_name, {**icl_info, "name": zone_name}
+                            )
+                            LOGGER.debug(
+                                "After update, device data: %s",
+                                self.devices[device_name].data,
+                            )
                         else:
                             # Create new device (shouldn't happen, but handle it)
-                            LOGGER.debug(f"Creating new ICL device {device_name}")
+                            LOGGER.debug(
+                                "Creating new ICL device %s", device_name
+                            )
                             icl_info["name"] = zone_name
                             icl_info["name"] = device_name
                             try:
                                 self.devices[device_name] = IaquaDevice.from_data(self, icl_info)
                             except AqualinkDeviceNotSupported as e:
                                 LOGGER.debug("ICL device found was ignored: %s", e)
+                            else:
+                                changes += self._added_device_changes(device_name)
 
         # Make the data a bit flatter.
         devices = {}
-        LOGGER.debug(f"Starting aux device processing, current self.devices keys: {list(self.devices.keys())}")
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug(
+                "Starting aux device processing, current self.devices keys: %s",
+                list(self.devices.keys()),
+            )
         for x in data["devices_screen"][3:]:
             aux = next(iter(x.keys()))
             # Skip icl_info_list if it appears here (it shouldn't, but just in case)
@@ -271,23 +378,40 @@ class IaquaSystem(AqualinkSystem):
             attrs = {"aux": aux.replace("aux_", ""), "name": aux}
             for y in next(iter(x.values())):
                 attrs.update(y)
-            devices.update({aux: attrs})
+            devices[aux] = attrs
 
         for k, v in devices.items():
             if k in self.devices:
-                for dk, dv in v.items():
-                    self.devices[k].data[dk] = dv
+                changes += self._merge_device_data(k, v)
             else:
                 try:
                     self.devices[k] = IaquaDevice.from_data(self, v)
                 except AqualinkDeviceNotSupported as e:
                     LOGGER.info("Device found was ignored: %s", e)
+                else:
+                    changes += self._added_device_changes(k)
+
+        return changes
 
     async def set_switch(self, command: str) -> None:
-        r = await self._send_session_request(command)
-        self._parse_home_response(r)
+        await self.commands.submit(
+            IaquaCommand(command, {}, command, screen="home")
+        )
 
     async def set_temps(self, temps: Payload) -> None:
+        # Temperatures set concurrently end up in a single request.
+        await self.commands.submit(
+            IaquaCommand(
+                IAQUA_COMMAND_SET_TEMPS,
+                temps,
+                "temps",
+                key="temps",
+                screen="home",
+                prepare=self._temps_args,
+            )
+        )
+
+    def _temps_args(self, temps: Payload) -> Payload:
         # I'm not proud of this. If you read this, please submit a PR to make it better.
         # We need to pass the temperatures for both pool and spa (if present) in the same request.
         # Set args to current target temperatures and override with the request payload.
@@ -298,36 +422,34 @@ class IaquaSystem(AqualinkSystem):
             i += 1
         args[f"temp{i}"] = self.devices["pool_set_point"].target_temperature
         args.update(temps)
-
-        r = await self._send_session_request(IAQUA_COMMAND_SET_TEMPS, args)
-        self._parse_home_response(r)
+        return args
 
     async def set_aux(self, aux: str) -> None:
-        aux = IAQUA_COMMAND_SET_AUX + "_" + aux.replace("aux_", "")
-        r = await self._send_session_request(aux)
-        self._parse_devices_response(r)
+        # Same lane as set_light, commands to an aux are sent in order.
+        aux = aux.replace("aux_", "")
+        command = f"{IAQUA_COMMAND_SET_AUX}_{aux}"
+        await self.commands.submit(
+            IaquaCommand(command, {}, f"aux_{aux}", screen="devices")
+        )
 
     async def set_light(self, data: Payload) -> None:
-        LOGGER.debug(f"Setting light with data: {data}")
-        # Use v1 API for all lights (regular and ICL)
-        r = await self._send_session_request(IAQUA_COMMAND_SET_LIGHT, data)
-        LOGGER.debug(f"Set light response status: {r.status_code}")
-        
-        # ICL lights may return empty response, home_screen, or devices_screen
-        response_data = r.json()
-        if not response_data:
-            # Empty response - command succeeded but no data returned
-            LOGGER.debug("Set light command returned empty response - command completed")
-            return
-        elif "home_screen" in response_data:
-            LOGGER.debug("Parsing home_screen response")
-            self._parse_home_response(r)
-        elif "devices_screen" in response_data:
-            LOGGER.debug("Parsing devices_screen response")
-            self._parse_devices_response(r)
-        else:
-            LOGGER.debug(f"Unexpected set_light response format: {response_data}")
+        LOGGER.debug("Setting light with data: %s", data)
+        # Use v1 API for all lights (regular and ICL), which may return the
+        # home screen, the devices screen or nothing at all.
+        device = f"aux_{data['aux']}"
+        await self.commands.submit(
+            IaquaCommand(
+                IAQUA_COMMAND_SET_LIGHT, data, device, key=(device, "light")
+            )
+        )
 
     async def set_heatpump(self, data: Payload) -> None:
-        r = await self._send_session_request(IAQUA_COMMAND_SET_HEATPUMP, data)
-        self._parse_home_response(r)
+        await self.commands.submit(
+            IaquaCommand(
+                IAQUA_COMMAND_SET_HEATPUMP,
+                data,
+                "heatpump",
+                key="heatpump",
+                screen="home",
+            )
+        )
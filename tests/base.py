@@ -4,6 +4,7 @@ import httpx
 from respx.patterns import M
 
 from iaqualink.client import AqualinkClient
+from iaqualink.simulator import AqualinkSimulator
 
 dotstar = M(host__regex=".*")
 resp_200 = httpx.Response(status_code=200, json={})
@@ -24,3 +25,34 @@ class TestBase(unittest.IsolatedAsyncioTestCase):
 
         self.client = AqualinkClient("foo", "bar")
         self.addAsyncCleanup(self.client.close)
+
+
+class TestBaseSimulator(TestBase):
+    """Tests against an AqualinkSimulator, with a logged in client.
+
+    `system` is the system with serial `serial`, refreshed once. Requests
+    made during the setup aren't counted in the simulator stats.
+    """
+
+    iaqua_systems = 0
+    exo_systems = 0
+    serial = ""
+
+    def setUp(self) -> None:
+        # The simulator's client replaces the one of TestBase.
+        unittest.IsolatedAsyncioTestCase.setUp(self)
+
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+
+        self.simulator = AqualinkSimulator(
+            iaqua_systems=self.iaqua_systems, exo_systems=self.exo_systems
+        )
+        self.client = self.simulator.client()
+        self.addAsyncCleanup(self.client.close)
+
+        await self.client.login()
+        systems = await self.client.get_systems()
+        self.system = systems[self.serial]
+        await self.system.update()
+        self.simulator.stats.requests.clear()
@@ -1,3 +1,4 @@
+import asyncio
 import copy
 
 import httpx
@@ -42,6 +43,22 @@ class TestBaseSystem(TestBase):
         await self.sut.update()
         assert len(respx_mock.calls) == 0
 
+    @respx.mock
+    async def test_update_single_flight(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        respx_mock.route(dotstar).mock(resp_200)
+        await self.sut.update()
+        calls = len(respx_mock.calls)
+
+        respx_mock.reset()
+        self.sut.last_refresh = 0
+        await asyncio.gather(*[self.sut.update() for _ in range(5)])
+
+        assert len(respx_mock.calls) == calls
+        assert self.sut.update_stats.calls == 6
+        assert self.sut.update_stats.coalesced == 4
+
     @respx.mock
     async def test_update_service_exception(
         self, respx_mock: respx.router.MockRouter
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING, cast
+from unittest.mock import patch
+
+import pytest
+
+from iaqualink.exception import AqualinkServiceException
+
+from ...base import TestBaseSimulator
+
+if TYPE_CHECKING:
+    from iaqualink.simulator import SimulatedExoSystem
+    from iaqualink.systems.exo.device import ExoThermostat
+    from iaqualink.systems.exo.system import ExoSystem
+
+
+class TestExoDesiredStateQueue(TestBaseSimulator):
+    exo_systems = 1
+    serial = "EXO00000"
+    system: ExoSystem
+
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+
+        simulated = self.simulator.systems[self.system.serial]
+        self.reported = cast("SimulatedExoSystem", simulated).reported
+
+    async def test_single(self) -> None:
+        await self.system.set_aux("aux_1", 1)
+
+        assert self.reported["equipment"]["swc_0"]["aux_1"]["state"] == 1
+        assert self.system.commands.stats.sent == 1
+        assert self.system.commands.stats.saved == 0
+
+    async def test_merged(self) -> None:
+        heating = cast("ExoThermostat", self.system.devices["heating"])
+        desired = []
+        send = self.system.send_desired_state_request
+
+        async def side_effect(state: dict[str, object]) -> object:
+            desired.append(state)
+            return await send(state)
+
+        with patch.object(
+            self.system, "send_desired_state_request", side_effect=side_effect
+        ):
+            await asyncio.gather(
+                heating.set_temperature(30),
+                heating.turn_on(),
+                self.system.devices["boost"].turn_on(),
+                self.system.devices["aux_1"].turn_on(),
+            )
+
+        assert desired == [
+            {
+                "heating": {"sp": 30, "enabled": 1},
+                "equipment": {"swc_0": {"boost": 1, "aux_1": {"state": 1}}},
+            }
+        ]
+        assert self.reported["heating"]["sp"] == 30
+        assert self.reported["heating"]["enabled"] == 1
+        assert self.reported["equipment"]["swc_0"]["boost"] == 1
+
+        stats = self.system.commands.stats
+        assert stats.submitted == 4
+        assert stats.sent == 1
+        assert stats.saved == 3
+
+    async def test_last_wins(self) -> None:
+        await asyncio.gather(
+            self.system.set_aux("aux_1", 1),
+            self.system.set_aux("aux_1", 0),
+        )
+
+        assert self.reported["equipment"]["swc_0"]["aux_1"]["state"] == 0
+        assert self.system.commands.stats.sent == 1
+
+    async def test_window(self) -> None:
+        self.system.commands.window = 0.01
+
+        async def later() -> None:
+            await asyncio.sleep(0)
+            await self.system.set_toggle("boost", 1)
+
+        await asyncio.gather(self.system.set_aux("aux_2", 1), later())
+
+        assert self.system.commands.stats.sent == 1
+
+    async def test_in_flight(self) -> None:
+        # Fragments submitted while a document is being posted go together
+        # in the next one.
+        first = asyncio.create_task(self.system.set_aux("aux_1", 1))
+        while not self.system.commands.stats.sent:
+            await asyncio.sleep(0)
+        await asyncio.gather(
+            first,
+            self.system.set_aux("aux_2", 1),
+            self.system.set_toggle("boost", 1),
+        )
+
+        assert self.system.commands.stats.sent == 2
+
+    async def test_failure(self) -> None:
+        with (
+            patch.object(
+                self.system,
+                "send_desired_state_request",
+                side_effect=AqualinkServiceException,
+            ),
+            pytest.raises(ExceptionGroup) as e,
+        ):
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self.system.set_aux("aux_1", 1))
+                tg.create_task(self.system.set_toggle("boost", 1))
+
+        assert len(e.value.exceptions) == 2
+        assert e.group_contains(AqualinkServiceException)
+        assert self.system.commands.stats.sent == 1
+
+    async def test_cancelled(self) -> None:
+        async def side_effect(state: dict[str, object]) -> object:
+            await asyncio.sleep(60)
+
+        with patch.object(
+            self.system, "send_desired_state_request", side_effect=side_effect
+        ):
+            command = asyncio.create_task(self.system.set_aux("aux_1", 1))
+            await asyncio.sleep(0)
+            flush = self.system.commands._task
+            assert flush is not None
+            while not self.system.commands.stats.sent:
+                await asyncio.sleep(0)
+            flush.cancel()
+
+            with pytest.raises(asyncio.CancelledError):
+                async with asyncio.timeout(1):
+                    await command
+
+    async def test_optimistic_state(self) -> None:
+        heating = cast("ExoThermostat", self.system.devices["heating"])
+        changes = []
+        heating.add_listener(changes.extend, weak=False)
+        shadows = self.simulator.stats.requests["shadow"]
+
+        task = asyncio.create_task(heating.set_temperature(30))
+        await asyncio.sleep(0)
+        # Visible before the command was even sent.
+        assert heating.target_temperature == "30"
+        await task
+
+        assert heating.target_temperature == "30"
+        assert changes[0].new == 30
+        # No refresh was needed.
+        assert self.simulator.stats.requests["shadow"] == shadows + 1
+
+    async def test_turn_on_idempotent(self) -> None:
+        aux = self.system.devices["aux_1"]
+        await asyncio.gather(aux.turn_on(), aux.turn_on())
+
+        assert aux.is_on is True
+        assert self.system.commands.stats.submitted == 1
+
+    async def test_reconciled_by_refresh(self) -> None:
+        aux = self.system.devices["aux_1"]
+        await aux.turn_on()
+        assert self.system._pending
+
+        # Someone turned it back off from the panel, after the command.
+        self.simulator.report(
+            self.system.serial,
+            {"equipment": {"swc_0": {"aux_1": {"state": 0}}}},
+            timestamp=int(time.time()) + 1,
+        )
+        self.system.last_refresh = 0
+        await self.system.update()
+
+        assert self.system._pending == {}
+        assert aux.is_on is False
+
+    async def test_unconfirmed_reverted(self) -> None:
+        aux = self.system.devices["aux_1"]
+        with patch.object(self.simulator, "apply_delay", 3600):
+            await aux.turn_on()
+
+        # The device hasn't applied it yet.
+        self.system.last_refresh = 0
+        await self.system.update()
+        assert aux.is_on is True
+
+        self.system.pending_timeout = 0
+        self.system.last_refresh = 0
+        await self.system.update()
+        assert self.system._pending == {}
+        assert aux.is_on is False
+
+    async def test_failed_command_reverted(self) -> None:
+        aux = self.system.devices["aux_1"]
+
+        with (
+            patch.object(
+                self.system,
+                "send_desired_state_request",
+                side_effect=AqualinkServiceException,
+            ),
+            pytest.raises(AqualinkServiceException),
+        ):
+            await aux.turn_on()
+
+        assert aux.is_on is False
+        assert self.system._pending == {}
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import unittest
+from typing import TYPE_CHECKING, cast
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from iaqualink.exception import AqualinkInvalidParameterException
+from iaqualink.systems.exo.push import (
+    SHADOW_DOCUMENTS_TOPIC,
+    ExoShadowPush,
+    MqttShadowTransport,
+)
+
+from ...base import TestBaseSimulator
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from iaqualink.simulator import SimulatedExoSystem
+    from iaqualink.system import DeviceChange
+    from iaqualink.systems.exo.system import ExoSystem
+
+
+async def wait_for(condition: Callable[[], object]) -> None:
+    async with asyncio.timeout(1):
+        while not condition():
+            await asyncio.sleep(0)
+
+
+class TestExoShadowPush(TestBaseSimulator):
+    exo_systems = 1
+    serial = "EXO00000"
+    system: ExoSystem
+
+    async def asyncSetUp(self) -> None:
+        await super().asyncSetUp()
+
+        self.transport = self.simulator.broker.transport()
+        self.push = ExoShadowPush(
+            self.client, self.transport, reconnect_delay=0
+        )
+        self.push.add(self.system)
+        self.addAsyncCleanup(self.push.stop)
+        await self.push.start()
+        await wait_for(lambda: self.push.connected)
+
+    def _publish(self, document: dict[str, object]) -> None:
+        topic = SHADOW_DOCUMENTS_TOPIC.format(serial=self.system.serial)
+        self.simulator.broker.publish(topic, json.dumps(document).encode())
+
+    async def test_connect(self) -> None:
+        assert self.system.push_connected
+        assert self.transport.headers == {"Authorization": self.client.id_token}
+
+    async def test_device_change(self) -> None:
+        changes: list[DeviceChange] = []
+        self.system.subscribe(changes.extend)
+        polls = self.simulator.stats.requests["shadow"]
+
+        self.simulator.report(
+            self.system.serial, {"equipment": {"swc_0": {"swc": 70}}}
+        )
+        await wait_for(lambda: self.push.stats.applied)
+
+        assert self.system.devices["swc"].state == "70"
+        assert [(x.device, x.attribute) for x in changes] == [("swc", "state")]
+        assert self.simulator.stats.requests["shadow"] == polls
+
+    async def test_command(self) -> None:
+        await self.system.set_aux("aux_1", 1)
+        await wait_for(lambda: self.push.stats.applied)
+
+        assert self.system.devices["aux_1"].state == "1"
+
+    async def test_command_applied_later(self) -> None:
+        aux = self.system.devices["aux_1"]
+        self.simulator.apply_delay = 0.05
+
+        broker = self.simulator.broker
+        published: list[tuple[str, bytes]] = []
+        with patch.object(
+            broker, "publish", side_effect=lambda *x: published.append(x)
+        ):
+            await self.system.set_aux("aux_1", 1)
+
+        # Published for the update, still with the old state, and received
+        # once the command completed.
+        for topic, payload in published:
+            broker.publish(topic, payload)
+        await wait_for(lambda: self.push.stats.applied)
+        assert aux.state == "1"
+        assert self.system._pending
+
+        await wait_for(lambda: self.push.stats.applied == 2)
+        assert aux.state == "1"
+        assert self.system._pending == {}
+
+    async def test_stale(self) -> None:
+        simulated = self.simulator.systems[self.system.serial]
+        document = cast("SimulatedExoSystem", simulated).document()
+        document["current"]["version"] -= 1
+        self._publish(document)
+        await wait_for(lambda: self.push.stats.messages)
+
+        assert self.push.stats.ignored == 1
+        assert self.push.stats.applied == 0
+
+    async def test_invalid(self) -> None:
+        self._publish({"previous": None})
+        await wait_for(lambda: self.push.stats.messages)
+
+        assert self.push.stats.errors == 1
+
+    async def test_reconnect(self) -> None:
+        self.simulator.broker.disconnect()
+        await wait_for(lambda: self.push.stats.connections == 2)
+        await wait_for(lambda: self.push.connected)
+
+        self.simulator.report(
+            self.system.serial, {"equipment": {"swc_0": {"swc": 70}}}
+        )
+        await wait_for(lambda: self.push.stats.applied)
+        assert self.system.devices["swc"].state == "70"
+
+    async def test_remove(self) -> None:
+        remove = self.push.add(self.system)
+        remove()
+        await wait_for(lambda: not self.transport.topics)
+
+        assert not self.system.push_connected
+        self.simulator.report(
+            self.system.serial, {"equipment": {"swc_0": {"swc": 70}}}
+        )
+        await asyncio.sleep(0)
+        assert self.push.stats.messages == 0
+
+    async def test_stop(self) -> None:
+        await self.push.stop()
+
+        assert not self.push.connected
+        assert not self.system.push_connected
+        assert not self.simulator.broker.transports
+
+
+class TestMqttShadowTransport(unittest.IsolatedAsyncioTestCase):
+    def test_missing_dependency(self) -> None:
+        with (
+            patch.dict("sys.modules", {"aiomqtt": None}),
+            pytest.raises(AqualinkInvalidParameterException),
+        ):
+            MqttShadowTransport("wss://broker.example.com/mqtt")
+
+    async def test_connect(self) -> None:
+        aiomqtt = MagicMock()
+        client = aiomqtt.Client.return_value
+        client.subscribe = AsyncMock()
+        with patch.dict("sys.modules", {"aiomqtt": aiomqtt}):
+            with pytest.raises(AqualinkInvalidParameterException):
+                MqttShadowTransport("https://broker.example.com/mqtt")
+
+            transport = MqttShadowTransport("wss://broker.example.com/mqtt")
+            await transport.connect({"Authorization": "token"})
+            await transport.subscribe("topic")
+            await transport.close()
+
+        args, kwargs = aiomqtt.Client.call_args
+        assert args == ("broker.example.com", 443)
+        assert kwargs["transport"] == "websockets"
+        assert kwargs["websocket_path"] == "/mqtt"
+        assert kwargs["websocket_headers"] == {"Authorization": "token"}
+        assert kwargs["tls_context"] is not None
+        client.subscribe.assert_awaited_once_with("topic")
+        client.__aexit__.assert_awaited_once()
@@ -1,20 +1,35 @@
 from __future__ import annotations
 
+import asyncio
+import copy
+import time
 import unittest
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
+import respx
+import respx.router
 
 from iaqualink.client import AqualinkClient
+from iaqualink.const import AQUALINK_LOGIN_URL
 from iaqualink.exception import (
     AqualinkServiceException,
     AqualinkServiceUnauthorizedException,
     AqualinkSystemOfflineException,
 )
-from iaqualink.system import AqualinkSystem
-from iaqualink.systems.exo.system import ExoSystem
+from iaqualink.system import AqualinkSystem, DeviceChange
+from iaqualink.systems.exo.system import EXO_DEVICES_URL, ExoSystem
 
 from ...common import async_noop, async_raises
+from ...test_auth import make_jwt
+
+LOGIN_DATA = {
+    "id": "id",
+    "authentication_token": "token",
+    "session_id": "session_id",
+    "userPoolOAuth": {"IdToken": "new"},
+}
 
 SAMPLE_DATA = {
     "state": {
@@ -187,6 +202,20 @@ class TestExoSystem(unittest.IsolatedAsyncioTestCase):
         await r.update()
         assert r.online is True
 
+    async def test_update_single_flight(self):
+        aqualink = MagicMock()
+        data = {"id": 1, "serial_number": "ABCDEFG", "device_type": "exo"}
+        r = AqualinkSystem.from_data(aqualink, data)
+
+        async def request() -> None:
+            await asyncio.sleep(0.01)
+
+        r.send_reported_state_request = AsyncMock(side_effect=request)
+        r._parse_shadow_response = MagicMock()
+        await asyncio.gather(*[r.update() for _ in range(3)])
+        r.send_reported_state_request.assert_awaited_once()
+        assert r.update_stats.coalesced == 2
+
     async def test_update_service_exception(self):
         aqualink = MagicMock()
         data = {"id": 1, "serial_number": "ABCDEFG", "device_type": "exo"}
@@ -217,8 +246,7 @@ class TestExoSystem(unittest.IsolatedAsyncioTestCase):
         system = AqualinkSystem.from_data(aqualink, data)
 
         message = {"message": "", "devices_screen": [{"status": "Offline"}]}
-        response = MagicMock()
-        response.json.return_value = message
+        response = httpx.Response(status_code=200, json=message)
 
         with pytest.raises(AqualinkSystemOfflineException):
             system._parse_shadow_response(response)
@@ -230,11 +258,256 @@ class TestExoSystem(unittest.IsolatedAsyncioTestCase):
         aqualink = MagicMock()
         system = ExoSystem.from_data(aqualink, data)
 
-        response = MagicMock()
-        response.json.return_value = SAMPLE_DATA
+        response = httpx.Response(status_code=200, json=SAMPLE_DATA)
         system._parse_shadow_response(response)
         assert system.devices == {}
 
+    async def test_parse_shadow_changes(self):
+        data = {"id": 1, "serial_number": "ABCDEFG", "device_type": "exo"}
+        system = ExoSystem.from_data(MagicMock(), data)
+
+        sample = copy.deepcopy(SAMPLE_DATA)
+
+        changes = system._parse_shadow_data(sample)
+        assert {x.device for x in changes} == set(system.devices)
+
+        assert system._parse_shadow_data(sample) == []
+
+        sample["state"]["reported"]["equipment"]["swc_0"]["swc"] = 60
+        sample["state"]["reported"]["equipment"]["swc_0"]["ph_sp"] = 72
+        changes = system._parse_shadow_data(sample)
+        assert set(changes) == {
+            DeviceChange("swc", "state", 50, 60),
+            DeviceChange("ph_sp", "state", 74, 72),
+        }
+
+    async def test_parse_shadow_same_version(self):
+        data = {"id": 1, "serial_number": "ABCDEFG", "device_type": "exo"}
+        system = ExoSystem.from_data(MagicMock(), data)
+
+        sample = copy.deepcopy(SAMPLE_DATA)
+        sample["version"] = 7
+        system._parse_shadow_data(sample)
+        assert system.shadow_version == 7
+        assert system.shadow_timestamp == 123
+
+        # Not even looked at.
+        sample["state"]["reported"]["equipment"]["swc_0"]["swc"] = 60
+        assert system._parse_shadow_data(sample) == []
+        assert system.devices["swc"].state == "50"
+        assert system.shadow_stats.unchanged == 1
+
+        sample["version"] = 8
+        changes = system._parse_shadow_data(sample)
+        assert changes == [DeviceChange("swc", "state", 50, 60)]
+        assert system.shadow_stats.parsed == 2
+
+    async def test_parse_shadow_older_version(self):
+        data = {"id": 1, "serial_number": "ABCDEFG", "device_type": "exo"}
+        system = ExoSystem.from_data(MagicMock(), data)
+
+        # Polled before the pushed v3 arrived, parsed after it.
+        polled = copy.deepcopy(SAMPLE_DATA)
+        polled["version"] = 2
+        pushed = copy.deepcopy(SAMPLE_DATA)
+        pushed["version"] = 3
+        pushed["state"]["reported"]["equipment"]["swc_0"]["production"] = 0
+
+        assert system._apply_shadow_data(pushed, time.monotonic())
+        assert system._parse_shadow_data(polled) == []
+        assert not system._apply_shadow_data(polled, time.monotonic())
+
+        assert system.shadow_version == 3
+        assert system.devices["production"].state == "0"
+        assert system.shadow_stats.unchanged == 1
+
+    async def test_parse_shadow_changed_subtrees(self):
+        data = {"id": 1, "serial_number": "ABCDEFG", "device_type": "exo"}
+        system = ExoSystem.from_data(MagicMock(), data)
+
+        sample = copy.deepcopy(SAMPLE_DATA)
+        reported = sample["state"]["reported"]
+        reported["heating"] = {"sp": 28, "enabled": 0, "state": 0}
+        system._parse_shadow_data(sample)
+        sns_1 = system.devices["sns_1"]
+        sns_1.data["value"] = 0
+
+        reported["heating"]["state"] = 1
+        reported["equipment"]["swc_0"]["sns_1"]["value"] = 76
+        changes = system._parse_shadow_data(sample)
+
+        # Unchanged subtrees and devices weren't merged again.
+        assert set(changes) == {
+            DeviceChange("heating", "state", 0, 1),
+            DeviceChange("heater", "state", 0, 1),
+            DeviceChange("sns_1", "value", 0, 76),
+        }
+        assert system.devices["swc"].state == "50"
+        assert system.shadow_stats.devices_unchanged > 0
+
+    async def test_parse_shadow_pending(self):
+        data = {"id": 1, "serial_number": "ABCDEFG", "device_type": "exo"}
+        system = ExoSystem.from_data(MagicMock(), data)
+
+        sample = copy.deepcopy(SAMPLE_DATA)
+        sample["version"] = 7
+        system._parse_shadow_data(sample)
+
+        aux = system.devices["aux_1"]
+        async with system._optimistic(aux, "state", 1):
+            pass
+
+        # Same version, but the local value needs to be reconciled.
+        sample["state"]["reported"]["equipment"]["swc_0"]["aux_1"]["state"] = 1
+        with system._refresh_data(time.monotonic()):
+            system._parse_shadow_data(sample)
+        assert system._pending == {}
+        assert aux.data["state"] == 1
+
+    async def test_parse_shadow_pending_unconfirmed(self):
+        data = {"id": 1, "serial_number": "ABCDEFG", "device_type": "exo"}
+        system = ExoSystem.from_data(MagicMock(), data)
+
+        sample = copy.deepcopy(SAMPLE_DATA)
+        swc_0 = sample["state"]["reported"]["equipment"]["swc_0"]
+        sample["metadata"] = {
+            "reported": {
+                "equipment": {"swc_0": {"aux_1": {"state": {"timestamp": 100}}}}
+            }
+        }
+        system._parse_shadow_data(sample)
+
+        aux = system.devices["aux_1"]
+        async with system._optimistic(aux, "state", 1):
+            pass
+
+        # Published for the desired state update, before the device applied
+        # it: still the old value, reported before the update.
+        with system._refresh_data(time.monotonic()):
+            system._parse_shadow_data(sample)
+        assert aux.data["state"] == 1
+        assert system._pending
+
+        # Turned back off from the panel after the update.
+        swc_0["aux_1"]["state"] = 0
+        stamp = int(time.time()) + 1
+        sample["metadata"]["reported"]["equipment"]["swc_0"]["aux_1"] = {
+            "state": {"timestamp": stamp}
+        }
+        with system._refresh_data(time.monotonic()):
+            system._parse_shadow_data(sample)
+        assert aux.data["state"] == 0
+        assert system._pending == {}
+
+    async def test_parse_shadow_pending_expired(self):
+        data = {"id": 1, "serial_number": "ABCDEFG", "device_type": "exo"}
+        system = ExoSystem.from_data(MagicMock(), data)
+
+        sample = copy.deepcopy(SAMPLE_DATA)
+        sample["version"] = 7
+        system._parse_shadow_data(sample)
+
+        # Never reported, so never settled by a refresh.
+        aux = system.devices["aux_1"]
+        async with system._optimistic(aux, "speed", 1):
+            pass
+        system.pending_timeout = 0
+        with system._refresh_data(time.monotonic()):
+            system._parse_shadow_data(sample)
+        assert system._pending == {}
+
+        # Versions are compared again.
+        with system._refresh_data(time.monotonic()):
+            assert system._parse_shadow_data(sample) == []
+        assert system.shadow_stats.unchanged == 1
+
+    async def test_parse_shadow_metadata(self):
+        data = {"id": 1, "serial_number": "ABCDEFG", "device_type": "exo"}
+        system = ExoSystem.from_data(MagicMock(), data)
+
+        sample = copy.deepcopy(SAMPLE_DATA)
+        swc_0 = sample["state"]["reported"]["equipment"]["swc_0"]
+        swc_0_metadata = {
+            "swc": {"timestamp": 100},
+            "ph_sp": {"timestamp": 100},
+            "sns_1": {
+                "state": {"timestamp": 100},
+                "value": {"timestamp": 110},
+                "sensor_type": {"timestamp": 100},
+            },
+        }
+        sample["metadata"] = {
+            "reported": {"equipment": {"swc_0": swc_0_metadata}}
+        }
+        sample["timestamp"] = 120
+        system._parse_shadow_data(sample)
+        sns_1 = system.devices["sns_1"]
+        assert system.devices["swc"].updated_at == {"state": 100}
+        assert sns_1.updated_at == {
+            "state": 100,
+            "value": 110,
+            "sensor_type": 100,
+        }
+
+        # Only attributes whose timestamp advanced are merged.
+        swc_0["swc"] = 60
+        swc_0["ph_sp"] = 72
+        swc_0["sns_1"]["value"] = 76
+        swc_0_metadata["ph_sp"] = {"timestamp": 130}
+        swc_0_metadata["sns_1"]["value"] = {"timestamp": 130}
+        sample["timestamp"] = 140
+        changes = system._parse_shadow_data(sample)
+
+        assert set(changes) == {
+            DeviceChange("ph_sp", "state", 74, 72),
+            DeviceChange("sns_1", "value", 75, 76),
+        }
+        assert system.devices["swc"].state == "50"
+        assert sns_1.updated_at["value"] == 130
+        assert system.shadow_stats.attributes_unchanged == 3
+
+        # Set during the second the previous shadow was taken, possibly
+        # after it.
+        swc_0_metadata["swc"] = {"timestamp": 140}
+        changes = system._parse_shadow_data(sample)
+        assert changes == [DeviceChange("swc", "state", 50, 60)]
+
+    async def test_parse_shadow_metadata_heating(self):
+        data = {"id": 1, "serial_number": "ABCDEFG", "device_type": "exo"}
+        system = ExoSystem.from_data(MagicMock(), data)
+
+        sample = copy.deepcopy(SAMPLE_DATA)
+        heating = {"sp": 28, "enabled": 0, "state": 0}
+        sample["state"]["reported"]["heating"] = heating
+        heating_metadata = {k: {"timestamp": 100} for k in heating}
+        sample["metadata"] = {"reported": {"heating": heating_metadata}}
+        sample["timestamp"] = 120
+        system._parse_shadow_data(sample)
+        assert system.devices["heater"].updated_at == {"state": 100}
+
+        heating["state"] = 1
+        heating_metadata["state"] = {"timestamp": 130}
+        changes = system._parse_shadow_data(sample)
+        assert set(changes) == {
+            DeviceChange("heating", "state", 0, 1),
+            DeviceChange("heater", "state", 0, 1),
+        }
+        assert system.devices["heating"].updated_at["state"] == 130
+
+    async def test_parse_shadow_response(self):
+        data = {"id": 1, "serial_number": "ABCDEFG", "device_type": "exo"}
+        system = ExoSystem.from_data(MagicMock(), data)
+
+        response = httpx.Response(status_code=200, json=SAMPLE_DATA)
+        system._parse_shadow_response(response)
+        assert system.devices["swc"].data == {"name": "swc", "state": 50}
+        assert system.devices["sns_1"].data == {
+            "name": "sns_1",
+            "state": 1,
+            "value": 75,
+            "sensor_type": "Ph",
+        }
+
     @patch("httpx.AsyncClient.request")
     async def test_reported_state_request(self, mock_request):
         data = {"id": 1, "serial_number": "ABCDEFG", "device_type": "exo"}
@@ -255,3 +528,59 @@ class TestExoSystem(unittest.IsolatedAsyncioTestCase):
 
         with pytest.raises(AqualinkServiceUnauthorizedException):
             await system.send_reported_state_request()
+
+    @respx.mock
+    async def test_devices_request_unauthorized_single_login(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        aqualink = AqualinkClient("user", "pass")
+        systems = [
+            ExoSystem.from_data(
+                aqualink,
+                {"serial_number": f"SN{i}", "device_type": "exo"},
+            )
+            for i in range(5)
+        ]
+
+        async def login(_: httpx.Request) -> httpx.Response:
+            await asyncio.sleep(0.01)
+            return httpx.Response(status_code=200, json=LOGIN_DATA)
+
+        def shadow(request: httpx.Request) -> httpx.Response:
+            if request.headers["Authorization"] == "new":
+                return httpx.Response(status_code=200, json={})
+            return httpx.Response(status_code=401)
+
+        login_route = respx_mock.post(AQUALINK_LOGIN_URL).mock(
+            side_effect=login
+        )
+        respx_mock.get(url__startswith=EXO_DEVICES_URL).mock(side_effect=shadow)
+
+        await asyncio.gather(
+            *[x.send_reported_state_request() for x in systems]
+        )
+
+        assert login_route.call_count == 1
+        assert aqualink.tokens.metrics.refreshes == 1
+
+    @respx.mock
+    async def test_devices_request_refreshes_expired_token(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        aqualink = AqualinkClient("user", "pass")
+        aqualink.tokens.set_token(make_jwt({"exp": time.time() - 1}))
+        system = ExoSystem.from_data(
+            aqualink, {"serial_number": "SN", "device_type": "exo"}
+        )
+
+        login_route = respx_mock.post(AQUALINK_LOGIN_URL).mock(
+            httpx.Response(status_code=200, json=LOGIN_DATA)
+        )
+        shadow_route = respx_mock.get(url__startswith=EXO_DEVICES_URL).mock(
+            httpx.Response(status_code=200, json={})
+        )
+
+        await system.send_reported_state_request()
+
+        assert login_route.call_count == 1
+        assert shadow_route.calls.last.request.headers["Authorization"] == "new"
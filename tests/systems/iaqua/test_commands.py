@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, cast
+from unittest.mock import patch
+
+import pytest
+
+from iaqualink.exception import AqualinkServiceException
+
+from ...base import TestBaseSimulator
+
+if TYPE_CHECKING:
+    from iaqualink.simulator import SimulatedIaquaSystem
+    from iaqualink.systems.iaqua.device import (
+        IaquaDimmableLight,
+        IaquaThermostat,
+    )
+    from iaqualink.systems.iaqua.system import IaquaSystem
+
+
+class TestIaquaCommandQueue(TestBaseSimulator):
+    iaqua_systems = 1
+    serial = "IAQUA00000"
+    system: IaquaSystem
+
+    async def test_single_command(self) -> None:
+        await self.system.set_aux("aux_4")
+
+        assert self.system.devices["aux_4"].is_on is True
+        assert self.system.commands.stats.batches == 1
+        assert self.system.commands.stats.parsed == 1
+
+    async def test_scene(self) -> None:
+        devices = self.system.devices
+        pool = cast("IaquaThermostat", devices["pool_set_point"])
+        spa = cast("IaquaThermostat", devices["spa_set_point"])
+        light = cast("IaquaDimmableLight", devices["aux_2"])
+
+        await asyncio.gather(
+            self.system.set_aux("aux_4"),
+            self.system.set_aux("aux_5"),
+            pool.set_temperature(90),
+            spa.set_temperature(100),
+            light.set_brightness(25),
+            light.set_brightness(75),
+        )
+
+        requests = self.simulator.stats.requests
+        assert requests["cmd:set_aux_4"] == 1
+        assert requests["cmd:set_aux_5"] == 1
+        assert requests["cmd:set_temps"] == 1
+        assert requests["cmd:set_light"] == 1
+
+        stats = self.system.commands.stats
+        assert stats.submitted == 6
+        assert stats.coalesced == 2
+        assert stats.sent == 4
+        assert stats.batches == 1
+        # The home screen of set_temps, the last devices screen of the aux
+        # toggles, and the light response, whose screen varies.
+        assert stats.parsed == 3
+
+        assert devices["aux_4"].is_on is True
+        assert devices["aux_5"].is_on is True
+        assert pool.target_temperature == "90"
+        assert spa.target_temperature == "100"
+        assert light.brightness == 75
+
+    async def test_same_device_in_order(self) -> None:
+        # Toggles aren't merged, the aux is toggled twice.
+        await asyncio.gather(
+            self.system.set_aux("aux_4"),
+            self.system.set_aux("aux_4"),
+        )
+
+        assert self.simulator.stats.requests["cmd:set_aux_4"] == 2
+        assert self.system.devices["aux_4"].is_on is False
+
+    async def test_window(self) -> None:
+        self.system.commands.window = 0.01
+
+        async def later() -> None:
+            await asyncio.sleep(0)
+            await self.system.set_aux("aux_5")
+
+        await asyncio.gather(self.system.set_aux("aux_4"), later())
+
+        assert self.system.commands.stats.batches == 1
+
+    async def test_failure(self) -> None:
+        send = self.system._send_session_request
+
+        async def side_effect(command: str, params: dict[str, str]) -> object:
+            if command == "set_aux_5":
+                m = "boom"
+                raise AqualinkServiceException(m)
+            return await send(command, params)
+
+        with patch.object(
+            self.system, "_send_session_request", side_effect=side_effect
+        ):
+            results = await asyncio.gather(
+                self.system.set_aux("aux_4"),
+                self.system.set_aux("aux_5"),
+                return_exceptions=True,
+            )
+
+        assert results[0] is None
+        assert isinstance(results[1], AqualinkServiceException)
+        assert self.system.devices["aux_4"].is_on is True
+        assert self.system.devices["aux_5"].is_on is False
+
+    async def test_last_sent_screen_parsed(self) -> None:
+        send = self.system._send_session_request
+        parsed = []
+
+        async def side_effect(command: str, params: dict[str, str]) -> object:
+            # The first command sent gets its response last.
+            if command == "set_aux_4":
+                await asyncio.sleep(0.01)
+            r = await send(command, params)
+            r.command = command  # type: ignore[attr-defined]
+            return r
+
+        def parse(r: object, screen: str | None) -> list[object]:
+            parsed.append(r.command)  # type: ignore[attr-defined]
+            return []
+
+        with (
+            patch.object(
+                self.system, "_send_session_request", side_effect=side_effect
+            ),
+            patch.object(
+                self.system, "_parse_command_response", side_effect=parse
+            ),
+        ):
+            await asyncio.gather(
+                self.system.set_aux("aux_4"),
+                self.system.set_aux("aux_5"),
+            )
+
+        assert parsed == ["set_aux_5"]
+
+    async def test_same_aux_lane(self) -> None:
+        light = cast("IaquaDimmableLight", self.system.devices["aux_2"])
+        running = 0
+        overlapped = False
+        send = self.system._send_session_request
+
+        async def side_effect(command: str, params: dict[str, str]) -> object:
+            nonlocal running, overlapped
+            running += 1
+            overlapped |= running > 1
+            try:
+                await asyncio.sleep(0)
+                return await send(command, params)
+            finally:
+                running -= 1
+
+        with patch.object(
+            self.system, "_send_session_request", side_effect=side_effect
+        ):
+            await asyncio.gather(
+                self.system.set_aux("aux_2"), light.set_brightness(50)
+            )
+
+        assert not overlapped
+
+    async def test_cancelled(self) -> None:
+        async def side_effect(command: str, params: dict[str, str]) -> object:
+            await asyncio.sleep(60)
+
+        with patch.object(
+            self.system, "_send_session_request", side_effect=side_effect
+        ):
+            command = asyncio.create_task(self.system.set_aux("aux_4"))
+            await asyncio.sleep(0)
+            flush = self.system.commands._task
+            assert flush is not None
+            while not self.system.commands.stats.sent:
+                await asyncio.sleep(0)
+            flush.cancel()
+
+            with pytest.raises(asyncio.CancelledError):
+                async with asyncio.timeout(1):
+                    await command
+
+    async def test_offline(self) -> None:
+        self.simulator.set_online(self.system.serial, False)
+
+        with pytest.raises(AqualinkServiceException):
+            await asyncio.gather(
+                self.system.set_aux("aux_4"),
+                self.system.set_aux("aux_5"),
+            )
+
+
+class TestIaquaToggles(TestBaseSimulator):
+    iaqua_systems = 1
+    serial = "IAQUA00000"
+    system: IaquaSystem
+
+    async def test_concurrent_turn_on(self) -> None:
+        aux = self.system.devices["aux_4"]
+        await asyncio.gather(aux.turn_on(), aux.turn_on(), aux.turn_on())
+
+        assert self.simulator.stats.requests["cmd:set_aux_4"] == 1
+        assert aux.is_on is True
+
+    async def test_turn_on_then_off(self) -> None:
+        pump = self.system.devices["spa_pump"]
+        await asyncio.gather(pump.turn_on(), pump.turn_off())
+
+        assert self.simulator.stats.requests["cmd:set_spa_pump"] == 2
+        assert pump.is_on is False
+
+    async def test_optimistic_state(self) -> None:
+        heater = self.system.devices["pool_heater"]
+        changes = []
+        heater.add_listener(changes.extend, weak=False)
+
+        task = asyncio.create_task(heater.turn_on())
+        await asyncio.sleep(0)
+        # Visible before the command was even sent.
+        assert heater.is_on is True
+        assert heater.state == "3"
+        await task
+
+        assert heater.is_on is True
+        assert changes[0].new == "3"
+
+    async def test_reconciled_by_refresh(self) -> None:
+        aux = self.system.devices["aux_4"]
+        await aux.turn_on()
+        assert self.system._pending
+
+        # Someone turned it back off from the panel.
+        simulated = self.simulator.systems[self.system.serial]
+        cast("SimulatedIaquaSystem", simulated).aux["aux_4"]["state"] = "0"
+        self.system.last_refresh = 0
+        await self.system.update()
+
+        assert self.system._pending == {}
+        assert aux.is_on is False
+
+    async def test_failed_command_reverted(self) -> None:
+        aux = self.system.devices["aux_4"]
+        self.simulator.set_online(self.system.serial, False)
+
+        with pytest.raises(AqualinkServiceException):
+            await aux.turn_on()
+
+        assert aux.is_on is False
+        assert self.system._pending == {}
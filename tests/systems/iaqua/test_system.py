@@ -1,17 +1,23 @@
 from __future__ import annotations
 
+import asyncio
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
+import respx
+import respx.router
 
 from iaqualink.exception import (
+    AqualinkServiceException,
     AqualinkServiceUnauthorizedException,
     AqualinkSystemOfflineException,
 )
-from iaqualink.system import AqualinkSystem
+from iaqualink.system import AqualinkSystem, DeviceChange
 from iaqualink.systems.iaqua.device import IaquaAuxSwitch
 from iaqualink.systems.iaqua.system import IaquaSystem
 
+from ...base import dotstar, resp_200
 from ...base_test_system import TestBaseSystem
 
 
@@ -57,6 +63,38 @@ class TestIaquaSystem(TestBaseSystem):
         ):
             await super().test_update_consecutive()
 
+    async def test_update_single_flight(self) -> None:
+        with (
+            patch.object(self.sut, "_parse_home_response"),
+            patch.object(self.sut, "_parse_devices_response"),
+        ):
+            await super().test_update_single_flight()
+
+    @respx.mock
+    async def test_update_single_flight_exception(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        respx_mock.route(dotstar).mock(resp_200)
+        with patch.object(self.sut, "_parse_home_response") as mock_parse:
+            mock_parse.side_effect = AqualinkSystemOfflineException
+            results = await asyncio.gather(
+                *[self.sut.update() for _ in range(3)],
+                return_exceptions=True,
+            )
+        assert all(
+            isinstance(x, AqualinkSystemOfflineException) for x in results
+        )
+        assert mock_parse.call_count == 1
+        assert self.sut.update_stats.coalesced == 2
+
+    async def test_update_throttled(self) -> None:
+        with (
+            patch.object(self.sut, "_parse_home_response"),
+            patch.object(self.sut, "_parse_devices_response"),
+        ):
+            await super().test_update_consecutive()
+        assert self.sut.update_stats.throttled == 1
+
     async def test_get_devices_needs_update(self) -> None:
         with (
             patch.object(self.sut, "_parse_home_response"),
@@ -64,10 +102,68 @@ class TestIaquaSystem(TestBaseSystem):
         ):
             await super().test_get_devices_needs_update()
 
+    async def test_update_concurrent(self) -> None:
+        self.sut.concurrent_update = True
+        with (
+            patch.object(self.sut, "_parse_home_response"),
+            patch.object(self.sut, "_parse_devices_response"),
+        ):
+            await super().test_update_success()
+        commands = {x.request.url.params["command"] for x in self.respx_calls}
+        assert commands == {"get_home", "get_devices"}
+        assert self.sut.online is True
+
+    @respx.mock
+    async def test_update_concurrent_overlaps(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        in_flight = 0
+        peak = 0
+
+        async def side_effect(_: httpx.Request) -> httpx.Response:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(status_code=200, json={})
+
+        respx_mock.route(dotstar).mock(side_effect=side_effect)
+        self.sut.concurrent_update = True
+        with (
+            patch.object(self.sut, "_parse_home_response"),
+            patch.object(self.sut, "_parse_devices_response"),
+        ):
+            await self.sut.update()
+        assert peak == 2
+
+    async def test_update_concurrent_offline(self) -> None:
+        self.sut.concurrent_update = True
+        with patch.object(self.sut, "_parse_home_response") as mock_parse:
+            mock_parse.side_effect = AqualinkSystemOfflineException
+            with pytest.raises(AqualinkSystemOfflineException):
+                await super().test_update_success()
+            assert self.sut.online is False
+
+    @respx.mock
+    async def test_update_concurrent_service_exception(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        respx_mock.route(params={"command": "get_home"}).mock(
+            httpx.Response(status_code=200, json={})
+        )
+        respx_mock.route(params={"command": "get_devices"}).mock(
+            httpx.Response(status_code=500)
+        )
+        self.sut.concurrent_update = True
+        with pytest.raises(AqualinkServiceException):
+            await self.sut.update()
+        assert len(respx_mock.calls) == 2
+        assert self.sut.online is None
+
     async def test_parse_devices_offline(self) -> None:
         message = {"message": "", "devices_screen": [{"status": "Offline"}]}
-        response = MagicMock()
-        response.json.return_value = message
+        response = httpx.Response(status_code=200, json=message)
 
         with pytest.raises(AqualinkSystemOfflineException):
             self.sut._parse_devices_response(response)
@@ -91,8 +187,7 @@ class TestIaquaSystem(TestBaseSystem):
                 },
             ],
         }
-        response = MagicMock()
-        response.json.return_value = message
+        response = httpx.Response(status_code=200, json=message)
 
         expected = {
             "aux_B1": IaquaAuxSwitch(
@@ -111,6 +206,41 @@ class TestIaquaSystem(TestBaseSystem):
         self.sut._parse_devices_response(response)
         assert self.sut.devices == expected
 
+    async def test_parse_devices_changes(self) -> None:
+        message = {
+            "message": "",
+            "devices_screen": [
+                {"status": "Online"},
+                {"response": ""},
+                {"group": "1"},
+                {"aux_B1": [{"state": "0"}, {"type": "0"}, {"label": "B1"}]},
+                {"aux_B2": [{"state": "0"}, {"type": "0"}, {"label": "B2"}]},
+            ],
+        }
+
+        changes = self.sut._parse_devices_data(message)
+        assert {x.device for x in changes} == {"aux_B1", "aux_B2"}
+        assert all(x.old is None for x in changes)
+
+        message["devices_screen"][4] = {
+            "aux_B2": [{"state": "1"}, {"type": "0"}, {"label": "B2"}]
+        }
+        changes = self.sut._parse_devices_data(message)
+        assert changes == [DeviceChange("aux_B2", "state", "0", "1")]
+
+    async def test_update_notifies_changes(self) -> None:
+        change = DeviceChange("aux_B1", "state", "0", "1")
+        callback = MagicMock()
+        self.sut.subscribe(callback)
+        with (
+            patch.object(self.sut, "_parse_home_response", return_value=[]),
+            patch.object(
+                self.sut, "_parse_devices_response", return_value=[change]
+            ),
+        ):
+            await super().test_update_success()
+        callback.assert_called_once_with([change])
+
     @patch("httpx.AsyncClient.request")
     async def test_home_request(self, mock_request) -> None:
         mock_request.return_value.status_code = 200
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+
+from iaqualink.auth import AqualinkTokenManager, jwt_expiry
+from iaqualink.exception import AqualinkServiceUnauthorizedException
+
+from .base import TestBase
+
+
+def make_jwt(claims: dict) -> str:
+    def encode(x: dict) -> str:
+        raw = base64.urlsafe_b64encode(json.dumps(x).encode())
+        return raw.decode().rstrip("=")
+
+    return f"{encode({'alg': 'none'})}.{encode(claims)}.signature"
+
+
+class TestJwtExpiry(TestBase):
+    def test_expiry(self) -> None:
+        assert jwt_expiry(make_jwt({"exp": 1234567890})) == 1234567890
+
+    def test_no_expiry(self) -> None:
+        assert jwt_expiry(make_jwt({"sub": "foo"})) is None
+
+    def test_invalid(self) -> None:
+        assert jwt_expiry("") is None
+        assert jwt_expiry("userPoolOAuth:IdToken") is None
+        assert jwt_expiry("a.!!!.c") is None
+
+
+class TestAqualinkTokenManager(TestBase):
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.login = AsyncMock()
+        self.sut = AqualinkTokenManager(self.login, margin=60)
+        self.addAsyncCleanup(self.sut.stop)
+
+    def test_needs_refresh_unknown_expiry(self) -> None:
+        self.sut.set_token("opaque")
+        assert self.sut.expires_at is None
+        assert self.sut.needs_refresh is False
+
+    def test_needs_refresh_within_margin(self) -> None:
+        self.sut.set_token(make_jwt({"exp": time.time() + 30}))
+        assert self.sut.needs_refresh is True
+
+    def test_needs_refresh_valid(self) -> None:
+        self.sut.set_token(make_jwt({"exp": time.time() + 3600}))
+        assert self.sut.needs_refresh is False
+
+    def test_needs_refresh_invalidated(self) -> None:
+        self.sut.set_token(make_jwt({"exp": time.time() + 3600}))
+        self.sut.invalidate()
+        assert self.sut.needs_refresh is True
+
+    async def test_ensure_valid_noop(self) -> None:
+        self.sut.set_token(make_jwt({"exp": time.time() + 3600}))
+        await self.sut.ensure_valid()
+        self.login.assert_not_awaited()
+
+    async def test_ensure_valid_refresh(self) -> None:
+        self.sut.set_token(make_jwt({"exp": time.time() - 1}))
+        await self.sut.ensure_valid()
+        self.login.assert_awaited_once()
+        assert self.sut.metrics.refreshes == 1
+        assert self.sut.metrics.last_latency is not None
+
+    async def test_refresh_single_flight(self) -> None:
+        async def login() -> None:
+            await asyncio.sleep(0.01)
+
+        self.login.side_effect = login
+        await asyncio.gather(*[self.sut.refresh() for _ in range(10)])
+
+        self.login.assert_awaited_once()
+        assert self.sut.metrics.refreshes == 1
+        assert self.sut.metrics.coalesced == 9
+
+    async def test_refresh_failure(self) -> None:
+        self.login.side_effect = RuntimeError
+        with pytest.raises(RuntimeError):
+            await asyncio.gather(self.sut.refresh(), self.sut.refresh())
+        assert self.sut.metrics.failures == 1
+        assert self.sut.metrics.refreshes == 0
+
+    async def test_refresh_if_stale(self) -> None:
+        generation = self.sut.generation
+        self.sut.set_token("opaque")
+
+        await self.sut.refresh_if_stale(generation)
+        self.login.assert_not_awaited()
+
+        await self.sut.refresh_if_stale(self.sut.generation)
+        self.login.assert_awaited_once()
+
+    async def test_background_refresh(self) -> None:
+        async def login() -> None:
+            self.sut.set_token(make_jwt({"exp": time.time() + 3600}))
+
+        self.login.side_effect = login
+        self.sut.set_token(make_jwt({"exp": time.time() + 60.05}))
+        self.sut.start()
+
+        await asyncio.sleep(0.2)
+
+        self.login.assert_awaited_once()
+        assert self.sut.needs_refresh is False
+
+    async def test_background_refresh_invalidated(self) -> None:
+        self.sut.start()
+        await asyncio.sleep(0)
+        self.sut.invalidate()
+        await asyncio.sleep(0.01)
+        self.login.assert_awaited_once()
+
+    async def test_background_refresh_rejected(self) -> None:
+        self.login.side_effect = AqualinkServiceUnauthorizedException
+        self.sut.start()
+        await asyncio.sleep(0)
+        self.sut.invalidate()
+        with self.assertLogs("iaqualink", "ERROR"):
+            await asyncio.sleep(0.01)
+
+        self.login.assert_awaited_once()
+        assert self.sut._background_task is not None
+        assert self.sut._background_task.done()
+        with pytest.raises(AqualinkServiceUnauthorizedException):
+            await self.sut.ensure_valid()
+        with pytest.raises(AqualinkServiceUnauthorizedException):
+            await self.sut.refresh_if_stale(self.sut.generation)
+        self.login.assert_awaited_once()
+
+        # Logging in again explicitly clears the error.
+        self.login.side_effect = None
+        await self.sut.refresh()
+        assert self.sut.error is None
+        await self.sut.ensure_valid()
+
+    async def test_background_refresh_retried(self) -> None:
+        self.sut.retry_delay = 0.001
+        self.login.side_effect = [RuntimeError, RuntimeError, None]
+        self.sut.start()
+        await asyncio.sleep(0)
+        self.sut.invalidate()
+        with self.assertLogs("iaqualink", "WARNING"):
+            await asyncio.sleep(0.05)
+
+        assert self.login.await_count == 3
+        assert not self.sut._background_task.done()
+
+    def test_retry_backoff(self) -> None:
+        self.sut.retry_delay = 30
+        self.sut.max_retry_delay = 100
+        delays = [self.sut._next_retry_delay(x) for x in range(1, 5)]
+        assert delays == [30, 60, 100, 100]
+
+    async def test_stop(self) -> None:
+        self.sut.start()
+        await self.sut.stop()
+        assert self.sut._background_task is None
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from typing import TYPE_CHECKING, cast
+from unittest.mock import patch
+
+from iaqualink.cache import AqualinkCache
+from iaqualink.simulator import AqualinkSimulator
+from iaqualink.systems.iaqua.device import IaquaAuxSwitch
+
+if TYPE_CHECKING:
+    from iaqualink.client import AqualinkClient
+    from iaqualink.simulator import SimulatedIaquaSystem
+    from iaqualink.system import DeviceChange
+
+
+class TestAqualinkCache(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "iaqualink" / "cache.json"
+
+        self.simulator = AqualinkSimulator(iaqua_systems=1, exo_systems=1)
+
+        # Populate the cache like a previous run would have.
+        client = self.client()
+        await client.login()
+        await client.update_all()
+        self.saved = {
+            serial: {k: dict(v.data) for k, v in system.devices.items()}
+            for serial, system in (await client.get_systems()).items()
+        }
+        await client.close()
+        self.simulator.stats.requests.clear()
+
+    def client(self, username: str = "user") -> AqualinkClient:
+        client = self.simulator.client(username)
+        client.cache = AqualinkCache(self.path)
+        self.addAsyncCleanup(client.close)
+        return client
+
+    async def test_restore(self) -> None:
+        client = self.client()
+        systems = await client.load_cache()
+
+        assert not self.simulator.stats.requests
+        assert set(systems) == {"IAQUA00000", "EXO00000"}
+        for serial, system in systems.items():
+            assert system.online is None
+            devices = {k: dict(v.data) for k, v in system.devices.items()}
+            assert devices == self.saved[serial]
+
+        iaqua = systems["IAQUA00000"]
+        assert isinstance(iaqua.devices["aux_4"], IaquaAuxSwitch)
+        assert iaqua.temp_unit == "F"
+
+    async def test_refresh(self) -> None:
+        client = self.client()
+        systems = await client.load_cache()
+        system = systems["IAQUA00000"]
+        aux = system.devices["aux_4"]
+        changes: list[DeviceChange] = []
+        system.add_listener(changes.extend, weak=False)
+
+        simulated = self.simulator.systems[system.serial]
+        cast("SimulatedIaquaSystem", simulated).aux["aux_4"]["state"] = "1"
+
+        await client.login()
+        assert await client.get_systems() == systems
+        await system.update()
+
+        # Same objects, only the differences are reported.
+        assert system.devices["aux_4"] is aux
+        assert system.online is True
+        assert [(x.device, x.new) for x in changes] == [("aux_4", "1")]
+
+    async def test_saved_on_change(self) -> None:
+        client = self.client()
+        await client.load_cache()
+        await client.login()
+        await client.get_systems()
+        save = patch.object(client.cache, "save", wraps=client.cache.save)
+
+        with save as mock:
+            await client.update_all()
+            assert mock.call_count == 0
+
+            simulated = self.simulator.systems["IAQUA00000"]
+            cast("SimulatedIaquaSystem", simulated).aux["aux_4"]["state"] = "1"
+            for system in (await client.get_systems()).values():
+                system.last_refresh = 0
+            await client.update_all()
+            assert mock.call_count == 1
+
+            await client.close()
+            assert mock.call_count == 1
+
+    async def test_removed_device(self) -> None:
+        data = json.loads(self.path.read_text())
+        entry = data["systems"][0]
+        assert entry["data"]["serial_number"] == "IAQUA00000"
+        device = next(
+            x for x in entry["devices"] if x["data"]["name"] == "aux_4"
+        )
+        gone = {
+            **device,
+            "key": "aux_99",
+            "data": {**device["data"], "name": "aux_99"},
+        }
+        entry["devices"].append(gone)
+        self.path.write_text(json.dumps(data))
+
+        client = self.client()
+        system = (await client.load_cache())["IAQUA00000"]
+        assert "aux_99" in system.devices
+
+        await client.login()
+        await client.get_systems()
+        await system.update()
+
+        assert "aux_99" not in system.devices
+        assert ("aux_99", "state", "0", None) in system.last_changes
+
+    async def test_unknown_device_class(self) -> None:
+        data = json.loads(self.path.read_text())
+        for entry in data["systems"]:
+            for device in entry["devices"]:
+                device["class"] = "iaqualink.gone.Device"
+        self.path.write_text(json.dumps(data))
+
+        systems = await self.client().load_cache()
+
+        assert set(systems) == {"IAQUA00000", "EXO00000"}
+        assert all(not x.devices for x in systems.values())
+
+    async def test_ignored(self) -> None:
+        assert await self.client("someone").load_cache() == {}
+
+        client = self.client()
+        client.cache = AqualinkCache(self.path, max_age=0)
+        assert await client.load_cache() == {}
+
+        self.path.write_text("{")
+        assert await self.client().load_cache() == {}
+
+        self.path.write_text("[]")
+        assert await self.client().load_cache() == {}
+
+        # Truncated in the middle of a character.
+        self.path.write_bytes(b'{"version": "\xc3')
+        assert await self.client().load_cache() == {}
+
+        self.path.unlink()
+        assert await self.client().load_cache() == {}
+
+    async def test_unreadable(self) -> None:
+        self.path.unlink()
+        self.path.mkdir()
+
+        with self.assertLogs("iaqualink", "WARNING"):
+            assert await self.client().load_cache() == {}
+
+    async def test_no_cache(self) -> None:
+        client = self.simulator.client()
+        self.addAsyncCleanup(client.close)
+
+        assert await client.load_cache() == {}
+        await client.save_cache()
@@ -10,6 +10,7 @@ from iaqualink.exception import (
     AqualinkServiceException,
     AqualinkServiceUnauthorizedException,
 )
+from iaqualink.systems.iaqua.system import IaquaSystem
 
 from .base import TestBase
 from .common import async_noop, async_raises
@@ -144,3 +145,34 @@ class TestAqualinkClient(TestBase):
 
         with pytest.raises(AqualinkServiceUnauthorizedException):
             await self.client.get_systems()
+
+    @patch("httpx.AsyncClient.request")
+    async def test_update_all(self, mock_request) -> None:
+        mock_request.return_value.status_code = 200
+        mock_request.return_value.json = MagicMock(return_value=LOGIN_DATA)
+
+        await self.client.login()
+
+        mock_request.return_value.json.return_value = [
+            {"device_type": "iaqua", "serial_number": "SN1"},
+            {"device_type": "iaqua", "serial_number": "SN2"},
+        ]
+
+        with patch.object(IaquaSystem, "update", async_noop):
+            result = await self.client.update_all()
+            # Systems are only retrieved once.
+            await self.client.update_all()
+
+        assert set(result.results) == {"SN1", "SN2"}
+        assert len(result.succeeded) == 2
+        assert mock_request.call_count == 2
+
+    @patch("httpx.AsyncClient.request")
+    async def test_request_headers_not_shared(self, mock_request) -> None:
+        mock_request.return_value.status_code = 200
+
+        await self.client.send_request("foo", headers={"Authorization": "x"})
+        await self.client.send_request("bar")
+
+        headers = mock_request.call_args.kwargs["headers"]
+        assert "Authorization" not in headers
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import unittest
+
+import pytest
+
+from iaqualink.debug import PayloadSampler
+from iaqualink.exception import AqualinkInvalidParameterException
+from iaqualink.simulator import AqualinkSimulator
+
+
+class TestPayloadSampler(unittest.TestCase):
+    def test_every(self) -> None:
+        sampler = PayloadSampler(every=3)
+        for i in range(7):
+            sampler.record("SN", "home", {"i": i})
+        assert [x.data["i"] for x in sampler.samples] == [0, 3, 6]
+        assert all(x.serial == "SN" for x in sampler.samples)
+        assert all(x.kind == "home" for x in sampler.samples)
+
+    def test_counted_per_kind(self) -> None:
+        sampler = PayloadSampler(every=2)
+        for i in range(4):
+            sampler.record("SN", "home", {"i": i})
+            sampler.record("SN", "devices", {"i": i})
+        samples = [(x.kind, x.data["i"]) for x in sampler.samples]
+        assert samples == [
+            ("home", 0),
+            ("devices", 0),
+            ("home", 2),
+            ("devices", 2),
+        ]
+
+    def test_ring_buffer(self) -> None:
+        sampler = PayloadSampler(every=1, maxlen=2)
+        for i in range(5):
+            sampler.record("SN", "shadow", {"i": i})
+        assert [x.data["i"] for x in sampler.samples] == [3, 4]
+
+    def test_copied(self) -> None:
+        sampler = PayloadSampler(every=1)
+        data = {"aux_1": {"state": "0"}}
+        sampler.record("SN", "devices", data)
+        data["aux_1"]["name"] = "aux_1"
+        assert sampler.samples[0].data == {"aux_1": {"state": "0"}}
+
+    def test_clear(self) -> None:
+        sampler = PayloadSampler(every=2)
+        sampler.record("SN", "home", {})
+        sampler.clear()
+        assert not sampler.samples
+        sampler.record("SN", "home", {})
+        assert len(sampler.samples) == 1
+
+    def test_invalid(self) -> None:
+        with pytest.raises(AqualinkInvalidParameterException):
+            PayloadSampler(every=0)
+        with pytest.raises(AqualinkInvalidParameterException):
+            PayloadSampler(maxlen=0)
+
+
+class TestPayloadSampling(unittest.IsolatedAsyncioTestCase):
+    async def test_systems_update(self) -> None:
+        simulator = AqualinkSimulator(iaqua_systems=1, exo_systems=1)
+        client = simulator.client()
+        self.addAsyncCleanup(client.close)
+        client.payload_sampler = sampler = PayloadSampler(every=2)
+
+        await client.login()
+        systems = await client.get_systems()
+        for _ in range(3):
+            for system in systems.values():
+                system.last_refresh = 0
+                await system.update()
+
+        samples = [(x.serial, x.kind) for x in sampler.samples]
+        assert samples.count(("IAQUA00000", "home")) == 2
+        assert samples.count(("IAQUA00000", "devices")) == 2
+        assert samples.count(("EXO00000", "shadow")) == 2
+        assert "home_screen" in sampler.samples[0].data
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from iaqualink.exception import (
+    AqualinkInvalidParameterException,
+    AqualinkServiceException,
+)
+from iaqualink.group import AqualinkSystemGroup
+from iaqualink.system import AqualinkSystem
+
+from .base import TestBase
+from .common import async_noop, async_raises
+
+
+class TestAqualinkSystemGroup(TestBase):
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.systems = [
+            AqualinkSystem(
+                self.client, {"serial_number": f"SN{i}", "name": f"Pool {i}"}
+            )
+            for i in range(5)
+        ]
+
+    def test_invalid_concurrency(self) -> None:
+        with pytest.raises(AqualinkInvalidParameterException):
+            AqualinkSystemGroup(self.systems, concurrency=0)
+
+    def test_membership(self) -> None:
+        group = AqualinkSystemGroup(self.systems[:2])
+        assert len(group) == 2
+        group.add(self.systems[2])
+        assert self.systems[2] in group
+        group.remove(self.systems[0])
+        assert list(group) == self.systems[1:3]
+
+    async def test_update_success(self) -> None:
+        group = AqualinkSystemGroup(self.systems)
+        with patch.object(AqualinkSystem, "update", async_noop):
+            result = await group.update()
+
+        assert len(result.results) == 5
+        assert len(result.succeeded) == 5
+        assert result.failed == []
+        assert result.elapsed >= 0
+        assert all(x.latency >= 0 for x in result.results.values())
+
+    async def test_update_partial_failure(self) -> None:
+        group = AqualinkSystemGroup(self.systems)
+        with patch.object(AqualinkSystem, "update", async_noop):
+            self.systems[1].update = async_raises(AqualinkServiceException)
+            self.systems[3].update = async_raises(RuntimeError)
+            result = await group.update()
+
+        assert len(result.succeeded) == 3
+        assert {x.system.serial for x in result.failed} == {"SN1", "SN3"}
+        assert isinstance(
+            result.results["SN1"].exception, AqualinkServiceException
+        )
+        assert isinstance(result.results["SN3"].exception, RuntimeError)
+
+    async def test_update_concurrency_limit(self) -> None:
+        in_flight = 0
+        peak = 0
+
+        async def update(_: AqualinkSystem) -> None:
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+
+        group = AqualinkSystemGroup(self.systems, concurrency=2)
+        with patch.object(AqualinkSystem, "update", update):
+            result = await group.update()
+
+        assert peak == 2
+        assert len(result.succeeded) == 5
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+import respx
+import respx.router
+
+from iaqualink.client import AqualinkClient
+from iaqualink.exception import AqualinkServiceException
+from iaqualink.instrumentation import (
+    LatencyHistogram,
+    RequestInfo,
+    RequestMetrics,
+)
+
+SESSION_URL = (
+    "https://p-api.iaqualink.net/v1/mobile/session.json"
+    "?actionID=command&command=get_home&serial=SN"
+)
+
+
+class TestRequestInfo(unittest.TestCase):
+    def test_endpoints(self) -> None:
+        urls = {
+            "https://prod.zodiac-io.com/users/v1/login": "login",
+            "https://r-api.iaqualink.net/devices.json?user_id=1": "devices",
+            SESSION_URL: "session",
+            "https://prod.zodiac-io.com/devices/v1/SN/shadow": "shadow",
+            "https://example.com/": "other",
+        }
+        for url, endpoint in urls.items():
+            assert RequestInfo.from_request("get", url).endpoint == endpoint
+
+    def test_command(self) -> None:
+        info = RequestInfo.from_request("get", SESSION_URL)
+        assert info.method == "GET"
+        assert info.command == "get_home"
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_empty(self) -> None:
+        histogram = LatencyHistogram()
+        assert histogram.quantile(0.99) == 0.0
+        assert histogram.mean == 0.0
+
+    def test_quantile(self) -> None:
+        histogram = LatencyHistogram(bounds=(0.1, 1.0))
+        for _ in range(98):
+            histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(3.0)
+
+        assert histogram.counts == [98, 1, 1]
+        assert histogram.quantile(0.5) == 0.1
+        assert histogram.quantile(0.99) == 1.0
+        assert histogram.quantile(1.0) == 3.0
+        assert histogram.max == 3.0
+
+
+class TestClientObservers(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.client = AqualinkClient("foo", "bar")
+        self.addAsyncCleanup(self.client.close)
+
+    @respx.mock
+    async def test_observer(self, respx_mock: respx.router.MockRouter) -> None:
+        respx_mock.get(SESSION_URL).mock(
+            httpx.Response(status_code=200, content=b'{"a": 1}')
+        )
+        observer = MagicMock()
+        self.client.add_observer(observer)
+
+        await self.client.send_request(SESSION_URL)
+
+        observer.request_started.assert_called_once()
+        info = observer.request_finished.call_args.args[0]
+        assert info.status == 200
+        assert info.response_bytes == 8
+        assert info.latency > 0
+        assert info.success is True
+
+    @respx.mock
+    async def test_metrics(self, respx_mock: respx.router.MockRouter) -> None:
+        route = respx_mock.get(SESSION_URL)
+        route.side_effect = [
+            httpx.Response(status_code=200, json={}),
+            httpx.Response(status_code=500),
+            httpx.ConnectError("boom"),
+        ]
+        metrics = RequestMetrics()
+        self.client.add_observer(metrics)
+
+        await self.client.send_request(SESSION_URL)
+        with pytest.raises(AqualinkServiceException):
+            await self.client.send_request(SESSION_URL)
+        with pytest.raises(httpx.ConnectError):
+            await self.client.send_request(SESSION_URL)
+
+        session = metrics.endpoints["session"]
+        assert session.requests == 3
+        assert session.errors == 2
+        assert session.statuses == {200: 1, 500: 1}
+        assert session.latency.count == 3
+        assert metrics.commands["get_home"].requests == 3
+
+    @respx.mock
+    async def test_observer_exception(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        respx_mock.get(SESSION_URL).mock(httpx.Response(status_code=200))
+        self.client.add_observer(
+            MagicMock(request_started=MagicMock(side_effect=RuntimeError))
+        )
+        observer = MagicMock()
+        self.client.add_observer(observer)
+
+        await self.client.send_request(SESSION_URL)
+        observer.request_finished.assert_called_once()
+
+    @respx.mock
+    async def test_remove_observer(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        respx_mock.get(SESSION_URL).mock(httpx.Response(status_code=200))
+        observer = MagicMock()
+        remove = self.client.add_observer(observer)
+        remove()
+        remove()
+
+        with patch.object(self.client, "_observed_request") as observed:
+            await self.client.send_request(SESSION_URL)
+
+        observer.request_started.assert_not_called()
+        observed.assert_not_called()
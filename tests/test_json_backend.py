@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import json
+import unittest
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from iaqualink import json_backend
+from iaqualink.exception import AqualinkInvalidParameterException
+
+
+class TestJsonBackend(unittest.TestCase):
+    def setUp(self) -> None:
+        self.previous = json_backend.get_backend()
+
+    def tearDown(self) -> None:
+        json_backend.set_backend(self.previous)
+
+    def test_stdlib(self) -> None:
+        assert json_backend.set_backend("json") == "json"
+        assert json_backend.get_backend() == "json"
+        assert json_backend.loads(b'{"a": [1, "b"]}') == {"a": [1, "b"]}
+
+    def test_default(self) -> None:
+        name = json_backend.set_backend()
+        assert name in json_backend.JSON_BACKENDS
+        assert json_backend.get_backend() == name
+
+    def test_unknown(self) -> None:
+        with pytest.raises(AqualinkInvalidParameterException):
+            json_backend.set_backend("foo")
+        assert json_backend.get_backend() == self.previous
+
+    def test_not_installed(self) -> None:
+        def missing() -> None:
+            raise ImportError
+
+        backends = {"orjson": missing, "json": lambda: json.loads}
+        with patch.dict(json_backend.JSON_BACKENDS, backends, clear=True):
+            with pytest.raises(AqualinkInvalidParameterException):
+                json_backend.set_backend("orjson")
+            assert json_backend.set_backend() == "json"
+
+    def test_decode_response(self) -> None:
+        data = {"home_screen": [{"status": "Online"}, {"temp": "é"}]}
+        for name in json_backend.JSON_BACKENDS:
+            try:
+                json_backend.set_backend(name)
+            except AqualinkInvalidParameterException:
+                continue
+            response = httpx.Response(status_code=200, json=data)
+            assert json_backend.decode_response(response) == data
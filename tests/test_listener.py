@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import asyncio
+import gc
+import unittest
+from unittest.mock import MagicMock
+
+from iaqualink.listener import ListenerRegistry, schedule
+
+
+class Target:
+    def __init__(self) -> None:
+        self.calls: list[int] = []
+
+    def callback(self, value: int) -> None:
+        self.calls.append(value)
+
+
+class TestListenerRegistry(unittest.IsolatedAsyncioTestCase):
+    def test_notify(self) -> None:
+        registry = ListenerRegistry()
+        callback = MagicMock()
+        registry.add(callback, weak=False)
+        assert registry.notify(1) == []
+        callback.assert_called_once_with(1)
+
+    def test_remove(self) -> None:
+        registry = ListenerRegistry()
+        callback = MagicMock()
+        remove = registry.add(callback, weak=False)
+        remove()
+        remove()
+        registry.notify(1)
+        callback.assert_not_called()
+        assert len(registry) == 0
+
+    def test_weak_method(self) -> None:
+        registry = ListenerRegistry()
+        target = Target()
+        registry.add(target.callback)
+        registry.notify(1)
+        assert target.calls == [1]
+
+        del target
+        gc.collect()
+        assert len(registry) == 0
+
+    def test_weak_function(self) -> None:
+        registry = ListenerRegistry()
+        registry.add(lambda _: None)
+        gc.collect()
+        assert len(registry) == 0
+
+    def test_strong_function(self) -> None:
+        registry = ListenerRegistry()
+        registry.add(lambda _: None, weak=False)
+        gc.collect()
+        assert len(registry) == 1
+
+    def test_exception(self) -> None:
+        registry = ListenerRegistry()
+        callback = MagicMock()
+        registry.add(MagicMock(side_effect=RuntimeError), weak=False)
+        registry.add(callback, weak=False)
+        registry.notify(1)
+        callback.assert_called_once_with(1)
+
+    async def test_async_callbacks(self) -> None:
+        registry = ListenerRegistry()
+        calls = []
+        done = asyncio.Event()
+
+        async def failing(_: int) -> None:
+            raise RuntimeError
+
+        async def callback(value: int) -> None:
+            calls.append(value)
+            done.set()
+
+        registry.add(failing, weak=False)
+        registry.add(callback, weak=False)
+
+        schedule(registry.notify(1))
+        assert calls == []
+        await asyncio.wait_for(done.wait(), 1)
+        assert calls == [1]
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+import respx
+import respx.router
+
+from iaqualink.client import AqualinkClient
+from iaqualink.exception import (
+    AqualinkInvalidParameterException,
+    AqualinkServiceException,
+    AqualinkServiceUnavailableException,
+)
+from iaqualink.pool import AqualinkConnectionPool
+from iaqualink.retry import CircuitState
+
+from .base import TestBase, dotstar, resp_200
+
+
+class TestAqualinkConnectionPool(TestBase):
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.pool = AqualinkConnectionPool(max_streams_per_host=2)
+        self.addAsyncCleanup(self.pool.close)
+
+    def test_invalid_max_streams(self) -> None:
+        with pytest.raises(AqualinkInvalidParameterException):
+            AqualinkConnectionPool(max_streams_per_host=0)
+
+    def test_invalid_failure_threshold(self) -> None:
+        with pytest.raises(AqualinkInvalidParameterException):
+            AqualinkConnectionPool(failure_threshold=0)
+
+    def test_mutually_exclusive_parameters(self) -> None:
+        with pytest.raises(AqualinkInvalidParameterException):
+            AqualinkClient(
+                "foo", "bar", httpx_client=httpx.AsyncClient(), pool=self.pool
+            )
+
+    def test_attached_clients(self) -> None:
+        a = AqualinkClient("a", "a", pool=self.pool)
+        b = AqualinkClient("b", "b", pool=self.pool)
+        assert a.pool is b.pool
+        assert self.pool.stats.clients == 2
+
+    @respx.mock
+    async def test_shared_client(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        respx_mock.route(dotstar).mock(resp_200)
+        a = AqualinkClient("a", "a", pool=self.pool)
+        b = AqualinkClient("b", "b", pool=self.pool)
+
+        await a.send_request("https://p-api.iaqualink.net/foo")
+        await b.send_request("https://p-api.iaqualink.net/bar")
+        await b.send_request("https://r-api.iaqualink.net/baz")
+
+        assert a.pool._client is b.pool._client
+        stats = self.pool.stats
+        assert stats.requests == 3
+        assert stats.in_flight == 0
+        assert stats.hosts["p-api.iaqualink.net"].requests == 2
+        assert stats.hosts["r-api.iaqualink.net"].requests == 1
+
+    @respx.mock
+    async def test_client_close_keeps_pool(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        respx_mock.route(dotstar).mock(resp_200)
+        a = AqualinkClient("a", "a", pool=self.pool)
+        b = AqualinkClient("b", "b", pool=self.pool)
+        await a.send_request("https://p-api.iaqualink.net/")
+
+        await a.close()
+
+        assert self.pool._client is not None
+        assert self.pool.stats.clients == 1
+        await b.send_request("https://p-api.iaqualink.net/")
+
+    @respx.mock
+    async def test_max_streams_per_host(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        async def side_effect(_: httpx.Request) -> httpx.Response:
+            await asyncio.sleep(0.01)
+            return httpx.Response(status_code=200, json={})
+
+        respx_mock.route(dotstar).mock(side_effect=side_effect)
+        clients = [AqualinkClient(f"{i}", "", pool=self.pool) for i in range(5)]
+
+        await asyncio.gather(
+            *[x.send_request("https://p-api.iaqualink.net/") for x in clients],
+            clients[0].send_request("https://r-api.iaqualink.net/"),
+        )
+
+        stats = self.pool.stats
+        assert stats.hosts["p-api.iaqualink.net"].peak_in_flight == 2
+        assert stats.hosts["r-api.iaqualink.net"].peak_in_flight == 1
+        assert stats.hosts["p-api.iaqualink.net"].waiting == 0
+
+    async def test_close_foreign_client(self) -> None:
+        client = httpx.AsyncClient()
+        pool = AqualinkConnectionPool(httpx_client=client)
+        await pool.close()
+        assert client.is_closed is False
+        await client.aclose()
+
+    @respx.mock
+    async def test_circuit_breaker(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        route = respx_mock.route(host="p-api.iaqualink.net")
+        route.side_effect = [
+            httpx.Response(status_code=503),
+            httpx.ConnectError("boom"),
+        ]
+        respx_mock.route(dotstar).mock(resp_200)
+        pool = AqualinkConnectionPool(failure_threshold=2, reset_timeout=60)
+        self.addAsyncCleanup(pool.close)
+        client = AqualinkClient("foo", "bar", pool=pool)
+
+        with pytest.raises(AqualinkServiceException):
+            await client.send_request("https://p-api.iaqualink.net/")
+        with pytest.raises(httpx.ConnectError):
+            await client.send_request("https://p-api.iaqualink.net/")
+        with pytest.raises(AqualinkServiceUnavailableException):
+            await client.send_request("https://p-api.iaqualink.net/")
+
+        # Other hosts aren't affected.
+        await client.send_request("https://r-api.iaqualink.net/")
+
+        assert route.call_count == 2
+        host = pool.stats.hosts["p-api.iaqualink.net"]
+        assert host.circuit is CircuitState.OPEN
+        assert host.rejected == 1
+        assert host.requests == 2
+        assert pool.stats.hosts["r-api.iaqualink.net"].circuit is (
+            CircuitState.CLOSED
+        )
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import unittest
+
+import pytest
+import respx
+import respx.router
+
+from iaqualink.client import AqualinkClient
+from iaqualink.exception import AqualinkInvalidParameterException
+from iaqualink.ratelimit import Priority, RateLimit, RateLimiter, TokenBucket
+from iaqualink.simulator import AqualinkSimulator
+
+from .base import dotstar, resp_200
+
+
+class TestRateLimit(unittest.TestCase):
+    def test_invalid(self) -> None:
+        with pytest.raises(AqualinkInvalidParameterException):
+            RateLimit(rate=0)
+        with pytest.raises(AqualinkInvalidParameterException):
+            RateLimit(rate=1, burst=0)
+
+
+class TestTokenBucket(unittest.IsolatedAsyncioTestCase):
+    async def test_burst(self) -> None:
+        bucket = TokenBucket(RateLimit(rate=1, burst=3))
+        waits = [await bucket.acquire() for _ in range(3)]
+        assert waits == [0, 0, 0]
+        assert bucket.waits[Priority.COMMAND].count == 3
+
+    async def test_rate(self) -> None:
+        bucket = TokenBucket(RateLimit(rate=100, burst=1))
+        start = time.monotonic()
+        await asyncio.gather(*[bucket.acquire() for _ in range(5)])
+        # The first token is there already, the others take 10ms each.
+        assert time.monotonic() - start >= 0.035
+        assert bucket.waits[Priority.COMMAND].max > 0
+        assert bucket.waiting == 0
+
+    async def test_priority(self) -> None:
+        bucket = TokenBucket(RateLimit(rate=100, burst=1))
+        await bucket.acquire()
+        order = []
+
+        async def acquire(name: str, priority: Priority) -> None:
+            await bucket.acquire(priority)
+            order.append(name)
+
+        tasks = [
+            asyncio.create_task(acquire("poll1", Priority.POLL)),
+            asyncio.create_task(acquire("poll2", Priority.POLL)),
+            asyncio.create_task(acquire("command", Priority.COMMAND)),
+        ]
+        await asyncio.gather(*tasks)
+
+        assert order == ["command", "poll1", "poll2"]
+        assert bucket.waits[Priority.POLL].count == 2
+
+    async def test_cancelled(self) -> None:
+        bucket = TokenBucket(RateLimit(rate=100, burst=1))
+        await bucket.acquire()
+        task = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0)
+        assert bucket.waiting == 1
+
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert bucket.waiting == 0
+        await bucket.acquire()
+
+
+class TestRateLimiter(unittest.IsolatedAsyncioTestCase):
+    async def test_buckets(self) -> None:
+        limiter = RateLimiter(
+            hosts={"p-api.iaqualink.net": RateLimit(rate=10, burst=2)},
+            account=RateLimit(rate=10, burst=5),
+        )
+        await limiter.acquire("https://p-api.iaqualink.net/x", "a")
+        await limiter.acquire("https://r-api.iaqualink.net/x", "a")
+        await limiter.acquire("https://p-api.iaqualink.net/x", "b")
+
+        assert set(limiter.hosts) == {"p-api.iaqualink.net"}
+        assert set(limiter.accounts) == {"a", "b"}
+        assert limiter.waits[Priority.COMMAND].count == 3
+
+    async def test_default(self) -> None:
+        limiter = RateLimiter(default=RateLimit(rate=10))
+        await limiter.acquire(
+            "https://r-api.iaqualink.net/x", "a", Priority.POLL
+        )
+        assert set(limiter.hosts) == {"r-api.iaqualink.net"}
+        assert limiter.accounts == {}
+        assert limiter.waits[Priority.POLL].count == 1
+
+    async def test_no_limits(self) -> None:
+        limiter = RateLimiter()
+        assert await limiter.acquire("https://r-api.iaqualink.net/", "a") == 0
+        assert limiter.hosts == {}
+
+
+class TestClientRateLimiter(unittest.IsolatedAsyncioTestCase):
+    @respx.mock
+    async def test_send_request(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        respx_mock.route(dotstar).mock(resp_200)
+        limiter = RateLimiter(account=RateLimit(rate=10, burst=1))
+        client = AqualinkClient("foo", "bar", rate_limiter=limiter)
+        self.addAsyncCleanup(client.close)
+
+        url = "https://p-api.iaqualink.net/"
+        await asyncio.gather(
+            client.send_request(url, priority=Priority.POLL),
+            client.send_request(url, priority=Priority.POLL),
+        )
+
+        bucket = limiter.accounts["foo"]
+        assert bucket.waits[Priority.POLL].count == 2
+        assert bucket.waits[Priority.POLL].max > 0
+
+    async def test_system_priorities(self) -> None:
+        simulator = AqualinkSimulator(iaqua_systems=1, exo_systems=1)
+        limiter = RateLimiter(default=RateLimit(rate=1000, burst=100))
+        client = simulator.client()
+        client.rate_limiter = limiter
+        self.addAsyncCleanup(client.close)
+
+        await client.login()
+        systems = await client.get_systems()
+        for system in systems.values():
+            await system.update()
+        await systems["IAQUA00000"].set_aux("aux_1")
+
+        # Login, systems list and the aux toggle are commands, screens and
+        # shadow reads are polls.
+        assert limiter.waits[Priority.COMMAND].count == 3
+        assert limiter.waits[Priority.POLL].count == 3
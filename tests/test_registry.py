@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import unittest
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock
+
+import pytest
+
+from iaqualink.device import AqualinkDevice
+from iaqualink.exception import AqualinkDeviceNotSupported
+from iaqualink.registry import DeviceRegistry
+from iaqualink.systems.iaqua.device import (
+    IaquaAuxSwitch,
+    IaquaDevice,
+    IaquaSwitch,
+)
+
+if TYPE_CHECKING:
+    from iaqualink.typing import DeviceData
+
+
+class Sensor(AqualinkDevice):
+    pass
+
+
+class Switch(AqualinkDevice):
+    pass
+
+
+class Light(AqualinkDevice):
+    pass
+
+
+class TestDeviceRegistry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.registry = DeviceRegistry[AqualinkDevice](default=Sensor)
+
+    def test_default(self) -> None:
+        assert self.registry.classify({"name": "foo"}) is Sensor
+
+        self.registry.default = None
+        with pytest.raises(AqualinkDeviceNotSupported):
+            self.registry.classify({"name": "foo"})
+
+    def test_names(self) -> None:
+        self.registry.add(Switch, names=["pump", "heater"])
+        assert self.registry.classify({"name": "pump"}) is Switch
+        assert self.registry.classify({"name": "pumps"}) is Sensor
+
+    def test_patterns_in_order(self) -> None:
+        self.registry.add(Switch, suffixes=["_pump"])
+        self.registry.add(Light, prefixes=["aux_"])
+
+        assert self.registry.classify({"name": "spa_pump"}) is Switch
+        assert self.registry.classify({"name": "aux_1"}) is Light
+        # Both match, the rule added first wins.
+        assert self.registry.classify({"name": "aux_pump"}) is Switch
+        # Names are escaped.
+        assert self.registry.classify({"name": "spa.pump"}) is Sensor
+
+    def test_match(self) -> None:
+        self.registry.add(Switch, names=["pump"])
+        self.registry.add(Light, suffixes=["_light"])
+        self.registry.add(Sensor, match=lambda data: "zoneId" in data)
+        self.registry.default = None
+
+        # Predicates go before patterns, but after exact names.
+        data = {"name": "pool_light", "zoneId": "1"}
+        assert self.registry.classify(data) is Sensor
+        assert self.registry.classify({"name": "pool_light"}) is Light
+        assert self.registry.classify({"name": "pump", "zoneId": "1"}) is Switch
+
+    def test_function_target(self) -> None:
+        def light(data: DeviceData) -> type[AqualinkDevice]:
+            if data["type"] == "1":
+                return Light
+            raise AqualinkDeviceNotSupported(data)
+
+        self.registry.add(light, prefixes=["aux_"])
+
+        assert self.registry.classify({"name": "aux_1", "type": "1"}) is Light
+        with pytest.raises(AqualinkDeviceNotSupported):
+            self.registry.classify({"name": "aux_1", "type": "0"})
+
+    def test_memoized(self) -> None:
+        self.registry.add(Switch, suffixes=["_pump"])
+        self.registry.classify({"name": "spa_pump", "type": "0"})
+        self.registry.classify({"name": "spa_pump", "type": "0"})
+        self.registry.classify({"name": "spa_pump", "type": "1"})
+
+        assert len(self.registry._memo) == 2
+
+        # Rules added later apply to names seen before.
+        self.registry.add(Light, names=["spa_pump"])
+        assert self.registry.classify({"name": "spa_pump"}) is Light
+
+    def test_remove(self) -> None:
+        remove = self.registry.add(Switch, names=["pump"], suffixes=["_pump"])
+        assert self.registry.classify({"name": "pump"}) is Switch
+
+        remove()
+        assert self.registry.classify({"name": "pump"}) is Sensor
+        assert self.registry.classify({"name": "spa_pump"}) is Sensor
+
+    def test_register(self) -> None:
+        @self.registry.register(names=["chiller"])
+        class Chiller(Switch):
+            pass
+
+        assert self.registry.classify({"name": "chiller"}) is Chiller
+
+
+class TestIaquaDeviceRegistry(unittest.TestCase):
+    def test_plugin(self) -> None:
+        class IaquaChiller(IaquaSwitch):
+            pass
+
+        remove = IaquaDevice.registry.add(IaquaChiller, names=["aux_7"])
+        self.addCleanup(remove)
+
+        data = {"name": "aux_7", "state": "0", "type": "0", "label": "CHILL"}
+        device = IaquaDevice.from_data(MagicMock(), data)
+        assert type(device) is IaquaChiller
+
+        remove()
+        device = IaquaDevice.from_data(MagicMock(), data)
+        assert type(device) is IaquaAuxSwitch
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import unittest
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+import respx
+import respx.router
+
+from iaqualink.client import AqualinkClient
+from iaqualink.exception import (
+    AqualinkInvalidParameterException,
+    AqualinkServiceException,
+    AqualinkServiceUnavailableException,
+)
+from iaqualink.retry import CircuitBreaker, CircuitState, RetryPolicy
+from iaqualink.systems.iaqua.system import IaquaSystem
+
+URL = "https://p-api.iaqualink.net/v1/mobile/session.json"
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_invalid(self) -> None:
+        with pytest.raises(AqualinkInvalidParameterException):
+            RetryPolicy(attempts=0)
+
+    def test_should_retry_response(self) -> None:
+        policy = RetryPolicy(attempts=3)
+        r503 = httpx.Response(status_code=503)
+        assert policy.should_retry(0, response=r503) is True
+        assert policy.should_retry(1, response=r503) is True
+        assert policy.should_retry(2, response=r503) is False
+        assert policy.should_retry(0, response=httpx.Response(404)) is False
+        assert policy.should_retry(0, response=r503, idempotent=False) is False
+
+    def test_should_retry_exception(self) -> None:
+        policy = RetryPolicy()
+        connect = httpx.ConnectError("boom")
+        read = httpx.ReadTimeout("boom")
+        assert policy.should_retry(0, exception=connect) is True
+        assert policy.should_retry(0, exception=read) is True
+        assert policy.should_retry(0, exception=connect, idempotent=False)
+        assert not policy.should_retry(0, exception=read, idempotent=False)
+
+    def test_delay(self) -> None:
+        policy = RetryPolicy(backoff=1, factor=2, max_backoff=5, jitter=0)
+        assert [policy.delay(i) for i in range(4)] == [1, 2, 4, 5]
+
+    def test_delay_jitter(self) -> None:
+        policy = RetryPolicy(backoff=1, jitter=0.5)
+        for _ in range(100):
+            assert 0.5 <= policy.delay(0) <= 1.5
+
+    def test_delay_retry_after(self) -> None:
+        policy = RetryPolicy(backoff=1, max_backoff=5, jitter=0)
+        r = httpx.Response(status_code=503, headers={"retry-after": "3"})
+        assert policy.delay(0, r) == 3
+        r = httpx.Response(status_code=503, headers={"retry-after": "30"})
+        assert policy.delay(0, r) == 5
+        r = httpx.Response(status_code=503, headers={"retry-after": "soon"})
+        assert policy.delay(0, r) == 1
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_invalid(self) -> None:
+        with pytest.raises(AqualinkInvalidParameterException):
+            CircuitBreaker(failure_threshold=0)
+
+    def test_opens_after_consecutive_failures(self) -> None:
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state is CircuitState.CLOSED
+        breaker.record_failure()
+        assert breaker.state is CircuitState.OPEN
+
+        with pytest.raises(AqualinkServiceUnavailableException):
+            breaker.before_request()
+        assert breaker.rejected == 1
+
+    def test_half_open(self) -> None:
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        with patch("iaqualink.retry.time.monotonic", return_value=100):
+            breaker.record_failure()
+        with patch("iaqualink.retry.time.monotonic", return_value=200):
+            breaker.before_request()
+            assert breaker.state is CircuitState.HALF_OPEN
+            # Only one trial request at a time.
+            with pytest.raises(AqualinkServiceUnavailableException):
+                breaker.before_request()
+
+            breaker.record_failure()
+            assert breaker.state is CircuitState.OPEN
+            with pytest.raises(AqualinkServiceUnavailableException):
+                breaker.before_request()
+
+        with patch("iaqualink.retry.time.monotonic", return_value=300):
+            breaker.before_request()
+            breaker.record_success()
+        assert breaker.state is CircuitState.CLOSED
+        breaker.before_request()
+
+    def test_release(self) -> None:
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.before_request()
+        breaker.release()
+        breaker.before_request()
+        assert breaker.state is CircuitState.HALF_OPEN
+
+
+class TestClientRetries(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        patcher = patch("iaqualink.client.asyncio.sleep", new=AsyncMock())
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client = AqualinkClient(
+            "foo", "bar", retry_policy=RetryPolicy(attempts=3)
+        )
+        self.addAsyncCleanup(self.client.close)
+
+    @respx.mock
+    async def test_retry_server_error(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        route = respx_mock.get(URL)
+        route.side_effect = [
+            httpx.Response(status_code=502),
+            httpx.ConnectError("boom"),
+            httpx.Response(status_code=200, json={}),
+        ]
+
+        r = await self.client.send_request(URL)
+
+        assert r.status_code == 200
+        assert route.call_count == 3
+        assert self.sleep.await_count == 2
+        assert self.client.retries == 2
+
+    @respx.mock
+    async def test_give_up(self, respx_mock: respx.router.MockRouter) -> None:
+        route = respx_mock.get(URL).mock(httpx.Response(status_code=500))
+
+        with pytest.raises(AqualinkServiceException):
+            await self.client.send_request(URL)
+        assert route.call_count == 3
+
+    @respx.mock
+    async def test_no_retry_client_error(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        route = respx_mock.get(URL).mock(httpx.Response(status_code=404))
+
+        with pytest.raises(AqualinkServiceException):
+            await self.client.send_request(URL)
+        assert route.call_count == 1
+        self.sleep.assert_not_awaited()
+
+    @respx.mock
+    async def test_not_idempotent(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        route = respx_mock.get(URL)
+        route.side_effect = [
+            httpx.ConnectError("boom"),
+            httpx.Response(status_code=500),
+        ]
+
+        with pytest.raises(AqualinkServiceException):
+            await self.client.send_request(URL, idempotent=False)
+        assert route.call_count == 2
+
+    @respx.mock
+    async def test_iaqua_commands(
+        self, respx_mock: respx.router.MockRouter
+    ) -> None:
+        data = {"serial_number": "SN", "device_type": "iaqua", "name": "x"}
+        system = IaquaSystem(self.client, data)
+        route = respx_mock.get(url__startswith=URL)
+        route.mock(httpx.Response(status_code=500))
+
+        with pytest.raises(AqualinkServiceException):
+            await system.set_aux("aux_1")
+        assert route.call_count == 1
+        with pytest.raises(AqualinkServiceException):
+            await system._send_home_screen_request()
+        assert route.call_count == 4
+
+    @respx.mock
+    async def test_no_policy(self, respx_mock: respx.router.MockRouter) -> None:
+        self.client.retry_policy = None
+        route = respx_mock.get(URL).mock(httpx.Response(status_code=503))
+
+        with pytest.raises(AqualinkServiceException):
+            await self.client.send_request(URL)
+        assert route.call_count == 1
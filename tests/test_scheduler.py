@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from iaqualink.device import AqualinkDevice
+from iaqualink.exception import (
+    AqualinkInvalidParameterException,
+    AqualinkServiceException,
+)
+from iaqualink.scheduler import AqualinkPollScheduler
+from iaqualink.system import AqualinkSystem
+
+from .base import TestBase
+
+
+class FakeSystem(AqualinkSystem):
+    def __init__(self, aqualink, serial: str):
+        super().__init__(aqualink, {"serial_number": serial})
+        self.devices = {"pump": AqualinkDevice(self, {"state": "0"})}
+        self.updates = 0
+        self.fail = False
+
+    async def update(self) -> None:
+        self.updates += 1
+        if self.fail:
+            self.online = None
+            raise AqualinkServiceException
+        self.online = True
+
+
+class TestAqualinkPollScheduler(TestBase):
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.system = FakeSystem(self.client, "SN1")
+        self.sut = AqualinkPollScheduler(
+            [self.system],
+            fast_interval=1,
+            base_interval=4,
+            max_interval=16,
+            jitter=0,
+        )
+        self.addAsyncCleanup(self.sut.stop)
+
+    def _make_due(self) -> None:
+        for state in self.sut._states.values():
+            state.next_poll = 0
+
+    def test_invalid_intervals(self) -> None:
+        with pytest.raises(AqualinkInvalidParameterException):
+            AqualinkPollScheduler(fast_interval=10, base_interval=5)
+
+    def test_initial_spread(self) -> None:
+        now = time.monotonic()
+        state = self.sut._states["SN1"]
+        assert now <= state.next_poll <= now + 4
+
+    async def test_poll_nothing_due(self) -> None:
+        for state in self.sut._states.values():
+            state.next_poll = time.monotonic() + 60
+        assert await self.sut.poll() is None
+        assert self.system.updates == 0
+
+    async def test_backoff_unchanged(self) -> None:
+        intervals = []
+        for _ in range(4):
+            self._make_due()
+            await self.sut.poll()
+            intervals += [self.sut.interval(self.system)]
+
+        assert intervals == [8, 16, 16, 16]
+        assert self.sut.stats.polls == 4
+
+    async def test_fast_on_change(self) -> None:
+        self._make_due()
+        await self.sut.poll()
+        self.system._notify_changes(
+            self.system._merge_device_data("pump", {"state": "1"})
+        )
+        self._make_due()
+        await self.sut.poll()
+
+        assert self.sut.interval(self.system) == 1
+        assert self.sut.stats.changes == 1
+
+    async def test_backoff_on_failure(self) -> None:
+        self.system.fail = True
+        self._make_due()
+        result = await self.sut.poll()
+
+        assert result is not None
+        assert len(result.failed) == 1
+        assert self.sut.interval(self.system) == 8
+        assert self.sut.stats.failures == 1
+
+    async def test_command_brings_poll_forward(self) -> None:
+        self._make_due()
+        await self.sut.poll()
+        state = self.sut._states["SN1"]
+        assert state.next_poll > time.monotonic() + 4
+
+        self.system.last_command = time.monotonic()
+        await self.sut.poll()
+
+        assert self.sut.interval(self.system) == 1
+        assert state.next_poll <= self.system.last_command + 1
+
+    async def test_push_connected(self) -> None:
+        self.system.push_connected = True
+        self._make_due()
+        await self.sut.poll()
+        self.system._notify_changes(
+            self.system._merge_device_data("pump", {"state": "1"})
+        )
+        self.system.last_command = time.monotonic()
+        self._make_due()
+        await self.sut.poll()
+
+        # Pushed changes and commands don't make polling faster.
+        assert self.sut.interval(self.system) == 16
+        assert self.sut.stats.changes == 0
+
+    async def test_poke(self) -> None:
+        self._make_due()
+        await self.sut.poll()
+        self.sut.poke(self.system)
+        await self.sut.poll()
+        assert self.system.updates == 2
+
+    async def test_jitter(self) -> None:
+        self.sut.jitter = 0.5
+        for _ in range(20):
+            assert 2 <= self.sut._jittered(4) <= 6
+
+    async def test_start_stop(self) -> None:
+        callback = MagicMock()
+        self.sut.callback = callback
+        self.sut.poke(self.system)
+
+        self.sut.start()
+        assert self.sut.running is True
+        await asyncio.sleep(0.01)
+        await self.sut.stop()
+
+        assert self.sut.running is False
+        assert self.system.updates == 1
+        callback.assert_called_once()
+
+    async def test_remove(self) -> None:
+        self.sut.remove(self.system)
+        self._make_due()
+        assert await self.sut.poll() is None
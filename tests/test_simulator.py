@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import time
+import unittest
+
+import pytest
+
+from iaqualink.exception import (
+    AqualinkServiceException,
+    AqualinkServiceUnauthorizedException,
+    AqualinkSystemOfflineException,
+)
+from iaqualink.simulator import AqualinkSimulator
+from iaqualink.systems.exo.system import ExoSystem
+from iaqualink.systems.iaqua.system import IaquaSystem
+
+
+class TestAqualinkSimulator(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.simulator = AqualinkSimulator(iaqua_systems=2, exo_systems=1)
+        self.client = self.simulator.client()
+        self.addAsyncCleanup(self.client.close)
+
+    async def test_get_systems(self) -> None:
+        await self.client.login()
+        systems = await self.client.get_systems()
+        assert len(systems) == 3
+        assert isinstance(systems["IAQUA00000"], IaquaSystem)
+        assert isinstance(systems["EXO00000"], ExoSystem)
+        assert self.simulator.stats.requests["login"] == 1
+
+    async def test_iaqua_update_and_commands(self) -> None:
+        await self.client.login()
+        system = (await self.client.get_systems())["IAQUA00001"]
+        await system.update()
+
+        assert system.online is True
+        assert system.devices["pool_set_point"].target_temperature == "85"
+        aux = system.devices["aux_4"]
+        assert aux.is_on is False
+
+        await aux.turn_on()
+        assert aux.is_on is True
+        await system.devices["pool_set_point"].set_temperature(90)
+        assert system.devices["pool_set_point"].target_temperature == "90"
+
+        assert self.simulator.stats.requests["cmd:set_aux_4"] == 1
+        assert self.simulator.stats.requests["cmd:set_temps"] == 1
+
+    async def test_iaqua_offline(self) -> None:
+        await self.client.login()
+        system = (await self.client.get_systems())["IAQUA00000"]
+        self.simulator.set_online(system.serial, False)
+        with pytest.raises(AqualinkSystemOfflineException):
+            await system.update()
+
+    async def test_exo_update_and_commands(self) -> None:
+        await self.client.login()
+        system = (await self.client.get_systems())["EXO00000"]
+        await system.update()
+
+        assert system.devices["heating"].target_temperature == "28"
+        await system.devices["aux_1"].turn_on()
+        system.last_refresh = 0
+        await system.update()
+        assert system.devices["aux_1"].is_on is True
+
+    async def test_exo_token_expiry(self) -> None:
+        await self.client.login()
+        system = (await self.client.get_systems())["EXO00000"]
+        self.simulator.expire_tokens()
+
+        await system.update()
+        assert self.simulator.stats.unauthorized == 1
+        assert self.simulator.stats.requests["login"] == 2
+
+    async def test_iaqua_token_expiry(self) -> None:
+        await self.client.login()
+        system = (await self.client.get_systems())["IAQUA00000"]
+        self.simulator.expire_tokens()
+
+        with pytest.raises(AqualinkServiceUnauthorizedException):
+            await system.update()
+
+    async def test_error_rate(self) -> None:
+        simulator = AqualinkSimulator(error_rate=1.0)
+        client = simulator.client()
+        self.addAsyncCleanup(client.close)
+        with pytest.raises(AqualinkServiceException):
+            await client.login()
+        assert simulator.stats.errors == 1
+
+    async def test_latency(self) -> None:
+        simulator = AqualinkSimulator(latency=0.05)
+        client = simulator.client()
+        self.addAsyncCleanup(client.close)
+        start = time.monotonic()
+        await client.login()
+        assert time.monotonic() - start >= 0.05
+
+    async def test_token_expiry_time(self) -> None:
+        simulator = AqualinkSimulator(token_ttl=600)
+        client = simulator.client()
+        self.addAsyncCleanup(client.close)
+        await client.login()
+        expires_at = client.tokens.expires_at
+        assert expires_at is not None
+        assert 590 < expires_at - time.time() <= 600
+
+    async def test_iaqua_icl_light(self) -> None:
+        await self.client.login()
+        system = (await self.client.get_systems())["IAQUA00000"]
+        await system.update()
+
+        light = system.devices["icl_zone_1"]
+        assert light.is_on is False
+        await light.turn_on()
+        assert light.is_on is True
+        await light.set_rgb_color(255, 0, 0)
+        assert light.rgb_color == (255, 0, 0)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import gc
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from iaqualink.singleflight import SingleFlight
+
+
+async def sleep() -> None:
+    await asyncio.sleep(0.01)
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_shared(self) -> None:
+        flight = SingleFlight()
+        func = AsyncMock(side_effect=sleep)
+
+        first = asyncio.ensure_future(flight.run(func))
+        await asyncio.sleep(0)
+        assert flight.in_flight
+        await asyncio.gather(first, flight.run(func))
+
+        func.assert_awaited_once()
+        assert not flight.in_flight
+
+    async def test_exception_shared(self) -> None:
+        flight = SingleFlight()
+        func = AsyncMock(side_effect=RuntimeError)
+
+        results = await asyncio.gather(
+            flight.run(func), flight.run(func), return_exceptions=True
+        )
+
+        func.assert_awaited_once()
+        assert all(isinstance(x, RuntimeError) for x in results)
+
+    async def test_cancelled_caller(self) -> None:
+        flight = SingleFlight()
+        func = AsyncMock(side_effect=sleep)
+
+        first = asyncio.ensure_future(flight.run(func))
+        second = asyncio.ensure_future(flight.run(func))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        await second
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        func.assert_awaited_once()
+
+    async def test_failed_without_callers(self) -> None:
+        loop = asyncio.get_running_loop()
+        handler = MagicMock()
+        loop.set_exception_handler(handler)
+        self.addCleanup(loop.set_exception_handler, None)
+
+        async def fail() -> None:
+            await asyncio.sleep(0.01)
+            raise RuntimeError
+
+        flight = SingleFlight()
+        caller = asyncio.ensure_future(flight.run(fail))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.sleep(0.02)
+
+        del flight, caller
+        gc.collect()
+        handler.assert_not_called()
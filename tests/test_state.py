@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import copy
+import unittest
+from unittest.mock import MagicMock
+
+from iaqualink.device import AqualinkDevice
+from iaqualink.state import DeviceState, deep_merge, parsed_property
+
+
+class FakeDevice(AqualinkDevice):
+    parse_count = 0
+
+    @parsed_property
+    def level(self) -> int:
+        self.parse_count += 1
+        return int(self.data["level"])
+
+
+class TestDeviceState(unittest.TestCase):
+    def test_dict(self) -> None:
+        state = DeviceState({"a": "1"})
+        assert state == {"a": "1"}
+        assert repr(state) == "{'a': '1'}"
+        assert copy.deepcopy(state) == state
+
+    def test_version(self) -> None:
+        state = DeviceState({"a": "1", "b": "2"})
+        operations = [
+            lambda: state.__setitem__("a", "2"),
+            lambda: state.update(c="3"),
+            lambda: state.setdefault("d", "4"),
+            lambda: state.pop("d"),
+            lambda: state.__delitem__("c"),
+            lambda: state.__ior__({"e": "5"}),
+            lambda: state.popitem(),
+            lambda: state.clear(),
+        ]
+        for i, operation in enumerate(operations, start=1):
+            operation()
+            assert state.version == i
+
+
+class TestParsedProperty(unittest.TestCase):
+    def setUp(self) -> None:
+        self.device = FakeDevice(MagicMock(), {"level": "1"})
+
+    def test_data_wrapped(self) -> None:
+        assert isinstance(self.device.data, DeviceState)
+        assert self.device.level == 1
+        self.device.data = {"level": "3"}
+        assert isinstance(self.device.data, DeviceState)
+        assert self.device.level == 3
+        assert self.device.parse_count == 2
+
+    def test_parsed_once(self) -> None:
+        assert self.device.level == 1
+        assert self.device.level == 1
+        assert self.device.parse_count == 1
+
+    def test_data_changed(self) -> None:
+        assert self.device.level == 1
+        self.device.data["level"] = "2"
+        assert self.device.level == 2
+        assert self.device.parse_count == 2
+
+    def test_class_access(self) -> None:
+        assert isinstance(FakeDevice.level, parsed_property)
+
+
+class TestDeepMerge(unittest.TestCase):
+    def test_merge(self) -> None:
+        target = {"a": {"b": 1, "c": 2}, "d": 3}
+        source = {"a": {"c": {"e": 4}}, "d": {"f": 5}}
+        deep_merge(target, source)
+        assert target == {"a": {"b": 1, "c": {"e": 4}}, "d": {"f": 5}}
+
+        # Values aren't shared with the source.
+        source["a"]["c"]["e"] = 0
+        assert target["a"]["c"]["e"] == 4
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import asyncio
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from iaqualink.client import AqualinkClient
+from iaqualink.device import AqualinkDevice
 from iaqualink.exception import AqualinkSystemUnsupportedException
-from iaqualink.system import AqualinkSystem
+from iaqualink.system import AqualinkSystem, DeviceChange
 
 
 class TestAqualinkSystem(unittest.IsolatedAsyncioTestCase):
@@ -67,3 +70,199 @@ class TestAqualinkSystem(unittest.IsolatedAsyncioTestCase):
 
         with pytest.raises(NotImplementedError):
             await system.update()
+
+    def _system_with_device(self) -> AqualinkSystem:
+        data = {"id": 1, "serial_number": "ABCDEFG", "device_type": "fake"}
+        system = AqualinkSystem(MagicMock(), data)
+        system.devices["pump"] = AqualinkDevice(
+            system, {"name": "pump", "state": "0"}
+        )
+        return system
+
+    def test_merge_device_data(self) -> None:
+        system = self._system_with_device()
+        changes = system._merge_device_data(
+            "pump", {"name": "pump", "state": "1", "label": "Pump"}
+        )
+        assert changes == [
+            DeviceChange("pump", "state", "0", "1"),
+            DeviceChange("pump", "label", None, "Pump"),
+        ]
+        assert system.devices["pump"].data["state"] == "1"
+
+    def test_merge_device_data_unchanged(self) -> None:
+        system = self._system_with_device()
+        changes = system._merge_device_data("pump", {"state": "0"})
+        assert changes == []
+
+    async def test_optimistic(self) -> None:
+        system = self._system_with_device()
+        device = system.devices["pump"]
+        callback = MagicMock()
+        system.subscribe(callback)
+
+        with patch.object(AqualinkDevice, "name", "pump"):
+            async with system._optimistic(device, "state", "1"):
+                assert device.data["state"] == "1"
+                callback.assert_called_once_with(
+                    [DeviceChange("pump", "state", "0", "1")]
+                )
+                # Command responses don't override the local value.
+                system._merge_device_data("pump", {"state": "0"})
+                assert device.data["state"] == "1"
+
+        # Nor do refreshes sent before the command completed.
+        system._data_sent_at = 0.0
+        system._merge_device_data("pump", {"state": "0"})
+        assert device.data["state"] == "1"
+
+        # The next refresh has the final say.
+        system._data_sent_at = time.monotonic()
+        changes = system._merge_device_data("pump", {"state": "0"})
+        assert changes == [DeviceChange("pump", "state", "1", "0")]
+        assert system._pending == {}
+
+    async def test_optimistic_expired(self) -> None:
+        system = self._system_with_device()
+        device = system.devices["pump"]
+
+        with patch.object(AqualinkDevice, "name", "pump"):
+            async with system._optimistic(device, "speed", "1"):
+                pass
+
+        # Refreshes that don't report the attribute keep it pending...
+        with system._refresh_data(time.monotonic()):
+            system._merge_device_data("pump", {"state": "0"})
+        assert ("pump", "speed") in system._pending
+
+        # ...until it times out.
+        system.pending_timeout = 0
+        with system._refresh_data(time.monotonic()):
+            system._merge_device_data("pump", {"state": "0"})
+        assert system._pending == {}
+        assert device.data["speed"] == "1"
+
+    async def test_optimistic_unconfirmed(self) -> None:
+        system = self._system_with_device()
+        device = system.devices["pump"]
+        callback = MagicMock()
+
+        with patch.object(AqualinkDevice, "name", "pump"):
+            async with system._optimistic(device, "state", "1"):
+                # Reported while the command was in flight.
+                system._merge_device_data("pump", {"state": "0"})
+
+        system.subscribe(callback)
+        system.pending_timeout = 0
+        with system._refresh_data(time.monotonic()):
+            pass
+
+        assert system._pending == {}
+        assert device.data["state"] == "0"
+        callback.assert_called_once_with(
+            [DeviceChange("pump", "state", "1", "0")]
+        )
+
+    async def test_optimistic_failure(self) -> None:
+        system = self._system_with_device()
+        device = system.devices["pump"]
+
+        with (
+            patch.object(AqualinkDevice, "name", "pump"),
+            pytest.raises(RuntimeError),
+        ):
+            async with system._optimistic(device, "state", "1"):
+                raise RuntimeError
+
+        assert device.data["state"] == "0"
+        assert system._pending == {}
+
+    def test_added_device_changes(self) -> None:
+        system = self._system_with_device()
+        assert system._added_device_changes("pump") == [
+            DeviceChange("pump", "name", None, "pump"),
+            DeviceChange("pump", "state", None, "0"),
+        ]
+
+    def test_notify_changes_merged(self) -> None:
+        system = self._system_with_device()
+        callback = MagicMock()
+        system.subscribe(callback)
+
+        system._notify_changes(
+            [
+                DeviceChange("pump", "state", "0", "1"),
+                DeviceChange("pump", "name", "pump", "Pump"),
+                DeviceChange("pump", "state", "1", "2"),
+                DeviceChange("pump", "name", "Pump", "pump"),
+            ]
+        )
+
+        expected = [DeviceChange("pump", "state", "0", "2")]
+        callback.assert_called_once_with(expected)
+        assert system.last_changes == expected
+        assert system.change_count == 1
+
+    def test_notify_no_changes(self) -> None:
+        system = self._system_with_device()
+        callback = MagicMock()
+        system.subscribe(callback)
+        system._notify_changes([])
+        callback.assert_not_called()
+        assert system.last_changes == []
+
+    def test_unsubscribe(self) -> None:
+        system = self._system_with_device()
+        callback = MagicMock()
+        unsubscribe = system.subscribe(callback)
+        unsubscribe()
+        unsubscribe()
+        system._notify_changes([DeviceChange("pump", "state", "0", "1")])
+        callback.assert_not_called()
+
+    def test_subscriber_exception(self) -> None:
+        system = self._system_with_device()
+        callback = MagicMock()
+        system.subscribe(MagicMock(side_effect=RuntimeError))
+        system.subscribe(callback)
+        system._notify_changes([DeviceChange("pump", "state", "0", "1")])
+        callback.assert_called_once()
+
+    def test_device_listeners(self) -> None:
+        system = self._system_with_device()
+        system.devices["heater"] = AqualinkDevice(
+            system, {"name": "heater", "state": "0"}
+        )
+        pump_callback = MagicMock()
+        heater_callback = MagicMock()
+        system.devices["pump"].add_listener(pump_callback, weak=False)
+        system.devices["heater"].add_listener(heater_callback, weak=False)
+
+        changes = [
+            DeviceChange("pump", "state", "0", "1"),
+            DeviceChange("pump", "label", None, "Pump"),
+        ]
+        system._notify_changes(changes)
+
+        pump_callback.assert_called_once_with(changes)
+        heater_callback.assert_not_called()
+
+    def test_add_listener_weak(self) -> None:
+        system = self._system_with_device()
+        system.add_listener(lambda _: None)
+        assert len(system._listeners) == 0
+
+    async def test_async_listener(self) -> None:
+        system = self._system_with_device()
+        received = asyncio.Queue()
+
+        async def callback(changes: list[DeviceChange]) -> None:
+            await received.put(changes)
+
+        system.add_listener(callback, weak=False)
+        system.devices["pump"].add_listener(callback, weak=False)
+        change = DeviceChange("pump", "state", "0", "1")
+        system._notify_changes([change])
+
+        assert await asyncio.wait_for(received.get(), 1) == [change]
+        assert await asyncio.wait_for(received.get(), 1) == [change]